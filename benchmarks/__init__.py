@@ -0,0 +1,90 @@
+'''
+Export benchmarks for RenderMan for Blender.
+
+The benchmarks run the add-on's real exporter (RmanScene and the translators)
+against synthetic scenes, without Blender or RenderMan. The rman, bpy and
+mathutils modules are replaced with the stand-ins in this package: the rman
+stand-in records what the exporter pushed to the scene graph, and the bpy
+stand-in holds just enough scene data for the translators to read.
+
+Run them with:
+
+    python -m benchmarks [--config benchmarks/config.json] [--history FILE]
+
+See suite.py for the benchmarks themselves, and scenes.py for the scenes.
+'''
+
+import sys
+import os
+import types
+import importlib
+
+from . import standin_rman
+from . import standin_bpy
+
+# the add-on registers its preferences under this name, so load it as
+# a package with the same name
+ADDON_PACKAGE = 'RenderManForBlender'
+
+__ADDON__ = None
+
+def get_addon_dir():
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_addon():
+    '''
+    Install the stand-in modules, and import the add-on's exporter modules
+    under them. The add-on's own __init__.py is skipped, since it only
+    registers the render engine with Blender.
+
+    Returns:
+        (module) - the add-on package
+    '''
+    global __ADDON__
+    if __ADDON__:
+        return __ADDON__
+
+    standin_rman.install()
+    bpy = standin_bpy.install()
+
+    # nodeitems_utils is only used to build the add menus
+    nodeitems_utils = types.ModuleType('nodeitems_utils')
+    nodeitems_utils.NodeCategory = type('NodeCategory', (object,), {'__init__': lambda self, *args, **kwargs: None})
+    nodeitems_utils.NodeItem = type('NodeItem', (object,), {'__init__': lambda self, *args, **kwargs: None})
+    nodeitems_utils.register_node_categories = lambda *args: None
+    nodeitems_utils.unregister_node_categories = lambda *args: None
+    sys.modules.setdefault('nodeitems_utils', nodeitems_utils)
+
+    addon = types.ModuleType(ADDON_PACKAGE)
+    addon.__path__ = [get_addon_dir()]
+    addon.__file__ = os.path.join(get_addon_dir(), '__init__.py')
+    sys.modules[ADDON_PACKAGE] = addon
+
+    preferences = importlib.import_module('%s.preferences' % ADDON_PACKAGE)
+    standin_bpy.set_addon_preferences(preferences.RendermanPreferences())
+
+    # a stand-in RMANTREE, with descriptions of the few plugins the
+    # benchmark scenes use
+    filepath_utils = importlib.import_module('%s.rman_utils.filepath_utils' % ADDON_PACKAGE)
+    filepath_utils.set_rmantree(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rmantree'))
+
+    # same order as the add-on's load_addon()
+    rman_bl_nodes = importlib.import_module('%s.rman_bl_nodes' % ADDON_PACKAGE)
+    rman_properties = importlib.import_module('%s.rman_properties' % ADDON_PACKAGE)
+    rman_config = importlib.import_module('%s.rman_config' % ADDON_PACKAGE)
+    rman_config.register()
+    rman_bl_nodes.register()
+    rman_properties.register()
+    importlib.import_module('%s.rman_render' % ADDON_PACKAGE)
+    importlib.import_module('%s.rman_scene' % ADDON_PACKAGE)
+
+    __ADDON__ = addon
+    return addon
+
+def get_addon_module(name):
+    '''
+    Return one of the add-on's modules, like 'rman_scene', or
+    'rman_utils.profile_utils'.
+    '''
+    load_addon()
+    return importlib.import_module('%s.%s' % (ADDON_PACKAGE, name))
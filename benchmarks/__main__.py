@@ -0,0 +1,83 @@
+'''
+Command line for the export benchmarks:
+
+    python -m benchmarks                      run everything in config.json
+    python -m benchmarks --scene small        only use the small scene
+    python -m benchmarks --benchmark export   only run the export benchmark
+    python -m benchmarks --threshold 0.1      fail if anything gets 10% slower
+    python -m benchmarks --no-record          don't add this run to the history
+
+Exits with 1 if any of the results regressed.
+'''
+
+import os
+import sys
+import argparse
+
+from . import suite
+from . import get_addon_dir
+
+def main(argv=None):
+    default_config = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='Run the RenderMan for Blender export benchmarks.')
+    parser.add_argument('--config', default=default_config,
+                        help='benchmark config file (default: %(default)s)')
+    parser.add_argument('--history', default=None,
+                        help='history file to compare against and add to (default: from the config)')
+    parser.add_argument('--scene', action='append', dest='scenes',
+                        help='only use this scene (can be given more than once)')
+    parser.add_argument('--benchmark', action='append', dest='benchmarks',
+                        help='only run this benchmark (can be given more than once)')
+    parser.add_argument('--repeat', type=int, default=None,
+                        help='number of times to run each benchmark (default: from the config)')
+    parser.add_argument('--threshold', type=float, default=None,
+                        help='allowed slowdown, as a fraction (default: from the config)')
+    parser.add_argument('--no-record', action='store_true',
+                        help="don't add the results to the history")
+    parser.add_argument('--list', action='store_true',
+                        help='list the benchmarks and scenes, and exit')
+    args = parser.parse_args(argv)
+
+    config = suite.load_config(args.config)
+
+    if args.list:
+        print('benchmarks: %s' % ', '.join(suite.get_benchmarks().keys()))
+        print('scenes: %s' % ', '.join(config['scenes'].keys()))
+        return 0
+
+    for name in (args.benchmarks or []):
+        if name not in suite.get_benchmarks():
+            parser.error('unknown benchmark: %s' % name)
+    for name in (args.scenes or []):
+        if name not in config['scenes']:
+            parser.error('unknown scene: %s' % name)
+
+    history_path = args.history if args.history else config.get('history', 'benchmarks/history.json')
+    if not os.path.isabs(history_path):
+        history_path = os.path.join(get_addon_dir(), history_path)
+    thresholds = dict(config.get('thresholds', {'seconds': 0.25}))
+    if args.threshold is not None:
+        thresholds['seconds'] = args.threshold
+
+    results = suite.run_suite(config, benchmark_names=args.benchmarks, scene_names=args.scenes,
+                              repeat=args.repeat)
+
+    history = suite.load_history(history_path)
+    regressions = suite.check_regressions(results, history, thresholds,
+                                          baseline_runs=config.get('baseline_runs', 5))
+
+    if not args.no_record:
+        history.append(suite.make_history_entry(results))
+        suite.save_history(history_path, history)
+
+    if regressions:
+        print('\nREGRESSIONS:')
+        for msg in regressions:
+            print('  %s' % msg)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
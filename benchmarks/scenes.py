@@ -0,0 +1,392 @@
+'''
+Parametric synthetic scenes for the export benchmarks.
+
+build_scene() makes a scene with the bpy stand-in, out of:
+
+    num_meshes         - mesh objects, each with its own grid mesh
+    polys_per_mesh     - polygons in each of those meshes
+    num_materials      - materials, handed out to the meshes in turn
+    materials_per_mesh - materials on each mesh, assigned to random faces
+    num_instances      - copies of an instanced mesh, placed by a particle system
+    num_hair_systems   - hair particle systems, on an emitter mesh
+    strands_per_hair   - strands in each hair system
+    keys_per_strand    - keys in each strand
+    render_step        - hair render steps (strands get 2**render_step + 1 points)
+    num_particle_systems - emitter particle systems, rendered as points
+    particles_per_system - particles in each of those systems
+    num_lights         - area lights
+    num_light_filters  - light filters, shared by all of the lights
+    num_light_links    - light links, each turning a light off for one mesh
+    animated_fraction  - fraction of the meshes that move over the frame
+    deforming_fraction - fraction of the meshes that deform over the frame
+    subdiv_fraction    - fraction of the meshes that are subdivision surfaces
+    crease_fraction    - fraction of the grid lines of the subdivision meshes
+                         that are creased, like the panel lines on a hard
+                         surface model. Their corners get vertex creases.
+    num_metaballs      - metaball objects, all in the same family, like the
+                         blobs of a fluid sim
+    elements_per_metaball - ball elements in each metaball
+    num_gpencil_layers - layers of a grease pencil object, like the layers of
+                         a 2D animatic
+    strokes_per_layer  - strokes in each grease pencil layer. They cycle
+                         through a line, a dots and a fill material
+    points_per_stroke  - points in each grease pencil stroke
+
+Everything is made from a fixed seed, so the same parameters always give the
+same scene.
+'''
+
+import math
+import numpy as np
+
+from . import standin_bpy
+from .standin_mathutils import Matrix
+
+DEFAULT_SCENE_PARAMS = {'num_meshes': 10,
+                        'polys_per_mesh': 1000,
+                        'num_materials': 4,
+                        'materials_per_mesh': 1,
+                        'num_instances': 100,
+                        'num_hair_systems': 1,
+                        'strands_per_hair': 500,
+                        'keys_per_strand': 5,
+                        'render_step': 3,
+                        'num_particle_systems': 1,
+                        'particles_per_system': 1000,
+                        'num_lights': 4,
+                        'num_light_filters': 1,
+                        'num_light_links': 4,
+                        'animated_fraction': 0.5,
+                        'deforming_fraction': 0.1,
+                        'subdiv_fraction': 0.0,
+                        'crease_fraction': 0.0,
+                        'num_metaballs': 0,
+                        'elements_per_metaball': 100,
+                        'num_gpencil_layers': 0,
+                        'strokes_per_layer': 1000,
+                        'points_per_stroke': 20,
+                        'seed': 0
+                        }
+
+def get_scene_params(params=None):
+    '''
+    Return the full set of scene parameters, with anything missing
+    from params filled in from DEFAULT_SCENE_PARAMS.
+    '''
+    scene_params = dict(DEFAULT_SCENE_PARAMS)
+    if params:
+        unknown = set(params.keys()) - set(DEFAULT_SCENE_PARAMS.keys())
+        if unknown:
+            raise ValueError('Unknown scene parameters: %s' % ', '.join(sorted(unknown)))
+        scene_params.update(params)
+    return scene_params
+
+def make_grid(num_polys, size=2.0):
+    '''
+    Make a grid of quads in the XY plane, with at least num_polys polygons.
+
+    Returns:
+        (tuple) - (P, nverts, verts, uvs), the vertex positions, vertices per
+                  polygon, vertex indices per loop and the uv of each loop
+    '''
+    nx = max(1, int(math.ceil(math.sqrt(num_polys))))
+    ny = max(1, int(math.ceil(num_polys / float(nx))))
+
+    xs = np.linspace(-size * 0.5, size * 0.5, nx + 1, dtype=np.float32)
+    ys = np.linspace(-size * 0.5, size * 0.5, ny + 1, dtype=np.float32)
+    gx, gy = np.meshgrid(xs, ys)
+    P = np.zeros(((nx + 1) * (ny + 1), 3), dtype=np.float32)
+    P[:, 0] = gx.ravel()
+    P[:, 1] = gy.ravel()
+
+    row = np.arange(ny)[:, None] * (nx + 1)
+    col = np.arange(nx)[None, :]
+    v0 = (row + col).ravel()
+    verts = np.stack((v0, v0 + 1, v0 + nx + 2, v0 + nx + 1), axis=1).ravel().astype(np.int32)
+    nverts = np.full(nx * ny, 4, dtype=np.int32)
+    uvs = (P[verts, 0:2] / size) + 0.5
+    return (P, nverts, verts, uvs)
+
+def _add_creases(mesh, rng, crease_fraction):
+    '''
+    Crease a random selection of the grid lines of a grid mesh, along with
+    the vertices where they cross. The sharpness is picked per line, from a
+    few values.
+    '''
+    co = mesh.vertices._arrays['co']
+    edges = mesh.edges._arrays['vertices']
+    creases = mesh.edges._arrays['crease']
+    xs = np.unique(co[:, 0])
+    ys = np.unique(co[:, 1])
+    sharpness = np.array([0.25, 0.5, 1.0], dtype=np.float32)
+
+    crease_x = xs[rng.uniform(size=len(xs)) < crease_fraction]
+    crease_y = ys[rng.uniform(size=len(ys)) < crease_fraction]
+    for axis, lines in ((0, crease_x), (1, crease_y)):
+        for value in lines:
+            on_line = (co[edges[:, 0], axis] == value) & (co[edges[:, 1], axis] == value)
+            creases[on_line] = sharpness[rng.randint(len(sharpness))]
+
+    corners = np.isin(co[:, 0], crease_x) & np.isin(co[:, 1], crease_y)
+    mesh.vertices._arrays['crease'][corners] = 1.0
+
+def _make_animation_data(data_paths):
+    fcurves = [standin_bpy.PropertyGroup(data_path=p) for p in data_paths]
+    action = standin_bpy.PropertyGroup(fcurves=fcurves)
+    return standin_bpy.PropertyGroup(action=action, drivers=[])
+
+def _translate_anim(base_mtx, direction):
+    def anim_func(frame):
+        return Matrix.Translation([d * frame for d in direction]) @ base_mtx
+    return anim_func
+
+def _wave_deform(mesh, frame):
+    co = mesh.vertices._arrays['co']
+    deformed = co.copy()
+    deformed[:, 2] = 0.1 * np.sin(co[:, 0] * 4.0 + frame)
+    return deformed
+
+def _make_mesh_object(name, mesh, mtx, materials):
+    ob = standin_bpy.Object(name, data=mesh, ob_type='MESH')
+    ob.matrix_world = mtx
+    for mat in materials:
+        mesh.materials.link(mat)
+    ob.material_slots_set(materials)
+    return ob
+
+def _make_particles(rng, count, radius=5.0):
+    location = rng.uniform(-radius, radius, (count, 3)).astype(np.float32)
+    rotation = np.zeros((count, 4), dtype=np.float32)
+    rotation[:, 0] = 1.0
+    alive_prop = standin_bpy.Particle.bl_rna.properties['alive_state']
+    alive_state = np.full(count, alive_prop.enum_items['ALIVE'].value, dtype=np.int32)
+    arrays = {'location': location,
+              'rotation': rotation,
+              'velocity': rng.uniform(-1.0, 1.0, (count, 3)).astype(np.float32),
+              'angular_velocity': np.zeros((count, 3), dtype=np.float32),
+              'size': rng.uniform(0.01, 0.05, count).astype(np.float32),
+              'birth_time': np.zeros(count, dtype=np.float32),
+              'die_time': np.full(count, 1000.0, dtype=np.float32),
+              'lifetime': np.full(count, 1000.0, dtype=np.float32),
+              'alive_state': alive_state
+              }
+    return standin_bpy.ArrayCollection(count, arrays, enums={'alive_state': alive_prop})
+
+def _add_particle_system(ob, psys):
+    ob.particle_systems.link(psys)
+    psys.parent = ob
+    ob.modifiers.link(standin_bpy.Modifier('%s-modifier' % psys.name, 'PARTICLE_SYSTEM', particle_system=psys))
+
+def _make_gpencil_material(name, mode='LINE', show_stroke=True, show_fill=False):
+    mat = standin_bpy.Material(name)
+    mat.is_grease_pencil = True
+    mat.grease_pencil = standin_bpy.PropertyGroup(hide=False, mode=mode, show_stroke=show_stroke,
+                                                  stroke_style='SOLID', color=(0.0, 0.0, 0.0, 1.0),
+                                                  show_fill=show_fill, fill_style='SOLID',
+                                                  fill_color=(0.5, 0.5, 0.5, 1.0))
+    return mat
+
+def _make_gpencil_object(rng, num_layers, strokes_per_layer, points_per_stroke):
+    gp = standin_bpy.GreasePencil('GPencil')
+    for mat in (_make_gpencil_material('GP.Line'), _make_gpencil_material('GP.Dots', mode='DOTS'),
+                _make_gpencil_material('GP.Fill', show_stroke=False, show_fill=True)):
+        gp.materials.link(mat)
+
+    # fill strokes are triangulated as a fan
+    npts = max(3, points_per_stroke)
+    fan = np.stack((np.zeros(npts - 2, dtype=np.int32), np.arange(1, npts - 1), np.arange(2, npts)), axis=1)
+    angle = np.linspace(0.0, 2.0 * math.pi, npts, endpoint=False)
+    circle = np.stack((np.cos(angle), np.zeros(npts), np.sin(angle)), axis=1)
+    for i in range(num_layers):
+        strokes = []
+        for j in range(strokes_per_layer):
+            material_index = j % 3
+            center = rng.uniform(-10.0, 10.0, 3) * (1.0, 0.0, 1.0)
+            co = center + circle * rng.uniform(0.1, 1.0)
+            pressure = rng.uniform(0.5, 1.0, npts)
+            if material_index == 2:
+                uvs = (circle[fan][:, :, (0, 2)] + 1.0) * 0.5
+                strokes.append(standin_bpy.GPencilStroke(co, pressure, material_index=2, triangles=fan, uvs=uvs))
+            else:
+                strokes.append(standin_bpy.GPencilStroke(co, pressure, material_index=material_index))
+        gp.layers.link(standin_bpy.GPencilLayer('Layer.%03d' % i,
+                                                frames=[standin_bpy.GPencilFrame(1, strokes=strokes)]))
+    return standin_bpy.Object('GPencil', data=gp, ob_type='GPENCIL')
+
+def build_scene(params=None):
+    '''
+    Build a synthetic scene, and make it the current one in the bpy stand-in.
+
+    Args:
+        params (dict) - scene parameters, see DEFAULT_SCENE_PARAMS
+
+    Returns:
+        (tuple) - (bpy.types.Scene, bpy.types.Depsgraph)
+    '''
+    params = get_scene_params(params)
+    rng = np.random.RandomState(params['seed'])
+
+    scene = standin_bpy.Scene('Scene')
+    scene.renderman.object_groups.add().name = 'collector'
+    scene.renderman.light_groups.add().name = 'All'
+
+    # camera
+    cam = standin_bpy.Object('Camera', data=standin_bpy.Camera('Camera'), ob_type='CAMERA')
+    cam.matrix_world = Matrix.Translation((0.0, -30.0, 10.0)) @ Matrix.Rotation(math.radians(70.0), 4, 'X')
+    scene.objects.link(cam)
+    scene.camera = cam
+
+    materials = [standin_bpy.Material('Material.%03d' % i) for i in range(params['num_materials'])]
+
+    # meshes, laid out on a square grid
+    mesh_obs = []
+    num_meshes = params['num_meshes']
+    side = max(1, int(math.ceil(math.sqrt(num_meshes))))
+    num_animated = int(num_meshes * params['animated_fraction'])
+    num_deforming = int(num_meshes * params['deforming_fraction'])
+    num_subdiv = int(num_meshes * params['subdiv_fraction'])
+    P, nverts, verts, uvs = make_grid(params['polys_per_mesh'])
+    mats_per_mesh = max(1, min(params['materials_per_mesh'], len(materials)))
+    for i in range(num_meshes):
+        material_ids = None
+        if mats_per_mesh > 1:
+            material_ids = rng.randint(mats_per_mesh, size=len(nverts)).astype(np.int32)
+        mesh = standin_bpy.Mesh('Mesh.%04d' % i, P.copy(), nverts, verts, material_ids=material_ids)
+        mesh.add_uv_layer('UVMap', uvs)
+        if i < num_subdiv:
+            mesh.renderman.rman_subdiv_scheme = 'catmull-clark'
+            if params['crease_fraction'] > 0.0:
+                _add_creases(mesh, rng, params['crease_fraction'])
+        mtx = Matrix.Translation(((i % side) * 3.0 - side * 1.5, (i // side) * 3.0, 0.0))
+        mats = [materials[(i + j) % len(materials)] for j in range(mats_per_mesh)] if materials else []
+        ob = _make_mesh_object('Mesh.%04d' % i, mesh, mtx, mats)
+        if i < num_animated:
+            ob.animation_data = _make_animation_data(['location'])
+            ob.anim_func = _translate_anim(mtx, (0.1, 0.0, 0.0))
+        if i >= num_meshes - num_deforming:
+            ob.modifiers.link(standin_bpy.Modifier('Wave', 'WAVE'))
+            ob.deform_func = _wave_deform
+        scene.objects.link(ob)
+        mesh_obs.append(ob)
+
+    # emitter, for the instances, hair and particles
+    eP, envs, everts, euvs = make_grid(100, size=10.0)
+    emitter_mesh = standin_bpy.Mesh('Emitter', eP, envs, everts)
+    emitter_mesh.add_uv_layer('UVMap', euvs)
+    emitter = _make_mesh_object('Emitter', emitter_mesh, Matrix.Translation((0.0, 0.0, -2.0)),
+                                materials[0:1])
+    scene.objects.link(emitter)
+
+    if params['num_instances']:
+        iP, inverts, iverts, iuvs = make_grid(params['polys_per_mesh'], size=0.5)
+        material_ids = None
+        if mats_per_mesh > 1:
+            material_ids = rng.randint(mats_per_mesh, size=len(inverts)).astype(np.int32)
+        inst_mesh = standin_bpy.Mesh('Instanced', iP, inverts, iverts, material_ids=material_ids)
+        inst_mesh.add_uv_layer('UVMap', iuvs)
+        inst_ob = _make_mesh_object('Instanced', inst_mesh, Matrix.Translation((0.0, 0.0, -100.0)),
+                                    materials[-mats_per_mesh:])
+        scene.objects.link(inst_ob)
+
+        settings = standin_bpy.ParticleSettings('Instancer', particle_type='EMITTER')
+        settings.render_type = 'OBJECT'
+        settings.instance_object = inst_ob
+        settings.count = params['num_instances']
+        psys = standin_bpy.ParticleSystem('Instancer', settings, _make_particles(rng, params['num_instances'], radius=15.0))
+        _add_particle_system(emitter, psys)
+
+    for i in range(params['num_hair_systems']):
+        settings = standin_bpy.ParticleSettings('Hair.%03d' % i, particle_type='HAIR')
+        settings.render_step = params['render_step']
+        settings.count = params['strands_per_hair']
+        settings.renderman.export_scalp_st = True
+        num_strands = params['strands_per_hair']
+        num_keys = max(2, params['keys_per_strand'])
+        roots = rng.uniform(-5.0, 5.0, (num_strands, 3))
+        roots[:, 2] = 0.0
+        t = np.linspace(0.0, 1.0, num_keys)
+        hair_keys = roots[:, None, :] + t[None, :, None] * np.array((0.05, 0.0, 0.5))[None, None, :]
+        psys = standin_bpy.ParticleSystem('Hair.%03d' % i, settings, _make_particles(rng, num_strands),
+                                          hair_keys=hair_keys)
+        _add_particle_system(emitter, psys)
+
+    for i in range(params['num_particle_systems']):
+        settings = standin_bpy.ParticleSettings('Particles.%03d' % i, particle_type='EMITTER')
+        settings.render_type = 'HALO'
+        settings.count = params['particles_per_system']
+        psys = standin_bpy.ParticleSystem('Particles.%03d' % i, settings,
+                                          _make_particles(rng, params['particles_per_system']))
+        _add_particle_system(emitter, psys)
+
+    # metaballs, all in the family of the first one
+    for i in range(params['num_metaballs']):
+        name = 'Meta' if i == 0 else 'Meta.%03d' % i
+        num_elements = params['elements_per_metaball']
+        mball = standin_bpy.MetaBall(name, rng.uniform(-2.0, 2.0, (num_elements, 3)),
+                                     rng.uniform(0.1, 0.3, num_elements))
+        ob = standin_bpy.Object(name, data=mball, ob_type='META')
+        ob.matrix_world = Matrix.Translation(((i % 5) * 4.0 - 10.0, (i // 5) * 4.0, 5.0))
+        scene.objects.link(ob)
+
+    if params['num_gpencil_layers']:
+        scene.objects.link(_make_gpencil_object(rng, params['num_gpencil_layers'], params['strokes_per_layer'],
+                                                params['points_per_stroke']))
+
+    # light filters, shared by all of the lights
+    filter_names = []
+    for i in range(params['num_light_filters']):
+        light = standin_bpy.Light('LightFilter.%03d' % i)
+        light.renderman.renderman_type = 'FILTER'
+        light.renderman.light_node = 'PxrIntMultLightFilter_settings'
+        ob = standin_bpy.Object('LightFilter.%03d' % i, data=light, ob_type='LIGHT')
+        scene.objects.link(ob)
+        filter_names.append(ob.name)
+
+    light_obs = []
+    for i in range(params['num_lights']):
+        light = standin_bpy.Light('Light.%03d' % i)
+        light.renderman.renderman_type = 'AREA'
+        light.renderman.light_node = 'PxrRectLight_settings'
+        for filter_name in filter_names:
+            light.renderman.light_filters.add().filter_name = filter_name
+        ob = standin_bpy.Object('Light.%03d' % i, data=light, ob_type='LIGHT')
+        angle = 2.0 * math.pi * i / max(1, params['num_lights'])
+        ob.matrix_world = Matrix.Translation((10.0 * math.cos(angle), 10.0 * math.sin(angle), 10.0))
+        scene.objects.link(ob)
+        light_obs.append(ob)
+
+    for i in range(params['num_light_links']):
+        if not light_obs or not mesh_obs:
+            break
+        light_ob = light_obs[i % len(light_obs)]
+        mesh_ob = mesh_obs[i % len(mesh_obs)]
+        ll = scene.renderman.ll.add()
+        ll.name = 'lg_light>%s>obj_object>%s' % (light_ob.name, mesh_ob.name)
+        ll.illuminate = 'OFF'
+
+    depsgraph = standin_bpy.Depsgraph(scene, scene.view_layers[0])
+    standin_bpy.set_scene(scene, depsgraph)
+    scene.frame_set(scene.frame_current)
+    return (scene, depsgraph)
+
+def get_scene_stats(scene):
+    '''
+    Return some counts describing the scene, for the benchmark report.
+    '''
+    stats = {'objects': len(scene.objects), 'polys': 0, 'instances': 0,
+             'hair_strands': 0, 'particles': 0, 'lights': 0, 'metaball_elements': 0}
+    for ob in scene.objects:
+        if ob.type == 'MESH':
+            stats['polys'] += len(ob.data.polygons)
+        elif ob.type == 'LIGHT':
+            stats['lights'] += 1
+        elif ob.type == 'META':
+            stats['metaball_elements'] += len(ob.data.elements)
+        for psys in ob.particle_systems:
+            if psys.settings.type == 'HAIR':
+                stats['hair_strands'] += len(psys.particles)
+            elif psys.settings.render_type == 'OBJECT':
+                stats['instances'] += len(psys.particles)
+            else:
+                stats['particles'] += len(psys.particles)
+    return stats
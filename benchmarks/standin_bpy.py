@@ -0,0 +1,1170 @@
+'''
+A stand-in for the parts of Blender's bpy module that the exporter touches,
+so that scene translation can be benchmarked without Blender.
+
+Property groups are built the same way Blender builds them: bpy.props
+functions return property definitions, and PropertyGroup instances fill in
+their defaults from the class annotations. This means the add-on's own
+preferences class, and property groups generated from the rman_config JSON
+files, can be used as-is.
+
+Mesh, particle and instance data are kept in numpy arrays. As in Blender,
+foreach_get() on these collections is cheap, while touching the elements
+one at a time from python is not, so the benchmarks reward the same
+things a real export would.
+
+Install it with install(), before the add-on is imported.
+'''
+
+import sys
+import os
+import types
+import tempfile
+import numpy as np
+
+from . import standin_mathutils
+Matrix = standin_mathutils.Matrix
+Vector = standin_mathutils.Vector
+
+# ---------------------------------------------------------------------------
+# bpy.props
+# ---------------------------------------------------------------------------
+
+class StandinProperty(object):
+    '''
+    What the bpy.props functions return. Holds the keyword arguments, so the
+    property group can work out the default value.
+    '''
+
+    def __init__(self, kind, kwargs):
+        self.kind = kind
+        self.kwargs = kwargs
+
+    def get_default(self, id_data=None):
+        kw = self.kwargs
+        if self.kind == 'POINTER':
+            ptype = kw.get('type', None)
+            if isinstance(ptype, type) and issubclass(ptype, PropertyGroup):
+                return ptype(id_data=id_data)
+            return None
+        if self.kind == 'COLLECTION':
+            return bpy_prop_collection(item_type=kw.get('type', None), id_data=id_data)
+        if 'default' in kw:
+            default = kw['default']
+            if self.kind in ('FLOAT_VECTOR', 'INT_VECTOR', 'BOOL_VECTOR'):
+                return bpy_prop_array(default)
+            return default
+        if self.kind == 'BOOL':
+            return False
+        if self.kind == 'INT':
+            return 0
+        if self.kind == 'FLOAT':
+            return 0.0
+        if self.kind == 'STRING':
+            return ''
+        if self.kind == 'ENUM':
+            items = kw.get('items', None)
+            if callable(items):
+                # dynamic items, like the list of integrators
+                try:
+                    items = items(None, __context__)
+                except Exception:
+                    items = None
+            if isinstance(items, (list, tuple)) and items:
+                return items[0][0]
+            return ''
+        if self.kind in ('FLOAT_VECTOR', 'INT_VECTOR', 'BOOL_VECTOR'):
+            return bpy_prop_array([0] * kw.get('size', 3))
+        return None
+
+def _make_prop_func(kind):
+    def prop_func(**kwargs):
+        return StandinProperty(kind, kwargs)
+    return prop_func
+
+BoolProperty = _make_prop_func('BOOL')
+IntProperty = _make_prop_func('INT')
+FloatProperty = _make_prop_func('FLOAT')
+StringProperty = _make_prop_func('STRING')
+EnumProperty = _make_prop_func('ENUM')
+PointerProperty = _make_prop_func('POINTER')
+CollectionProperty = _make_prop_func('COLLECTION')
+FloatVectorProperty = _make_prop_func('FLOAT_VECTOR')
+IntVectorProperty = _make_prop_func('INT_VECTOR')
+BoolVectorProperty = _make_prop_func('BOOL_VECTOR')
+
+_PROP_FUNCS = ['BoolProperty', 'IntProperty', 'FloatProperty', 'StringProperty',
+               'EnumProperty', 'PointerProperty', 'CollectionProperty',
+               'FloatVectorProperty', 'IntVectorProperty', 'BoolVectorProperty']
+
+# ---------------------------------------------------------------------------
+# collections
+# ---------------------------------------------------------------------------
+
+class bpy_prop_array(list):
+    '''
+    Vector properties. string_utils.convert_val() looks for this class name.
+    '''
+    pass
+
+class bpy_prop_collection(object):
+    '''
+    A collection of named items, like bpy.data.objects or a CollectionProperty.
+    '''
+
+    def __init__(self, items=None, item_type=None, id_data=None):
+        self._items = []
+        self._by_name = dict()
+        self.item_type = item_type
+        self.id_data = id_data
+        self.active = None
+        if items:
+            for item in items:
+                self.link(item)
+
+    def link(self, item):
+        self._items.append(item)
+        name = getattr(item, 'name', None)
+        if name is not None:
+            self._by_name[name] = item
+        return item
+
+    def _lookup(self, key):
+        if isinstance(key, tuple):
+            # (name, library filepath), like bpy.data collections take
+            name, lib_path = key
+            item = self._lookup(name)
+            lib = getattr(item, 'library', None)
+            if item is None or (lib.filepath if lib else None) != lib_path:
+                return None
+            return item
+        item = self._by_name.get(key, None)
+        if item is None or getattr(item, 'name', None) != key:
+            # items can get renamed after they're added, like
+            # collection.add().name = 'foo', so reindex
+            self._by_name = dict((getattr(i, 'name', None), i) for i in self._items)
+            item = self._by_name.get(key, None)
+        return item
+
+    def add(self):
+        item_type = self.item_type if self.item_type else PropertyGroup
+        return self.link(item_type(id_data=self.id_data))
+
+    def remove(self, item):
+        if isinstance(item, int):
+            item = self._items[item]
+        self._items.remove(item)
+        self._by_name.pop(getattr(item, 'name', None), None)
+
+    def clear(self):
+        self._items = []
+        self._by_name = dict()
+
+    def get(self, key, default=None):
+        item = self._lookup(key)
+        return default if item is None else item
+
+    def find(self, key):
+        item = self._lookup(key)
+        return self._items.index(item) if item is not None else -1
+
+    def keys(self):
+        return [getattr(item, 'name', '') for item in self._items]
+
+    def values(self):
+        return list(self._items)
+
+    def items(self):
+        return [(getattr(item, 'name', ''), item) for item in self._items]
+
+    def foreach_get(self, attr, seq):
+        seq[:] = np.array([getattr(item, attr) for item in self._items]).ravel()
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            item = self._lookup(key)
+            if item is None:
+                raise KeyError(key)
+            return item
+        return self._items[key]
+
+    def __contains__(self, key):
+        if isinstance(key, str):
+            return self._lookup(key) is not None
+        return key in self._items
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+    def __bool__(self):
+        return len(self._items) > 0
+
+class ArrayItem(object):
+    '''
+    One element of an ArrayCollection. Reads its attributes out of the
+    collection's arrays.
+    '''
+
+    __slots__ = ('_coll', 'index')
+
+    def __init__(self, coll, index):
+        self._coll = coll
+        self.index = index
+
+    def __getattr__(self, name):
+        coll = self._coll
+        arr = coll._arrays.get(name, None)
+        if arr is None:
+            derived = coll._derived.get(name, None)
+            if derived is None:
+                raise AttributeError(name)
+            return derived(self.index)
+        val = arr[self.index]
+        enum_prop = coll._enums.get(name, None)
+        if enum_prop is not None:
+            return enum_prop.get_identifier(val)
+        if arr.ndim > 1:
+            return Vector._from_array(val)
+        return val.item() if hasattr(val, 'item') else val
+
+class ArrayCollection(object):
+    '''
+    A collection whose elements are stored as numpy arrays, one per attribute,
+    like mesh vertices or particles. Enum attributes are stored as the value
+    of their item in enums[attr], an EnumPropertyRNA from bl_rna, which is also
+    what foreach_get() gives you in Blender.
+    '''
+
+    def __init__(self, length, arrays=None, derived=None, enums=None):
+        self._len = length
+        self._arrays = arrays if arrays else dict()
+        self._derived = derived if derived else dict()
+        self._enums = enums if enums else dict()
+
+    def foreach_get(self, attr, seq):
+        arr = self._arrays[attr]
+        if isinstance(seq, np.ndarray):
+            seq[:] = arr.reshape(-1)
+        else:
+            seq[:] = arr.reshape(-1).tolist()
+
+    def foreach_set(self, attr, seq):
+        arr = self._arrays[attr]
+        arr.reshape(-1)[:] = seq
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._len
+        if i < 0 or i >= self._len:
+            raise IndexError(i)
+        return ArrayItem(self, i)
+
+    def __iter__(self):
+        for i in range(self._len):
+            yield ArrayItem(self, i)
+
+    def items(self):
+        return [(i, ArrayItem(self, i)) for i in range(self._len)]
+
+    def values(self):
+        return list(self)
+
+# ---------------------------------------------------------------------------
+# bpy.types
+# ---------------------------------------------------------------------------
+
+class bpy_struct(object):
+    pass
+
+class EnumPropertyItem(object):
+
+    def __init__(self, identifier, value):
+        self.identifier = identifier
+        self.value = value
+
+class EnumPropertyRNA(object):
+    '''
+    The bl_rna description of an enum property. Blender stores enums as their
+    value, from the C code, which isn't the same as the index of the item.
+    '''
+
+    def __init__(self, items):
+        self.enum_items = dict([(identifier, EnumPropertyItem(identifier, value))
+                                for identifier, value in items])
+        self._identifiers = dict([(value, identifier) for identifier, value in items])
+
+    def get_identifier(self, value):
+        return self._identifiers[value]
+
+class BlenderRNA(object):
+
+    def __init__(self, properties):
+        self.properties = properties
+
+class Particle(bpy_struct):
+    bl_rna = BlenderRNA({'alive_state': EnumPropertyRNA((('DEAD', 1), ('UNBORN', 2),
+                                                         ('ALIVE', 3), ('DYING', 4)))})
+
+def _init_properties(obj, id_data):
+    '''
+    Fill in the default of every property defined on the class of obj (and its
+    bases), either as an annotation, or as a class attribute, like
+    bpy.types.Scene.renderman. This is what registering a class does in Blender.
+    '''
+    for klass in reversed(type(obj).__mro__):
+        props = list(klass.__dict__.get('__annotations__', dict()).items())
+        props.extend(klass.__dict__.items())
+        for name, prop in props:
+            if isinstance(prop, StandinProperty):
+                setattr(obj, name, prop.get_default(id_data=id_data))
+
+class PropertyGroup(bpy_struct):
+    '''
+    A property group. id_data is the ID that owns it.
+    '''
+
+    def __init__(self, id_data=None, **kwargs):
+        self.id_data = id_data
+        _init_properties(self, id_data)
+        for name, val in kwargs.items():
+            setattr(self, name, val)
+
+class AddonPreferences(PropertyGroup):
+    pass
+
+class ID(bpy_struct):
+
+    def __init__(self, name):
+        _init_properties(self, self)
+        self.name = name
+        self.users = 1
+        self.library = None
+        self.animation_data = None
+        self.is_evaluated = False
+
+    @property
+    def name_full(self):
+        return self.name
+
+    @property
+    def original(self):
+        return self
+
+    def evaluated_get(self, depsgraph):
+        return self
+
+    def copy(self):
+        import copy
+        return copy.copy(self)
+
+class Material(ID):
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.diffuse_color = (0.8, 0.8, 0.8, 1.0)
+        self.specular_intensity = 0.5
+        self.grease_pencil = None
+        self.is_grease_pencil = False
+        self.node_tree = None
+        self.use_nodes = False
+
+class World(ID):
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.color = (0.05, 0.05, 0.05)
+        self.node_tree = None
+        self.use_nodes = False
+
+class Mesh(ID):
+    '''
+    Mesh data. The vertex positions, polygons and loops are numpy arrays.
+
+    Args:
+        name (str) - name of the mesh
+        P (numpy.ndarray) - (npoints, 3) vertex positions
+        nverts (numpy.ndarray) - number of vertices of each polygon
+        verts (numpy.ndarray) - vertex index of each loop (face-vertex)
+        material_ids (numpy.ndarray) - material index of each polygon
+    '''
+
+    def __init__(self, name, P, nverts, verts, material_ids=None):
+        super().__init__(name)
+        self.materials = bpy_prop_collection()
+        self.shape_keys = None
+        self.uv_layers = bpy_prop_collection()
+        self.vertex_colors = bpy_prop_collection()
+        self._set_geometry(P, nverts, verts, material_ids)
+
+    def _set_geometry(self, P, nverts, verts, material_ids=None):
+        npoints = len(P)
+        npolys = len(nverts)
+        nloops = len(verts)
+        loop_start = np.zeros(npolys, dtype=np.int32)
+        if npolys:
+            loop_start[1:] = np.cumsum(nverts)[:-1]
+        if material_ids is None:
+            material_ids = np.zeros(npolys, dtype=np.int32)
+
+        vertex_normals = np.zeros((npoints, 3), dtype=np.float32)
+        vertex_normals[:, 2] = 1.0
+
+        self.vertices = ArrayCollection(npoints, {'co': np.asarray(P, dtype=np.float32),
+                                                  'normal': vertex_normals,
+                                                  'crease': np.zeros(npoints, dtype=np.float32)})
+        self.polygons = ArrayCollection(npolys, {'loop_total': np.asarray(nverts, dtype=np.int32),
+                                                 'loop_start': loop_start,
+                                                 'material_index': np.asarray(material_ids, dtype=np.int32),
+                                                 'use_smooth': np.ones(npolys, dtype=bool)},
+                                        derived={'vertices': self._poly_vertices})
+        self.loops = ArrayCollection(nloops, {'vertex_index': np.asarray(verts, dtype=np.int32),
+                                              'normal': np.zeros((nloops, 3), dtype=np.float32)})
+
+        # unique edges, from consecutive polygon vertices
+        if nloops:
+            poly_of_loop = np.repeat(np.arange(npolys), nverts)
+            next_loop = np.arange(1, nloops + 1)
+            last = (np.arange(nloops) - loop_start[poly_of_loop]) == (np.asarray(nverts)[poly_of_loop] - 1)
+            next_loop[last] = loop_start[poly_of_loop[last]]
+            v0 = np.asarray(verts)
+            v1 = v0[next_loop]
+            edges = np.unique(np.sort(np.stack((v0, v1), axis=1), axis=1), axis=0)
+        else:
+            edges = np.zeros((0, 2), dtype=np.int32)
+        self.edges = ArrayCollection(len(edges), {'vertices': edges.astype(np.int32),
+                                                  'crease': np.zeros(len(edges), dtype=np.float32),
+                                                  'use_edge_sharp': np.zeros(len(edges), dtype=bool)})
+
+    def _poly_vertices(self, i):
+        start = self.polygons._arrays['loop_start'][i]
+        total = self.polygons._arrays['loop_total'][i]
+        return self.loops._arrays['vertex_index'][start:start + total].tolist()
+
+    def calc_normals_split(self):
+        self.loops._arrays['normal'][:] = self.vertices._arrays['normal'][self.loops._arrays['vertex_index']]
+
+    def add_uv_layer(self, name, uvs):
+        layer = PropertyGroup(name=name, active=len(self.uv_layers) == 0, active_render=len(self.uv_layers) == 0)
+        layer.data = ArrayCollection(len(uvs), {'uv': np.asarray(uvs, dtype=np.float32)})
+        self.uv_layers.link(layer)
+        if layer.active:
+            self.uv_layers.active = layer
+        return layer
+
+    def add_vertex_colors(self, name, colors):
+        layer = PropertyGroup(name=name, active=len(self.vertex_colors) == 0, active_render=len(self.vertex_colors) == 0)
+        layer.data = ArrayCollection(len(colors), {'color': np.asarray(colors, dtype=np.float32)})
+        self.vertex_colors.link(layer)
+        if layer.active:
+            self.vertex_colors.active = layer
+        return layer
+
+class Camera(ID):
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.type = 'PERSP'
+        self.lens = 50.0
+        self.lens_unit = 'MILLIMETERS'
+        self.angle = 0.69
+        self.sensor_fit = 'AUTO'
+        self.sensor_width = 36.0
+        self.sensor_height = 24.0
+        self.clip_start = 0.1
+        self.clip_end = 1000.0
+        self.shift_x = 0.0
+        self.shift_y = 0.0
+        self.ortho_scale = 7.0
+        self.dof = PropertyGroup(use_dof=False, focus_object=None, focus_distance=10.0, aperture_fstop=2.8,
+                                 aperture_ratio=1.0, aperture_blades=0, aperture_rotation=0.0)
+
+class Light(ID):
+
+    def __init__(self, name, light_type='AREA'):
+        super().__init__(name)
+        self.type = light_type
+        self.energy = 10.0
+        self.color = (1.0, 1.0, 1.0)
+        self.spot_size = 0.785
+        self.spot_blend = 0.15
+        self.use_square = True
+        self.node_tree = None
+
+class MetaBall(ID):
+    '''
+    Metaball data. The elements are ball elements, with their positions and
+    radii in numpy arrays.
+    '''
+
+    def __init__(self, name, co, radius):
+        super().__init__(name)
+        self.elements = ArrayCollection(len(co), {'co': np.asarray(co, dtype=np.float32),
+                                                  'radius': np.asarray(radius, dtype=np.float32)},
+                                        derived={'id_data': lambda i: self})
+        self.resolution = 0.2
+        self.render_resolution = 0.1
+        self.threshold = 0.6
+        self.materials = bpy_prop_collection()
+
+class GPencilStroke(bpy_struct):
+    '''
+    A grease pencil stroke. The points and the fill triangles are kept in
+    numpy arrays.
+    '''
+
+    def __init__(self, co, pressure, material_index=0, line_width=40, triangles=None, uvs=None):
+        self.points = ArrayCollection(len(co), {'co': np.asarray(co, dtype=np.float32),
+                                                'pressure': np.asarray(pressure, dtype=np.float32)})
+        tris = np.zeros((0, 3), dtype=np.int32) if triangles is None else np.asarray(triangles, dtype=np.int32)
+        uvs = np.zeros((len(tris), 3, 2), dtype=np.float32) if uvs is None else np.asarray(uvs, dtype=np.float32)
+        self.triangles = ArrayCollection(len(tris), {'v1': tris[:, 0].copy(), 'v2': tris[:, 1].copy(),
+                                                     'v3': tris[:, 2].copy(), 'uv1': uvs[:, 0].copy(),
+                                                     'uv2': uvs[:, 1].copy(), 'uv3': uvs[:, 2].copy()})
+        self.material_index = material_index
+        self.line_width = line_width
+        self.draw_cyclic = False
+
+class GPencilFrame(bpy_struct):
+
+    def __init__(self, frame_number, strokes=None):
+        self.frame_number = frame_number
+        self.strokes = bpy_prop_collection(strokes if strokes else [])
+
+class GPencilLayer(bpy_struct):
+
+    def __init__(self, info, frames=None):
+        self.info = info
+        self.hide = False
+        self.frames = bpy_prop_collection(frames if frames else [])
+
+    @property
+    def name(self):
+        return self.info
+
+class GreasePencil(ID):
+
+    def __init__(self, name, layers=None):
+        super().__init__(name)
+        self.layers = bpy_prop_collection(layers if layers else [])
+        self.materials = bpy_prop_collection()
+
+class ParticleSettings(ID):
+
+    def __init__(self, name, particle_type='EMITTER'):
+        super().__init__(name)
+        self.type = particle_type
+        self.render_type = 'HALO' if particle_type == 'EMITTER' else 'PATH'
+        self.material = 1
+        self.material_slot = ''
+        self.instance_object = None
+        self.instance_collection = None
+        self.tip_radius = 0.0
+        self.root_radius = 1.0
+        self.radius_scale = 0.01
+        self.render_step = 3
+        self.display_step = 2
+        self.child_type = 'NONE'
+        self.count = 0
+
+class ParticleSystem(bpy_struct):
+    '''
+    A particle system. For hair, the strands are in hair_keys, an
+    (nstrands, nkeys, 3) array in object space.
+    '''
+
+    def __init__(self, name, settings, particles, hair_keys=None, seed=0):
+        self.name = name
+        self.settings = settings
+        self.particles = particles
+        self.child_particles = []
+        self.hair_keys = hair_keys
+        self.seed = seed
+        self.parent = None
+
+    def co_hair(self, ob, particle_no=0, step=0):
+        keys = self.hair_keys
+        if keys is None or particle_no >= len(keys):
+            return Vector((0.0, 0.0, 0.0))
+        nsteps = 2 ** self.settings.render_step
+        # resample the keys onto the render steps
+        t = (step / float(nsteps)) * (keys.shape[1] - 1)
+        i = min(int(t), keys.shape[1] - 2)
+        f = t - i
+        co = keys[particle_no, i] * (1.0 - f) + keys[particle_no, i + 1] * f
+        return ob.matrix_world @ co
+
+    def uv_on_emitter(self, modifier, particle, particle_no=0, uv_no=0):
+        return (0.5, 0.5)
+
+class Modifier(bpy_struct):
+
+    def __init__(self, name, mod_type, **kwargs):
+        self.name = name
+        self.type = mod_type
+        self.show_viewport = True
+        self.show_render = True
+        for k, v in kwargs.items():
+            setattr(self, k, v)
+
+class MaterialSlot(bpy_struct):
+
+    def __init__(self, material):
+        self.material = material
+        self.link = 'DATA'
+
+    @property
+    def name(self):
+        return self.material.name if self.material else ''
+
+class Collection(ID):
+
+    def __init__(self, name, objects=None):
+        super().__init__(name)
+        self.objects = bpy_prop_collection(objects if objects else [])
+        self.all_objects = self.objects
+        self.instance_offset = (0.0, 0.0, 0.0)
+
+class Object(ID):
+    '''
+    An object. Its matrix_world can be animated by setting anim_func, a function
+    of the frame that returns a Matrix. A mesh can be deformed by setting
+    deform_func, a function of (mesh, frame) that returns new vertex positions.
+    '''
+
+    def __init__(self, name, data=None, ob_type='MESH'):
+        super().__init__(name)
+        self.type = ob_type
+        self.data = data
+        self.matrix_world = Matrix()
+        self.matrix_basis = self.matrix_world
+        self.parent = None
+        self.parent_type = 'OBJECT'
+        self.children = []
+        self.modifiers = bpy_prop_collection()
+        self.particle_systems = bpy_prop_collection()
+        self.material_slots = bpy_prop_collection()
+        self.instance_type = 'NONE'
+        self.instance_collection = None
+        self.color = (1.0, 1.0, 1.0, 1.0)
+        self.hide_render = False
+        self.hide_viewport = False
+        self.pass_index = 0
+        self.anim_func = None
+        self.deform_func = None
+        self._eval_mesh = None
+
+    @property
+    def active_material(self):
+        if len(self.material_slots):
+            return self.material_slots[0].material
+        return None
+
+    @property
+    def is_instancer(self):
+        if self.instance_type == 'COLLECTION' and self.instance_collection:
+            return True
+        for psys in self.particle_systems:
+            if psys.settings.render_type in ('OBJECT', 'COLLECTION'):
+                return True
+        return False
+
+    @property
+    def matrix_local(self):
+        if self.parent:
+            return self.parent.matrix_world.inverted_safe() @ self.matrix_world
+        return self.matrix_world
+
+    @property
+    def location(self):
+        return self.matrix_world.to_translation()
+
+    @property
+    def bound_box(self):
+        if self.type == 'MESH' and self.data and len(self.data.vertices):
+            co = self.data.vertices._arrays['co']
+            lo = co.min(axis=0).tolist()
+            hi = co.max(axis=0).tolist()
+        else:
+            lo, hi = [-1.0] * 3, [1.0] * 3
+        return [(lo[0], lo[1], lo[2]), (lo[0], lo[1], hi[2]), (lo[0], hi[1], hi[2]), (lo[0], hi[1], lo[2]),
+                (hi[0], lo[1], lo[2]), (hi[0], lo[1], hi[2]), (hi[0], hi[1], hi[2]), (hi[0], hi[1], lo[2])]
+
+    def material_slots_set(self, materials):
+        self.material_slots = bpy_prop_collection([MaterialSlot(m) for m in materials])
+
+    def to_mesh(self, preserve_all_data_layers=False, depsgraph=None):
+        if self.type != 'MESH':
+            return None
+        if self._eval_mesh is None:
+            mesh = self.data
+            self._eval_mesh = Mesh('%s-eval' % mesh.name, mesh.vertices._arrays['co'].copy(),
+                                   mesh.polygons._arrays['loop_total'], mesh.loops._arrays['vertex_index'],
+                                   material_ids=mesh.polygons._arrays['material_index'])
+            self._eval_mesh.renderman = mesh.renderman
+            self._eval_mesh.materials = mesh.materials
+            self._eval_mesh.uv_layers = mesh.uv_layers
+            self._eval_mesh.vertex_colors = mesh.vertex_colors
+            if self.deform_func:
+                self._eval_mesh.vertices._arrays['co'][:] = self.deform_func(mesh, __context__.scene.frame_current_final)
+        return self._eval_mesh
+
+    def to_mesh_clear(self):
+        self._eval_mesh = None
+
+    def visible_get(self, view_layer=None, viewport=None):
+        return not self.hide_viewport
+
+    def select_get(self, view_layer=None):
+        return False
+
+    def _evaluate(self, frame):
+        if self.anim_func:
+            self.matrix_world = self.anim_func(frame)
+
+class DepsgraphObjectInstance(bpy_struct):
+    '''
+    Like in Blender, the depsgraph reuses the same instance object while
+    iterating, so the exporter can't hold on to one after the loop moves on.
+    '''
+
+    def __init__(self):
+        self.object = None
+        self.is_instance = False
+        self.instance_object = None
+        self.parent = None
+        self.particle_system = None
+        self.matrix_world = None
+        self.persistent_id = (0, 0, 0, 0, 0, 0, 0, 0)
+        self.random_id = 0
+        self.show_self = True
+        self.show_particles = True
+
+class DepsgraphUpdate(bpy_struct):
+
+    def __init__(self, id, is_updated_geometry=False, is_updated_transform=False, is_updated_shading=False):
+        self.id = id
+        self.is_updated_geometry = is_updated_geometry
+        self.is_updated_transform = is_updated_transform
+        self.is_updated_shading = is_updated_shading
+
+class Depsgraph(bpy_struct):
+
+    def __init__(self, scene, view_layer):
+        self.scene = scene
+        self.scene_eval = scene
+        self.view_layer = view_layer
+        self.view_layer_eval = view_layer
+        self.mode = 'RENDER'
+        self.updates = []
+
+    @property
+    def objects(self):
+        return self.scene.objects
+
+    @property
+    def ids(self):
+        ids = list(self.scene.objects)
+        ids.extend(__data__.materials)
+        ids.extend(__data__.meshes)
+        ids.append(self.scene)
+        return ids
+
+    @property
+    def object_instances(self):
+        ob_inst = DepsgraphObjectInstance()
+        instance_mtx = Matrix()
+        for ob in self.scene.objects:
+            if ob.hide_render:
+                continue
+            ob_inst.object = ob
+            ob_inst.is_instance = False
+            ob_inst.instance_object = None
+            ob_inst.parent = None
+            ob_inst.particle_system = None
+            ob_inst.matrix_world = ob.matrix_world
+            ob_inst.persistent_id = (0, 0, 0, 0, 0, 0, 0, 0)
+            ob_inst.random_id = 0
+            yield ob_inst
+
+            # particle instancers
+            for psys in ob.particle_systems:
+                settings = psys.settings
+                inst_ob = settings.instance_object
+                if settings.render_type != 'OBJECT' or inst_ob is None:
+                    continue
+                loc = psys.particles._arrays['location']
+                size = psys.particles._arrays['size']
+                for i in range(len(psys.particles)):
+                    m = np.identity(4)
+                    m[0:3, 0:3] *= size[i]
+                    m[0:3, 3] = loc[i]
+                    instance_mtx._m = m
+                    ob_inst.object = inst_ob
+                    ob_inst.is_instance = True
+                    ob_inst.instance_object = inst_ob
+                    ob_inst.parent = ob
+                    ob_inst.particle_system = psys
+                    ob_inst.matrix_world = instance_mtx
+                    ob_inst.persistent_id = (i, 0, 0, 0, 0, 0, 0, 0)
+                    ob_inst.random_id = (i * 2654435761) & 0x7fffffff
+                    yield ob_inst
+
+            # collection instancers
+            if ob.instance_type == 'COLLECTION' and ob.instance_collection:
+                for i, inst_ob in enumerate(ob.instance_collection.objects):
+                    instance_mtx._m = ob.matrix_world._m @ inst_ob.matrix_world._m
+                    ob_inst.object = inst_ob
+                    ob_inst.is_instance = True
+                    ob_inst.instance_object = inst_ob
+                    ob_inst.parent = ob
+                    ob_inst.particle_system = None
+                    ob_inst.matrix_world = instance_mtx
+                    ob_inst.persistent_id = (i, 0, 0, 0, 0, 0, 0, 0)
+                    ob_inst.random_id = (i * 2654435761) & 0x7fffffff
+                    yield ob_inst
+
+    def update(self):
+        pass
+
+    def id_eval_get(self, id):
+        return id
+
+class ViewLayer(bpy_struct):
+
+    def __init__(self, name):
+        self.name = name
+        self.use_pass_z = False
+        self.use_pass_normal = False
+        self.use_pass_vector = False
+        self.use_pass_uv = False
+        self.use_pass_object_index = False
+        self.use_pass_shadow = False
+        self.use_pass_diffuse_direct = False
+        self.use_pass_diffuse_indirect = False
+        self.use_pass_diffuse_color = False
+        self.use_pass_glossy_direct = False
+        self.use_pass_glossy_indirect = False
+        self.use_pass_subsurface_indirect = False
+        self.use_pass_emit = False
+        self.depsgraph = None
+
+class RenderSettings(bpy_struct):
+
+    def __init__(self):
+        self.resolution_x = 960
+        self.resolution_y = 540
+        self.resolution_percentage = 100
+        self.pixel_aspect_x = 1.0
+        self.pixel_aspect_y = 1.0
+        self.fps = 24
+        self.fps_base = 1.0
+        self.use_border = False
+        self.use_crop_to_border = False
+        self.border_min_x = 0.0
+        self.border_max_x = 1.0
+        self.border_min_y = 0.0
+        self.border_max_y = 1.0
+        self.film_transparent = False
+        self.engine = 'PRMAN_RENDER'
+        self.filepath = '/tmp/'
+        self.image_settings = PropertyGroup(file_format='OPENEXR')
+
+class Scene(ID):
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.render = RenderSettings()
+        self.objects = bpy_prop_collection()
+        self.camera = None
+        self.world = World('World')
+        self.frame_start = 1
+        self.frame_end = 250
+        self.frame_step = 1
+        self.frame_current = 1
+        self.frame_subframe = 0.0
+        self.view_layers = bpy_prop_collection([ViewLayer('View Layer')])
+        self.collection = Collection('Master Collection')
+
+    @property
+    def frame_current_final(self):
+        return self.frame_current + self.frame_subframe
+
+    def frame_set(self, frame, subframe=0.0):
+        self.frame_current = int(frame)
+        self.frame_subframe = subframe
+        frame_final = self.frame_current_final
+        for ob in self.objects:
+            ob._evaluate(frame_final)
+
+class RenderEngine(bpy_struct):
+    '''
+    Stand-in for the render engine the exporter talks back to.
+    '''
+
+    def __init__(self):
+        self.is_preview = False
+        self.is_animation = False
+        self.num_tag_update = 0
+
+    def frame_set(self, frame, subframe=0.0):
+        __context__.scene.frame_set(frame, subframe)
+
+    def update_stats(self, stats, info):
+        pass
+
+    def tag_update(self):
+        self.num_tag_update += 1
+
+    def tag_redraw(self):
+        pass
+
+    def report(self, type, message):
+        pass
+
+class _TypesModule(types.ModuleType):
+    '''
+    bpy.types. Anything the exporter only uses as a base class, or in an
+    isinstance() check, gets an empty class on first use.
+    '''
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        cls = type(name, (bpy_struct,), dict())
+        setattr(self, name, cls)
+        return cls
+
+# ---------------------------------------------------------------------------
+# bpy.data, bpy.context, bpy.app
+# ---------------------------------------------------------------------------
+
+class BlendData(object):
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.filepath = ''
+        self.is_saved = False
+        self.is_dirty = False
+        self.objects = bpy_prop_collection()
+        self.meshes = bpy_prop_collection()
+        self.materials = bpy_prop_collection()
+        self.lights = bpy_prop_collection()
+        self.cameras = bpy_prop_collection()
+        self.particles = bpy_prop_collection()
+        self.collections = bpy_prop_collection()
+        self.scenes = bpy_prop_collection()
+        self.worlds = bpy_prop_collection()
+        self.images = bpy_prop_collection()
+        self.node_groups = bpy_prop_collection()
+        self.texts = bpy_prop_collection()
+        self.grease_pencils = bpy_prop_collection()
+        self.metaballs = bpy_prop_collection()
+        self.curves = bpy_prop_collection()
+
+class Context(object):
+
+    def __init__(self):
+        self.scene = None
+        self.view_layer = None
+        self.selected_objects = []
+        self.active_object = None
+        self.object = None
+        self.region = None
+        self.region_data = None
+        self.space_data = None
+        self.blend_data = None
+        self.depsgraph = None
+        addon = PropertyGroup(module='RenderManForBlender', preferences=None)
+        self.preferences = PropertyGroup(addons=bpy_prop_collection([PropertyGroup(name='RenderManForBlender',
+                                                                                   preferences=None)]),
+                                         filepaths=PropertyGroup(temporary_directory=tempfile.gettempdir()),
+                                         view=PropertyGroup(show_developer_ui=False))
+
+    def evaluated_depsgraph_get(self):
+        return self.depsgraph
+
+    def set_viewport(self, camera, width=960, height=540):
+        '''
+        Set up a 3D viewport, looking through camera, for interactive renders.
+        '''
+        self.region = PropertyGroup(width=width, height=height)
+        self.region_data = PropertyGroup(view_perspective='CAMERA',
+                                         view_matrix=camera.matrix_world.inverted_safe())
+        self.space_data = PropertyGroup(camera=camera, type='VIEW_3D')
+
+__data__ = BlendData()
+__context__ = Context()
+
+def set_addon_preferences(prefs):
+    __context__.preferences.addons['RenderManForBlender'].preferences = prefs
+
+def set_scene(scene, depsgraph):
+    '''
+    Make this scene the current one, and register its data blocks in bpy.data.
+    '''
+    __data__.clear()
+    __data__.scenes.link(scene)
+    __data__.worlds.link(scene.world)
+    for ob in scene.objects:
+        __data__.objects.link(ob)
+        data = ob.data
+        if data is None:
+            continue
+        if isinstance(data, Mesh):
+            if data.name not in __data__.meshes:
+                __data__.meshes.link(data)
+            for mat in data.materials:
+                if mat and mat.name not in __data__.materials:
+                    __data__.materials.link(mat)
+        elif isinstance(data, Light):
+            __data__.lights.link(data)
+        elif isinstance(data, Camera):
+            __data__.cameras.link(data)
+        elif isinstance(data, GreasePencil):
+            if data.name not in __data__.grease_pencils:
+                __data__.grease_pencils.link(data)
+            for mat in data.materials:
+                if mat and mat.name not in __data__.materials:
+                    __data__.materials.link(mat)
+        elif isinstance(data, MetaBall):
+            if data.name not in __data__.metaballs:
+                __data__.metaballs.link(data)
+        for slot in ob.material_slots:
+            if slot.material and slot.material.name not in __data__.materials:
+                __data__.materials.link(slot.material)
+        for psys in ob.particle_systems:
+            if psys.settings.name not in __data__.particles:
+                __data__.particles.link(psys.settings)
+    __context__.scene = scene
+    __context__.view_layer = scene.view_layers[0]
+    __context__.depsgraph = depsgraph
+    __context__.blend_data = __data__
+    if scene.camera:
+        __context__.set_viewport(scene.camera)
+
+class _Timers(object):
+
+    def __init__(self):
+        self.registered = []
+
+    def register(self, func, first_interval=0.0, persistent=False):
+        self.registered.append((func, first_interval))
+
+    def unregister(self, func):
+        self.registered = [t for t in self.registered if t[0] != func]
+
+    def is_registered(self, func):
+        return any(t[0] == func for t in self.registered)
+
+    def run_all(self):
+        '''
+        Fire all of the registered timers, as if their interval had passed.
+        '''
+        timers = self.registered
+        self.registered = []
+        for func, interval in timers:
+            func()
+
+def _persistent(func):
+    return func
+
+def _abspath(path, start=None, library=None):
+    if path.startswith('//'):
+        return os.path.join(os.path.dirname(__data__.filepath) or tempfile.gettempdir(), path[2:])
+    return path
+
+def install():
+    '''
+    Install the stand-in as the bpy module (and its bpy.props, bpy.types,
+    bpy.app, bpy.app.handlers, bpy.utils and bpy.path sub-modules), along with
+    the mathutils, bgl and blf stand-ins.
+
+    Returns:
+        (module) - the stand-in bpy module
+    '''
+    if 'bpy' in sys.modules and getattr(sys.modules['bpy'], '__standin__', False):
+        return sys.modules['bpy']
+
+    standin_mathutils.install()
+
+    bpy = types.ModuleType('bpy')
+    bpy.__standin__ = True
+    bpy.__path__ = []
+
+    props = types.ModuleType('bpy.props')
+    for name in _PROP_FUNCS:
+        setattr(props, name, globals()[name])
+    props.__all__ = list(_PROP_FUNCS)
+
+    bl_types = _TypesModule('bpy.types')
+    for cls in (bpy_struct, PropertyGroup, AddonPreferences, ID, Material, World, Mesh, Camera, Light,
+                MetaBall, GreasePencil, GPencilLayer, GPencilFrame, GPencilStroke, Particle, ParticleSettings, ParticleSystem, Modifier, MaterialSlot, Collection, Object,
+                DepsgraphObjectInstance, DepsgraphUpdate, Depsgraph, ViewLayer, RenderSettings,
+                Scene, RenderEngine):
+        setattr(bl_types, cls.__name__, cls)
+
+    handlers = types.ModuleType('bpy.app.handlers')
+    handlers.persistent = _persistent
+    for name in ('load_pre', 'load_post', 'save_pre', 'save_post', 'frame_change_pre',
+                 'frame_change_post', 'depsgraph_update_pre', 'depsgraph_update_post',
+                 'render_pre', 'render_post', 'scene_update_post'):
+        setattr(handlers, name, [])
+
+    app = types.ModuleType('bpy.app')
+    app.__path__ = []
+    app.handlers = handlers
+    app.timers = _Timers()
+    app.version = (2, 80, 75)
+    app.version_string = '2.80 (sub 75)'
+    app.binary_path = ''
+    app.background = True
+    app.tempdir = tempfile.gettempdir()
+
+    utils = types.ModuleType('bpy.utils')
+    utils.register_class = lambda cls: None
+    utils.unregister_class = lambda cls: None
+    utils.user_resource = lambda *args, **kwargs: tempfile.gettempdir()
+    utils.__path__ = []
+    previews = types.ModuleType('bpy.utils.previews')
+    previews.new = lambda: dict()
+    previews.remove = lambda p: None
+    utils.previews = previews
+
+    path = types.ModuleType('bpy.path')
+    path.abspath = _abspath
+    path.basename = os.path.basename
+    path.display_name = lambda name: name
+    path.ensure_ext = lambda filepath, ext, case_sensitive=False: filepath if filepath.endswith(ext) else filepath + ext
+
+    bpy.props = props
+    bpy.types = bl_types
+    bpy.app = app
+    bpy.utils = utils
+    bpy.path = path
+    bpy.data = __data__
+    bpy.context = __context__
+    bpy.ops = types.SimpleNamespace()
+
+    sys.modules['bpy'] = bpy
+    sys.modules['bpy.props'] = props
+    sys.modules['bpy.types'] = bl_types
+    sys.modules['bpy.app'] = app
+    sys.modules['bpy.app.handlers'] = handlers
+    sys.modules['bpy.utils'] = utils
+    sys.modules['bpy.utils.previews'] = previews
+    sys.modules['bpy.path'] = path
+
+    # these only need to import
+    for name in ('bgl', 'blf', 'gpu', 'bpy_extras', '_cycles'):
+        if name not in sys.modules:
+            sys.modules[name] = types.ModuleType(name)
+
+    return bpy
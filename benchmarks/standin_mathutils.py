@@ -0,0 +1,250 @@
+'''
+A stand-in for the parts of Blender's mathutils module used by the exporter:
+Matrix, Quaternion and 3D Vector/Color, backed by numpy.
+
+Install it with install(), before the add-on is imported.
+'''
+
+import sys
+import math
+import types
+import numpy as np
+
+class Vector(object):
+
+    def __init__(self, seq=(0.0, 0.0, 0.0)):
+        self._v = np.array(seq, dtype=np.float64).ravel()
+
+    @classmethod
+    def _from_array(cls, v):
+        # wrap an existing array, without copying it
+        vec = cls.__new__(cls)
+        vec._v = v
+        return vec
+
+    def __len__(self):
+        return len(self._v)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [float(x) for x in self._v[i]]
+        return float(self._v[i])
+
+    def __setitem__(self, i, val):
+        self._v[i] = val
+
+    def __iter__(self):
+        return iter(self._v.tolist())
+
+    def __add__(self, other):
+        return Vector(self._v + np.asarray(list(other)))
+
+    def __sub__(self, other):
+        return Vector(self._v - np.asarray(list(other)))
+
+    def __mul__(self, s):
+        return Vector(self._v * s)
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Vector(-self._v)
+
+    def __eq__(self, other):
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return False
+
+    def __repr__(self):
+        return 'Vector(%s)' % tuple(self)
+
+    @property
+    def x(self):
+        return float(self._v[0])
+
+    @property
+    def y(self):
+        return float(self._v[1])
+
+    @property
+    def z(self):
+        return float(self._v[2])
+
+    @property
+    def length(self):
+        return float(np.linalg.norm(self._v))
+
+    @property
+    def length_squared(self):
+        return float(np.dot(self._v, self._v))
+
+    def normalized(self):
+        length = self.length
+        return Vector(self._v / length if length else self._v)
+
+    def copy(self):
+        return Vector(self._v)
+
+    def to_tuple(self):
+        return tuple(self)
+
+class Color(Vector):
+    pass
+
+class Euler(Vector):
+    pass
+
+class Matrix(object):
+    '''
+    4x4 matrix. Like Blender's, it's indexed by row and transforms column vectors.
+    '''
+
+    def __init__(self, rows=None):
+        if rows is None:
+            self._m = np.identity(4)
+        elif isinstance(rows, Matrix):
+            self._m = rows._m.copy()
+        else:
+            self._m = np.array([list(r) for r in rows], dtype=np.float64)
+
+    @classmethod
+    def _from_array(cls, m):
+        mtx = cls.__new__(cls)
+        mtx._m = m
+        return mtx
+
+    @classmethod
+    def Identity(cls, size=4):
+        return cls._from_array(np.identity(size))
+
+    @classmethod
+    def Translation(cls, vec):
+        m = np.identity(4)
+        m[0:3, 3] = list(vec)[0:3]
+        return cls._from_array(m)
+
+    @classmethod
+    def Scale(cls, factor, size=4, axis=None):
+        m = np.identity(size)
+        for i in range(3):
+            m[i, i] = factor
+        return cls._from_array(m)
+
+    @classmethod
+    def Rotation(cls, angle, size, axis):
+        c = math.cos(angle)
+        s = math.sin(angle)
+        m = np.identity(4)
+        if axis == 'X':
+            m[1:3, 1:3] = ((c, -s), (s, c))
+        elif axis == 'Y':
+            m[0, 0], m[0, 2], m[2, 0], m[2, 2] = c, s, -s, c
+        else:
+            m[0:2, 0:2] = ((c, -s), (s, c))
+        return cls._from_array(m)
+
+    def __getitem__(self, i):
+        # rows are views, so mtx[i][j] = x works like in Blender
+        return self._m[i]
+
+    def __setitem__(self, i, val):
+        self._m[i] = val
+
+    def __len__(self):
+        return len(self._m)
+
+    def __iter__(self):
+        return iter([Vector(r) for r in self._m])
+
+    def __matmul__(self, other):
+        if isinstance(other, Matrix):
+            return Matrix._from_array(self._m @ other._m)
+        v = np.ones(4)
+        v[0:3] = list(other)[0:3]
+        return Vector((self._m @ v)[0:3])
+
+    def __eq__(self, other):
+        return isinstance(other, Matrix) and np.array_equal(self._m, other._m)
+
+    def copy(self):
+        return Matrix._from_array(self._m.copy())
+
+    def inverted(self):
+        return Matrix._from_array(np.linalg.inv(self._m))
+
+    def inverted_safe(self):
+        try:
+            return self.inverted()
+        except np.linalg.LinAlgError:
+            return Matrix._from_array(np.identity(4))
+
+    def invert(self):
+        self._m = np.linalg.inv(self._m)
+
+    def transposed(self):
+        return Matrix._from_array(self._m.T.copy())
+
+    def to_translation(self):
+        return Vector(self._m[0:3, 3])
+
+    def to_4x4(self):
+        m = np.identity(4)
+        n = min(len(self._m), 4)
+        m[0:n, 0:n] = self._m[0:n, 0:n]
+        return Matrix._from_array(m)
+
+    def decompose(self):
+        # assumes there's no shear, like most of the matrices in a scene
+        scale = np.linalg.norm(self._m[0:3, 0:3], axis=0)
+        rot = self._m[0:3, 0:3] / np.where(scale > 0.0, scale, 1.0)
+        if np.linalg.det(rot) < 0.0:
+            rot = -rot
+            scale = -scale
+        return (self.to_translation(), Quaternion._from_matrix(rot), Vector(scale))
+
+    def to_scale(self):
+        return Vector(np.linalg.norm(self._m[0:3, 0:3], axis=0))
+
+    @property
+    def translation(self):
+        return self.to_translation()
+
+class Quaternion(object):
+    '''
+    Rotation. The stand-in just keeps the rotation as a 3x3 matrix.
+    '''
+
+    def __init__(self, seq=(1.0, 0.0, 0.0, 0.0)):
+        w, x, y, z = seq
+        self._rot = np.array(((1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)),
+                              (2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)),
+                              (2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y))))
+
+    @classmethod
+    def _from_matrix(cls, rot):
+        quat = cls.__new__(cls)
+        quat._rot = rot
+        return quat
+
+    def to_matrix(self):
+        return Matrix._from_array(self._rot.copy())
+
+def install():
+    '''
+    Install the stand-in as the mathutils module.
+
+    Returns:
+        (module) - the stand-in mathutils module
+    '''
+    if 'mathutils' in sys.modules:
+        return sys.modules['mathutils']
+    mathutils = types.ModuleType('mathutils')
+    mathutils.__standin__ = True
+    mathutils.Vector = Vector
+    mathutils.Color = Color
+    mathutils.Euler = Euler
+    mathutils.Matrix = Matrix
+    mathutils.Quaternion = Quaternion
+    sys.modules['mathutils'] = mathutils
+    return mathutils
@@ -0,0 +1,360 @@
+'''
+A recording stand-in for the parts of the rman python module (SGManager/RixSG)
+that the exporter uses. Nothing gets rendered. Every call that pushes data
+to the scene graph is counted, along with a rough size of its payload, so
+benchmarks can report how much work an export did as well as how long it took.
+
+Install it with install(), before the add-on is imported.
+'''
+
+import sys
+import types
+import numpy as np
+
+class RmanRecorder(object):
+    '''
+    Counts the scene graph calls made by the exporter.
+
+    Attributes:
+        calls (dict) - dictionary of method name to number of calls
+        payload_bytes (int) - rough size, in bytes, of all of the data pushed
+        nodes_created (int) - number of scene graph nodes created
+        nodes_deleted (int) - number of scene graph nodes deleted
+        edits (int) - number of ScopedEdit blocks
+    '''
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.calls = dict()
+        self.payload_bytes = 0
+        self.nodes_created = 0
+        self.nodes_deleted = 0
+        self.edits = 0
+
+    def record(self, name, args):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        for a in args:
+            self.payload_bytes += _payload_size(a)
+
+    def get_summary(self):
+        return {'calls': sum(self.calls.values()),
+                'payload_bytes': self.payload_bytes,
+                'nodes_created': self.nodes_created,
+                'nodes_deleted': self.nodes_deleted,
+                'edits': self.edits
+                }
+
+__RECORDER__ = RmanRecorder()
+
+def get_recorder():
+    return __RECORDER__
+
+def _payload_size(val):
+    nbytes = getattr(val, 'nbytes', None)
+    if nbytes is not None:
+        return nbytes
+    if isinstance(val, (str, bytes)):
+        return len(val)
+    if isinstance(val, (list, tuple, range)):
+        if len(val) and isinstance(val[0], (list, tuple)):
+            return len(val) * len(val[0]) * 4
+        return len(val) * 4
+    return 0
+
+def _make_recording_method(name):
+    def method(self, *args):
+        __RECORDER__.record(name, args)
+        if args and isinstance(args[0], str):
+            self._values[args[0]] = args[1:]
+    method.__name__ = name
+    return method
+
+class _Recording(object):
+    '''
+    Base class for stand-ins with an open ended set of Set* methods. The methods
+    are made on first use, and added to the class so later lookups are cheap.
+    '''
+
+    _prefixes = ('Set', 'Reference', 'Add')
+
+    def __init__(self):
+        self._values = dict()
+
+    def __getattr__(self, name):
+        if name.startswith(self._prefixes):
+            method = _make_recording_method(name)
+            setattr(type(self), name, method)
+            return getattr(self, name)
+        raise AttributeError("%s has no attribute '%s'" % (type(self).__name__, name))
+
+class ParamList(_Recording):
+
+    def Inherit(self, other):
+        __RECORDER__.record('Inherit', [])
+        self._values.update(other._values)
+
+    def Clear(self):
+        self._values = dict()
+
+    def GetValue(self, name):
+        return self._values.get(name, None)
+
+    def HasParam(self, name):
+        return name in self._values
+
+class RixSGNode(_Recording):
+
+    def __init__(self, kind, name):
+        super().__init__()
+        self.kind = kind
+        self.name = name
+        self.children = []
+        self.primvars = ParamList()
+        self.attributes = ParamList()
+        self.params = ParamList()
+        self.properties = ParamList()
+        __RECORDER__.nodes_created += 1
+
+    def GetPrimVars(self):
+        return self.primvars
+
+    def SetPrimVars(self, primvars):
+        __RECORDER__.record('SetPrimVars', [])
+        self.primvars = primvars
+
+    def GetAttributes(self):
+        return self.attributes
+
+    def SetAttributes(self, attrs):
+        __RECORDER__.record('SetAttributes', [])
+        self.attributes = attrs
+
+    def GetProperties(self):
+        return self.properties
+
+    def SetProperties(self, props):
+        __RECORDER__.record('SetProperties', [])
+        self.properties = props
+
+    def Define(self, *args):
+        __RECORDER__.record('Define', [])
+
+    def AddChild(self, child):
+        __RECORDER__.record('AddChild', [])
+        self.children.append(child)
+
+    def RemoveChild(self, child):
+        __RECORDER__.record('RemoveChild', [])
+        if child in self.children:
+            self.children.remove(child)
+
+    def GetChild(self, i):
+        return self.children[i]
+
+    def GetNumChildren(self):
+        return len(self.children)
+
+class RixSGScene(object):
+
+    _node_kinds = ('Group', 'Mesh', 'Curves', 'Points', 'Camera', 'AnalyticLight',
+                   'Material', 'Quadric', 'Blobby', 'Procedural', 'Volume',
+                   'NuPatch', 'SubdivisionMesh', 'LightFilter')
+
+    def __init__(self):
+        self.root = RixSGNode('Group', '__root__')
+        self.options = ParamList()
+        self.rendered = []
+        for kind in self._node_kinds:
+            setattr(self, 'Create%s' % kind, self._make_create(kind))
+
+    def _make_create(self, kind):
+        def create(handle='', *args):
+            __RECORDER__.record('Create%s' % kind, [])
+            return RixSGNode(kind, handle)
+        return create
+
+    def Root(self):
+        return self.root
+
+    def DeleteDagNode(self, node):
+        __RECORDER__.record('DeleteDagNode', [])
+        __RECORDER__.nodes_deleted += 1
+
+    def GetOptions(self):
+        return self.options
+
+    def SetOptions(self, options):
+        __RECORDER__.record('SetOptions', [])
+        self.options = options
+
+    def SetIntegrator(self, integrator):
+        __RECORDER__.record('SetIntegrator', [])
+
+    def SetDisplayFilter(self, filters):
+        __RECORDER__.record('SetDisplayFilter', [])
+
+    def SetSampleFilter(self, filters):
+        __RECORDER__.record('SetSampleFilter', [])
+
+    def SetDisplayChannel(self, channels):
+        __RECORDER__.record('SetDisplayChannel', [])
+
+    def Render(self, cmd):
+        self.rendered.append(cmd)
+
+    def Stop(self):
+        pass
+
+class ScopedEdit(object):
+
+    def __init__(self, sg_scene):
+        self.sg_scene = sg_scene
+
+    def __enter__(self):
+        __RECORDER__.edits += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+class RixSGManager(object):
+
+    def CreateScene(self, *args):
+        return RixSGScene()
+
+    def DeleteScene(self, sg_scene):
+        pass
+
+class RixSGShader(RixSGNode):
+
+    def __init__(self, shader_type, name, handle):
+        super().__init__(shader_type, handle)
+        self.shader_name = name
+
+class RixSGDisplayChannel(RixSGNode):
+
+    def __init__(self, channel_type, name):
+        super().__init__('DisplayChannel', name)
+        self.channel_type = channel_type
+
+class RtFloat3(object):
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+class RtMatrix4x4(object):
+    '''
+    Row major 4x4 matrix, that transforms row vectors, like RenderMan's.
+    '''
+
+    def __init__(self, *args):
+        if args:
+            self.m = np.array(args, dtype=np.float64).reshape((4, 4))
+        else:
+            self.m = np.identity(4)
+
+    def Identity(self):
+        self.m = np.identity(4)
+
+    def Translate(self, x, y, z):
+        t = np.identity(4)
+        t[3, 0:3] = (x, y, z)
+        self.m = t @ self.m
+
+    def Scale(self, x, y, z):
+        self.m = np.diag((x, y, z, 1.0)) @ self.m
+
+    def Rotate(self, angle, x, y, z):
+        pass
+
+    def Inverse(self, result=None):
+        inv = RtMatrix4x4()
+        inv.m = np.linalg.inv(self.m)
+        return inv
+
+    def pTransform(self, pt):
+        x, y, z, w = np.array((pt.x, pt.y, pt.z, 1.0)) @ self.m
+        if w != 0.0 and w != 1.0:
+            x, y, z = x / w, y / w, z / w
+        return RtFloat3(x, y, z)
+
+    def vTransform(self, v):
+        x, y, z = np.array((v.x, v.y, v.z)) @ self.m[0:3, 0:3]
+        return RtFloat3(x, y, z)
+
+    def __mul__(self, other):
+        result = RtMatrix4x4()
+        result.m = self.m @ other.m
+        return result
+
+    def __len__(self):
+        return 16
+
+    @property
+    def nbytes(self):
+        return 64
+
+class _Tokens(object):
+    '''
+    Rix tokens are just their names, with the k_ prefix and any Ri_ scope stripped.
+    '''
+
+    def __getattr__(self, name):
+        if not name.startswith('k_'):
+            raise AttributeError(name)
+        token = name[2:]
+        if token.startswith('Ri_'):
+            token = token[3:]
+        setattr(self, name, token)
+        return token
+
+class _Singleton(object):
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+    def __getattr__(self, name):
+        # event callbacks, ri controls etc. don't do anything
+        return lambda *args, **kwargs: None
+
+def install():
+    '''
+    Install the stand-in as the rman module.
+
+    Returns:
+        (module) - the stand-in rman module
+    '''
+    if 'rman' in sys.modules and getattr(sys.modules['rman'], '__standin__', False):
+        return sys.modules['rman']
+
+    rman = types.ModuleType('rman')
+    rman.__standin__ = True
+
+    __sg_manager__ = RixSGManager()
+    rman.SGManager = types.SimpleNamespace(Get=lambda: __sg_manager__,
+                                           ScopedEdit=ScopedEdit,
+                                           RixSGShader=RixSGShader,
+                                           RixSGDisplayChannel=RixSGDisplayChannel,
+                                           RixSGManager=RixSGManager)
+    rix = _Tokens()
+    rman.Tokens = types.SimpleNamespace(Rix=rix)
+    rman.Types = types.SimpleNamespace(RtMatrix4x4=RtMatrix4x4,
+                                       RtFloat3=RtFloat3,
+                                       RtPoint3=RtFloat3,
+                                       RtVector3=RtFloat3,
+                                       RtNormal3=RtFloat3,
+                                       RtColorRGB=RtFloat3,
+                                       RtFloat=float,
+                                       RtInt=int,
+                                       ParamList=ParamList)
+    rman.RiCtl = types.SimpleNamespace(Get=lambda: _Singleton())
+    rman.EventCallbacks = types.SimpleNamespace(Get=lambda: _Singleton())
+    rman.Dspy = _Singleton()
+    rman.get_recorder = get_recorder
+
+    sys.modules['rman'] = rman
+    return rman
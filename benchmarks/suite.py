@@ -0,0 +1,390 @@
+'''
+The export benchmarks, and the history/regression checks.
+
+Each benchmark is a function that takes a BenchmarkContext, does any set up
+it needs, and times the part it is interested in with ctx.timed(). They are
+run on each of the scenes in the config, and each result is compared to the
+recent history of the same benchmark on the same scene, to catch
+regressions.
+'''
+
+import os
+import json
+import time
+import types
+import platform
+import subprocess
+import numpy as np
+from collections import OrderedDict
+
+from . import load_addon, get_addon_module
+from . import standin_bpy
+from . import scenes
+
+__BENCHMARKS__ = OrderedDict()
+
+def register_benchmark(name):
+    '''
+    Decorator to add a benchmark to the suite.
+
+    Args:
+        name (str) - name of the benchmark, used in reports and in the history
+    '''
+    def decorator(func):
+        __BENCHMARKS__[name] = func
+        return func
+    return decorator
+
+def get_benchmarks():
+    return __BENCHMARKS__
+
+class BenchmarkContext(object):
+    '''
+    What a benchmark gets to work with.
+
+    Attributes:
+        scene (bpy.types.Scene) - the synthetic scene
+        depsgraph (bpy.types.Depsgraph) - its depsgraph
+        scene_params (dict) - parameters the scene was built with
+        timings (dict) - dictionary of timer name to seconds, filled in by timed()
+    '''
+
+    def __init__(self, scene, depsgraph, scene_params):
+        self.scene = scene
+        self.depsgraph = depsgraph
+        self.scene_params = scene_params
+        self.timings = dict()
+
+    def timed(self, func, *args, **kwargs):
+        '''
+        Call func, and record how long it took as the time for the benchmark.
+        The scene graph recorder is reset first, so its counts only cover func.
+        '''
+        import rman
+        rman.get_recorder().reset()
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.timings['total'] = time.perf_counter() - start
+
+    def time_method(self, obj, method_name, timer_name=None):
+        '''
+        Wrap a method of obj, so that the time spent in it (over all calls)
+        also gets recorded, as timer_name.
+        '''
+        timer_name = timer_name if timer_name else method_name
+        method = getattr(obj, method_name)
+        self.timings[timer_name] = 0.0
+
+        def timed_method(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.timings[timer_name] += time.perf_counter() - start
+        setattr(obj, method_name, timed_method)
+
+    def create_rman_scene(self, interactive=False):
+        '''
+        Create an RmanScene, with a stand-in RmanRender, and a new scene graph
+        scene to export into.
+
+        Returns:
+            (tuple) - (RmanScene, scene graph scene)
+        '''
+        import rman
+        rman_scene = get_addon_module('rman_scene')
+        render = types.SimpleNamespace(rman=rman,
+                                       sgmngr=rman.SGManager.Get(),
+                                       bl_engine=standin_bpy.RenderEngine(),
+                                       rman_interactive_running=interactive,
+                                       rman_running=True,
+                                       it_port=-1)
+        rs = rman_scene.RmanScene(rman_render=render)
+        sg_scene = rman.SGManager.Get().CreateScene()
+        return (rs, sg_scene)
+
+@register_benchmark('export')
+def bench_export(ctx):
+    '''
+    A final render export, without motion blur.
+    '''
+    ctx.scene.renderman.motion_blur = False
+    rs, sg_scene = ctx.create_rman_scene()
+    ctx.time_method(rs, 'export_data_blocks')
+    ctx.time_method(rs, 'export_instances')
+    ctx.timed(rs.export_for_final_render, ctx.depsgraph, sg_scene, ctx.depsgraph.view_layer)
+
+@register_benchmark('export_motion')
+def bench_export_motion(ctx):
+    '''
+    A final render export, with motion blur. export_instances_motion() is
+    also timed on its own.
+    '''
+    rm = ctx.scene.renderman
+    rm.motion_blur = True
+    try:
+        rs, sg_scene = ctx.create_rman_scene()
+        ctx.time_method(rs, 'export_instances_motion')
+        ctx.timed(rs.export_for_final_render, ctx.depsgraph, sg_scene, ctx.depsgraph.view_layer)
+    finally:
+        rm.motion_blur = False
+
+@register_benchmark('update_scene')
+def bench_update_scene(ctx):
+    '''
+    An interactive edit, where every animated object moved, and every
+    deforming object changed shape.
+    '''
+    import bpy
+    prefs = bpy.context.preferences.addons['RenderManForBlender'].preferences
+    latency = prefs.rman_ipr_edit_latency
+    max_rate = prefs.rman_ipr_max_edit_rate
+    prefs.rman_ipr_edit_latency = 0.0
+    prefs.rman_ipr_max_edit_rate = 0.0
+
+    rs, sg_scene = ctx.create_rman_scene(interactive=True)
+    try:
+        rs.export_for_interactive_render(bpy.context, ctx.depsgraph, sg_scene)
+
+        # move to the next frame, and tell the exporter what changed
+        ctx.scene.frame_set(ctx.scene.frame_current + 1)
+        updates = []
+        for ob in ctx.scene.objects:
+            if ob.deform_func:
+                ob.to_mesh_clear()
+                updates.append(standin_bpy.DepsgraphUpdate(ob, is_updated_geometry=True))
+            elif ob.anim_func:
+                updates.append(standin_bpy.DepsgraphUpdate(ob, is_updated_transform=True))
+        ctx.depsgraph.updates = updates
+        ctx.timed(rs.update_scene, bpy.context, ctx.depsgraph)
+    finally:
+        ctx.depsgraph.updates = []
+        ctx.scene.frame_set(ctx.scene.frame_current - 1)
+        prefs.rman_ipr_edit_latency = latency
+        prefs.rman_ipr_max_edit_rate = max_rate
+
+@register_benchmark('transform_points')
+def bench_transform_points(ctx):
+    '''
+    A microbenchmark of transform_utils: transforming the points of every
+    mesh into the space of another object, like the particle and hair
+    translators do, and converting the matrices of every instance in one go.
+    '''
+    transform_utils = get_addon_module('rman_utils.transform_utils')
+    object_utils = get_addon_module('rman_utils.object_utils')
+    work = []
+    for ob in ctx.scene.objects:
+        if ob.type == 'MESH':
+            P = object_utils._get_mesh_points_(ob.data)
+            work.append((ob.matrix_world.inverted_safe(), np.reshape(P, -1)))
+    matrices = np.array([[list(row) for row in ob_inst.matrix_world]
+                         for ob_inst in ctx.depsgraph.object_instances], dtype=np.float64)
+
+    def transform():
+        for m, P in work:
+            transform_utils.transform_points(m, P)
+        transform_utils.convert_matrix(matrices)
+    ctx.timed(transform)
+
+def _get_mesh_per_polygon(mesh, get_normals=False):
+    '''
+    The per-polygon mesh extraction that object_utils._get_mesh_() replaced,
+    kept here to compare against.
+    '''
+    nvertices = len(mesh.vertices)
+    P = np.zeros(nvertices*3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', P)
+    P = np.reshape(P, (nvertices, 3)).tolist()
+    nverts = []
+    verts = []
+    N = []
+
+    for p in mesh.polygons:
+        nverts.append(p.loop_total)
+        verts.extend(p.vertices)
+        if get_normals:
+            if p.use_smooth:
+                for vi in p.vertices:
+                    N.extend(mesh.vertices[vi].normal)
+            else:
+                N.extend(list(p.normal) * p.loop_total)
+
+    return (nverts, verts, P, N)
+
+@register_benchmark('get_mesh')
+def bench_get_mesh(ctx):
+    '''
+    A microbenchmark of object_utils._get_mesh_(), reading the topology, points
+    and normals of every mesh with foreach_get. The per-polygon extraction it
+    replaced is also timed, as 'per_polygon', on the same meshes.
+    '''
+    object_utils = get_addon_module('rman_utils.object_utils')
+    meshes = [ob.data for ob in ctx.scene.objects if ob.type == 'MESH']
+
+    def get_meshes(get_mesh):
+        for mesh in meshes:
+            get_mesh(mesh, get_normals=True)
+
+    start = time.perf_counter()
+    get_meshes(_get_mesh_per_polygon)
+    ctx.timings['per_polygon'] = time.perf_counter() - start
+    ctx.timed(get_meshes, object_utils._get_mesh_)
+
+def run_benchmark(name, scene_name, scene_params, repeat=3):
+    '''
+    Run one benchmark on one scene, repeat times.
+
+    Returns:
+        (dict) - the result. Times are the best of the runs, and the
+                 scene graph counts come from the last run.
+    '''
+    load_addon()
+    import rman
+    func = __BENCHMARKS__[name]
+    scene, depsgraph = scenes.build_scene(scene_params)
+
+    runs = []
+    for i in range(max(1, repeat)):
+        ctx = BenchmarkContext(scene, depsgraph, scene_params)
+        func(ctx)
+        runs.append(ctx.timings)
+
+    timings = dict()
+    for key in runs[0].keys():
+        values = sorted([r[key] for r in runs])
+        timings[key] = {'min': values[0], 'median': values[len(values) // 2]}
+
+    result = {'benchmark': name,
+              'scene': scene_name,
+              'scene_params': scene_params,
+              'scene_stats': scenes.get_scene_stats(scene),
+              'seconds': timings['total']['min'],
+              'timings': timings,
+              'sg': rman.get_recorder().get_summary()
+              }
+    return result
+
+def run_suite(config, benchmark_names=None, scene_names=None, repeat=None):
+    '''
+    Run the benchmarks on the scenes in the config.
+
+    Args:
+        config (dict) - the benchmark config, see load_config()
+        benchmark_names (list) - only run these benchmarks
+        scene_names (list) - only use these scenes
+
+    Returns:
+        (list) - list of results
+    '''
+    results = []
+    repeat = repeat if repeat else config.get('repeat', 3)
+    for scene_name, scene_params in config['scenes'].items():
+        if scene_names and scene_name not in scene_names:
+            continue
+        scene_params = scenes.get_scene_params(scene_params)
+        for name in __BENCHMARKS__.keys():
+            if benchmark_names and name not in benchmark_names:
+                continue
+            result = run_benchmark(name, scene_name, scene_params, repeat=repeat)
+            results.append(result)
+            print('%-16s %-10s %8.3fs  %6d sg calls  %8.2f MB' % (name, scene_name, result['seconds'],
+                                                                  result['sg']['calls'],
+                                                                  result['sg']['payload_bytes'] / (1024.0 * 1024.0)))
+    return results
+
+### HISTORY
+#------------------------
+
+def load_config(path):
+    '''
+    Load the benchmark config. It looks like:
+
+        {
+            "repeat": 3,
+            "history": "benchmarks/history.json",
+            "baseline_runs": 5,
+            "thresholds": {"seconds": 0.25, "payload_bytes": 0.05, "calls": 0.05},
+            "scenes": {"small": {"num_meshes": 10, ...}, ...}
+        }
+
+    Thresholds are how much worse than the baseline (as a fraction) a result
+    can get before it counts as a regression.
+    '''
+    with open(path) as f:
+        return json.load(f)
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+def save_history(path, history):
+    dirname = os.path.dirname(path)
+    if dirname and not os.path.exists(dirname):
+        os.makedirs(dirname)
+    with open(path, 'w') as f:
+        json.dump(history, f, indent=1)
+
+def get_git_revision():
+    try:
+        rev = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                      cwd=os.path.dirname(os.path.abspath(__file__)),
+                                      stderr=subprocess.DEVNULL)
+        return rev.decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+def make_history_entry(results):
+    return {'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'revision': get_git_revision(),
+            'machine': platform.node(),
+            'python': platform.python_version(),
+            'results': results
+            }
+
+def _get_metric(result, metric):
+    if metric == 'seconds':
+        return result['seconds']
+    return result['sg'].get(metric, None)
+
+def check_regressions(results, history, thresholds, baseline_runs=5):
+    '''
+    Compare results to the history. The baseline for each benchmark/scene is
+    the median of its last baseline_runs results, from runs with the same
+    scene parameters on the same machine.
+
+    Returns:
+        (list) - list of regression messages, empty if there aren't any
+    '''
+    regressions = []
+    machine = platform.node()
+    for result in results:
+        previous = []
+        for entry in history:
+            if entry.get('machine', '') != machine:
+                continue
+            for r in entry['results']:
+                if r['benchmark'] == result['benchmark'] and r['scene'] == result['scene'] \
+                        and r['scene_params'] == result['scene_params']:
+                    previous.append(r)
+        previous = previous[-baseline_runs:]
+        if not previous:
+            continue
+
+        for metric, threshold in thresholds.items():
+            value = _get_metric(result, metric)
+            values = sorted([v for v in [_get_metric(r, metric) for r in previous] if v is not None])
+            if value is None or not values:
+                continue
+            baseline = values[len(values) // 2]
+            if baseline <= 0:
+                continue
+            change = (value - baseline) / float(baseline)
+            if change > threshold:
+                regressions.append('%s on %s: %s went from %g to %g (%+.1f%%, threshold %.1f%%)' %
+                                   (result['benchmark'], result['scene'], metric, baseline, value,
+                                    change * 100.0, threshold * 100.0))
+    return regressions
@@ -28,7 +28,7 @@ import sys
 import os
 from bpy.types import AddonPreferences
 from bpy.props import CollectionProperty, BoolProperty, StringProperty
-from bpy.props import IntProperty, PointerProperty, EnumProperty
+from bpy.props import IntProperty, PointerProperty, EnumProperty, FloatProperty
 
 from .rman_utils import filepath_utils
 from . import rfb_logger
@@ -169,6 +169,18 @@ class RendermanPreferences(AddonPreferences):
         description="Draw an icon on RenderMan Panels",
         default=True)
 
+    rman_ipr_max_edit_rate: FloatProperty(
+        name="Max IPR Edit Rate",
+        description="Maximum number of scene edits sent to the renderer per second during interactive rendering. Changes made in between edits are merged, so only the latest state is translated. Set to 0 for no limit",
+        min=0.0, max=120.0,
+        default=10.0)
+
+    rman_ipr_edit_latency: FloatProperty(
+        name="IPR Edit Latency",
+        description="Time, in seconds, to wait for more changes before sending an edit to the renderer during interactive rendering",
+        min=0.0, max=5.0,
+        default=0.0)
+
     path_display_driver_image: StringProperty(
         name="Main Image path",
         description="Path for the rendered main image",
@@ -222,6 +234,17 @@ class RendermanPreferences(AddonPreferences):
         subtype='FILE_PATH'
     )
 
+    rman_profile_export: BoolProperty(
+        name="Profile Scene Export",
+        description="Record how long each part of the scene translation takes, and write it out as a Chrome trace (chrome://tracing or Perfetto), along with a summary table. Advanced: Setting the RFB_PROFILE environment variable will override this preference",
+        default=False)
+
+    rman_profile_file: StringProperty(
+        name="Profile File",
+        description="File to write the export profile trace to. If empty, it is written to Blender's temporary directory. Setting the RFB_PROFILE_FILE environment variable will override this preference",
+        default='',
+        subtype='FILE_PATH')
+
     presets_library: PointerProperty(
         type=RendermanPresetGroup,
     )
@@ -253,6 +276,8 @@ class RendermanPreferences(AddonPreferences):
 
         layout.prop(self, 'rman_logging_level')
         layout.prop(self, 'rman_logging_file')
+        layout.prop(self, 'rman_profile_export')
+        layout.prop(self, 'rman_profile_file')
         env = self.env_vars
         layout.prop(env, "out")
         layout.prop(self, 'path_display_driver_image')
@@ -260,6 +285,8 @@ class RendermanPreferences(AddonPreferences):
         layout.prop(self, 'path_fallback_textures_path')        
         layout.prop(self, 'draw_ipr_text')
         layout.prop(self, 'draw_panel_icon')
+        layout.prop(self, 'rman_ipr_max_edit_rate')
+        layout.prop(self, 'rman_ipr_edit_latency')
         #layout.prop(self, 'active_presets_path')
         layout.prop(self.presets_library, 'path')
 
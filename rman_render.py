@@ -10,11 +10,16 @@ from .rfb_logger import rfb_log
 import socketserver
 import threading
 import ctypes
+import json
+import hashlib
 
 # utils
 from .rman_utils import filepath_utils
 from .rman_utils import string_utils
 from .rman_utils import display_utils
+from .rman_utils import object_utils
+from .rman_utils import profile_utils
+from .rman_utils import archive_utils
 
 __RMAN_RENDER__ = None
 __RMAN_IT_PORT__ = -1
@@ -257,7 +262,11 @@ class RmanRender(object):
 
         self.sg_scene = self.sgmngr.CreateScene() 
         bl_layer = depsgraph.view_layer
-        self.rman_scene.export_for_final_render(depsgraph, self.sg_scene, bl_layer, is_external=False)
+        profile_utils.start_profiling('final render')
+        try:
+            self.rman_scene.export_for_final_render(depsgraph, self.sg_scene, bl_layer, is_external=False)
+        finally:
+            profile_utils.stop_profiling()
 
         self.rman_running = True
         self._dump_rib_()
@@ -267,11 +276,85 @@ class RmanRender(object):
         while not self.bl_engine.test_break() and self.rman_is_live_rendering:
             time.sleep(0.01)
         self.stop_render()        
+        if 'RFB_DUMP_RIB' not in os.environ:
+            # the dumped RIB still references the deferred archives
+            archive_utils.remove_archives(self.rman_scene.deferred_archive_paths)
         if self.rman_render_into == 'blender': 
             self._load_image_into_blender()
 
         return True  
 
+    def _export_static_archives(self, depsgraph, rib_options):
+        '''
+        Write the meshes whose geometry doesn't change over the frame range to
+        RIB archives. A manifest in the archive directory records the hash of
+        each archive's geometry, so that archives that haven't changed since
+        the last export don't get written again.
+
+        Args:
+            depsgraph (bpy.types.Depsgraph) - the depsgraph
+            rib_options (str) - RIB format options
+
+        Returns:
+            (dict) - dictionary of db_name to (archive path, bounds), 
+                     for RmanScene.export_for_final_render()
+        '''
+        rm = depsgraph.scene_eval.renderman
+        static_archives = dict()
+        new_manifest = dict()
+        num_written = 0
+        time_start = time.time()
+        mesh_translator = self.rman_scene.rman_translators['MESH']
+
+        # begin_static_archives() sets the scene and layer variables, 
+        # so the archive path needs to be expanded after it
+        self.rman_scene.begin_static_archives(depsgraph)
+        try:
+            archive_dir = string_utils.expand_string(rm.path_rib_archive_output)
+            if not os.path.exists(archive_dir):
+                os.makedirs(archive_dir)
+            manifest_path = os.path.join(archive_dir, 'manifest.json')
+
+            manifest = dict()
+            if os.path.exists(manifest_path):
+                try:
+                    with open(manifest_path, 'r') as f:
+                        manifest = json.load(f)
+                except (IOError, ValueError) as e:
+                    rfb_log().warning("Could not read archive manifest %s: %s" % (manifest_path, str(e)))
+
+            for ob in depsgraph.objects:
+                if not object_utils.is_static_geometry(ob):
+                    continue
+                db_name = object_utils.get_db_name(ob, rman_type='MESH')
+                archive_path = os.path.join(archive_dir, archive_utils.get_archive_filename(db_name))
+                # the archive also needs rewriting if the RIB format changed
+                mesh_hash = '%s %s' % (mesh_translator.get_mesh_hash(ob), rib_options)
+                mesh_hash = hashlib.sha1(mesh_hash.encode('utf-8')).hexdigest()
+                entry = manifest.get(db_name, None)
+                if not entry or entry['hash'] != mesh_hash or not os.path.exists(archive_path):
+                    sg_scene = self.sgmngr.CreateScene()
+                    has_geometry = self.rman_scene.export_for_rib_archive(sg_scene, ob)
+                    if has_geometry:
+                        sg_scene.Render("rib %s -archive %s" % (archive_path, rib_options))
+                    self.sgmngr.DeleteScene(sg_scene)
+                    if not has_geometry:
+                        continue
+                    num_written += 1
+
+                bounds = object_utils.get_local_bounds(ob)
+                new_manifest[db_name] = {'archive': archive_path, 'hash': mesh_hash, 'bounds': bounds}
+                static_archives[db_name] = (archive_path, bounds)
+        finally:
+            self.rman_scene.end_static_archives()
+
+        with open(manifest_path, 'w') as f:
+            json.dump(new_manifest, f, indent=4)
+
+        rfb_log().info("Static archives: wrote %d of %d. Time: %s" % (num_written, len(static_archives), 
+                        string_utils._format_time_(time.time() - time_start)))
+        return static_archives
+
     def start_external_render(self, depsgraph):         
 
         bl_scene = depsgraph.scene_eval
@@ -287,17 +370,27 @@ class RmanRender(object):
 
         if rm.external_animation:
             original_frame = bl_scene.frame_current
-            rfb_log().debug("Writing to RIB...")             
-            for frame in range(bl_scene.frame_start, bl_scene.frame_end + 1):
-                bl_view_layer = depsgraph.view_layer
-                self.sg_scene = self.sgmngr.CreateScene() 
-                self.bl_engine.frame_set(frame, subframe=0.0)
-                self.rman_scene.export_for_final_render(depsgraph, self.sg_scene, bl_view_layer, is_external=True)
-                rib_output = string_utils.expand_string(rm.path_rib_output, 
-                                                        frame=frame, 
-                                                        asFilePath=True)                                                                            
-                self.sg_scene.Render("rib %s %s" % (rib_output, rib_options))
-                self.sgmngr.DeleteScene(self.sg_scene)     
+            profile_utils.start_profiling('RIB animation')
+            try:
+                static_archives = None
+                if rm.rib_static_archives:
+                    with profile_utils.span('static archives'):
+                        static_archives = self._export_static_archives(depsgraph, rib_options)
+                rfb_log().debug("Writing to RIB...")             
+                for frame in range(bl_scene.frame_start, bl_scene.frame_end + 1):
+                    bl_view_layer = depsgraph.view_layer
+                    self.sg_scene = self.sgmngr.CreateScene() 
+                    self.bl_engine.frame_set(frame, subframe=0.0)
+                    self.rman_scene.export_for_final_render(depsgraph, self.sg_scene, bl_view_layer, is_external=True, 
+                                                            static_archives=static_archives)
+                    rib_output = string_utils.expand_string(rm.path_rib_output, 
+                                                            frame=frame, 
+                                                            asFilePath=True)                                                                            
+                    with profile_utils.span('write RIB', args={'frame': frame}):
+                        self.sg_scene.Render("rib %s %s" % (rib_output, rib_options))
+                    self.sgmngr.DeleteScene(self.sg_scene)     
+            finally:
+                profile_utils.stop_profiling()
 
             self.bl_engine.frame_set(original_frame, subframe=0.0)
             
@@ -309,7 +402,11 @@ class RmanRender(object):
                     
             bl_view_layer = depsgraph.view_layer         
             rfb_log().info("Parsing scene...")             
-            self.rman_scene.export_for_final_render(depsgraph, self.sg_scene, bl_view_layer, is_external=True)
+            profile_utils.start_profiling('RIB')
+            try:
+                self.rman_scene.export_for_final_render(depsgraph, self.sg_scene, bl_view_layer, is_external=True)
+            finally:
+                profile_utils.stop_profiling()
             rib_output = string_utils.expand_string(rm.path_rib_output, 
                                                     frame=bl_scene.frame_current, 
                                                     asFilePath=True)            
@@ -358,7 +455,11 @@ class RmanRender(object):
 
         self.sg_scene = self.sgmngr.CreateScene() 
         rfb_log().info("Parsing scene...")        
-        self.rman_scene.export_for_interactive_render(context, depsgraph, self.sg_scene)
+        profile_utils.start_profiling('interactive render')
+        try:
+            self.rman_scene.export_for_interactive_render(context, depsgraph, self.sg_scene)
+        finally:
+            profile_utils.stop_profiling()
 
         self._dump_rib_()      
         rfb_log().info("Finished parsing scene. Total time: %s" % string_utils._format_time_(time.time() - time_start))     
@@ -27,12 +27,15 @@ from .rman_utils import texture_utils
 from .rman_utils import filepath_utils
 from .rman_utils import scene_utils
 from .rman_utils import prefs_utils
+from .rman_utils import profile_utils
+from .rman_utils import archive_utils
 
 from .rfb_logger import rfb_log
 from .rman_sg_nodes.rman_sg_node import RmanSgNode
 
 import bpy
 import os
+import time
 
 class RmanScene(object):
     '''
@@ -50,6 +53,10 @@ class RmanScene(object):
         bl_view_layer (bpy.types.ViewLayer) - the current Blender view layer
         rm_rl (RendermanRenderLayerSettings) - the current rman layer 
         do_motion_blur (bool) - user requested for motion blur
+        do_mesh_dedup (bool) - user requested that identical meshes share
+                            one scene graph node
+        do_subd_cage (bool) - user requested that we export the base cage of meshes
+                            whose only modifier is a subdivision modifier
         rman_bake (bool) - user requested a bake render
         is_interactive (bool) - whether we are in interactive mode
         external_render (bool) - whether we are exporting for external (RIB) renders
@@ -57,16 +64,59 @@ class RmanScene(object):
         scene_solo_light (bool) - user has solo'd a light (all other lights are muted)
         rman_materials (dict) - dictionary of scene's materials
         rman_objects (dict) - dictionary of all objects
+        rman_object_ids (dict) - dictionary of the db_names of translated objects to
+                            the key of the Blender object they came from, see 
+                            object_utils.get_id_key(). Used to find deleted objects
         rman_translators (dict) - dictionary of all RmanTranslator(s)
         rman_particles (dict) - dictionary of all particle systems used
+        rman_instancers (dict) - dictionary of instancer group db_names, from 
+                            _export_instancer_batch(), to (db_names, group_db_names): 
+                            the db_names of the objects the instancer depends on, and 
+                            the db_names of its instance groups
         rman_cameras (dict) - dictionary of all cameras in the scene
         obj_hash (dict) - dictionary of hashes to objects ( for object picking )
+        rman_material_groups (dict) - dictionary of material db_names to the groups 
+                            (keyed by group db_name) that use the material
+        rman_group_materials (dict) - dictionary of group db_names to the material
+                            db_names they use. The reverse of rman_material_groups
+        rman_lights (dict) - dictionary of light db_names to the names of their
+                            Blender objects
+        rman_lightfilter_lights (dict) - dictionary of light filter object names to 
+                            the db_names of the lights that use the filter
+        rman_light_filters (dict) - dictionary of light db_names to the light filter
+                            object names they use. The reverse of rman_lightfilter_lights
+        rman_frame_sensitive (dict) - dictionary of db_names of materials and lights
+                            that need updating when the frame changes (they use the {F} 
+                            frame variable), to their type ('MATERIAL' or 'LIGHT') and 
+                            the name of their Blender datablock
+        rman_meta_families (dict) - dictionary of metaball family names to the names of 
+                            the objects that own the metaballs in the family. Built the 
+                            first time it's needed, see get_meta_families()
+        static_archives (dict) - dictionary of db_names of static geometry, that was 
+                            already written to RIB archives, to (archive path, bounds). 
+                            These objects get exported as delayed read archives
+        do_deferred_archives (bool) - user requested that big meshes get written to 
+                            deferred archives during a final render export
+        deferred_archive_paths (list) - paths of the deferred mesh archives written for 
+                            the current render. These get removed when the render is done
+        rman_mesh_hashes (dict) - dictionary of mesh hashes to the RmanSgMesh that 
+                            was translated first, when do_mesh_dedup is on
+        num_dedup_meshes (int) - number of meshes that were shared
+        dedup_bytes_saved (int) - size of the geometry arrays that didn't need
+                            to be pushed because a mesh was shared
+        pending_updates (dict) - coalesced interactive updates that haven't been 
+                            processed yet. Keyed by (ID type, ID name), the values are
+                            the set of things that changed ('GEOMETRY', 'TRANSFORM')
+        pending_updates_time (float) - time the oldest pending update was queued
+        last_edit_time (float) - time we last edited the scene during interactive 
+                            rendering
+        update_timer_registered (bool) - whether a timer is waiting to process 
+                            the pending updates
+        instance_matrices (tuple) - snapshot of the depsgraph instance matrices, 
+                            taken at most once per update_scene() call
         motion_steps (set) - the full set of motion steps for the scene, including 
                             overrides from individual objects
         main_camera (RmanSgCamera) - pointer to the main scene camera
-        current_ob (list) - current selected objects
-        current_ob_db_name (list) - unique datablock names for current selected
-                                    objects
     '''
 
     def __init__(self, rman_render=None):
@@ -81,6 +131,8 @@ class RmanScene(object):
         self.rm_rl = None 
 
         self.do_motion_blur = False
+        self.do_mesh_dedup = False
+        self.do_subd_cage = False
         self.rman_bake = False
         self.is_interactive = False
         self.external_render = False
@@ -88,17 +140,35 @@ class RmanScene(object):
         self.is_swatch_render = False
         self.scene_solo_light = False
         self.scene_any_lights = False
-        self.current_ob = []
-        self.current_ob_db_name = []
 
         self.rman_materials = dict()
         self.rman_objects = dict()
+        self.rman_object_ids = dict()
         self.rman_translators = dict()
         self.rman_particles = dict()
+        self.rman_instancers = dict()
         self.rman_cameras = dict()
         self.obj_hash = dict() 
         self.moving_objects = dict()
         self.processed_obs = dict()
+        self.rman_material_groups = dict()
+        self.rman_group_materials = dict()
+        self.rman_lights = dict()
+        self.rman_lightfilter_lights = dict()
+        self.rman_light_filters = dict()
+        self.rman_frame_sensitive = dict()
+        self.rman_meta_families = None
+        self.static_archives = dict()
+        self.do_deferred_archives = False
+        self.deferred_archive_paths = []
+        self.rman_mesh_hashes = dict()
+        self.num_dedup_meshes = 0
+        self.dedup_bytes_saved = 0
+        self.instance_matrices = None
+        self.pending_updates = dict()
+        self.pending_updates_time = 0.0
+        self.last_edit_time = 0.0
+        self.update_timer_registered = False
 
         self.motion_steps = set()
         self.main_camera = None
@@ -139,16 +209,29 @@ class RmanScene(object):
         # clear out dictionaries etc.
         self.rman_materials = dict()
         self.rman_objects = dict()
+        self.rman_object_ids = dict()
         self.rman_particles = dict()
+        self.rman_instancers = dict()
         self.rman_cameras = dict()        
         self.obj_hash = dict() 
         self.motion_steps = set()       
         self.moving_objects = dict()
         self.processed_obs = dict()
-        self.current_ob = []
-        self.current_ob_db_name = []        
-
-    def export_for_final_render(self, depsgraph, sg_scene, bl_view_layer, is_external=False):
+        self.rman_material_groups = dict()
+        self.rman_group_materials = dict()
+        self.rman_lights = dict()
+        self.rman_lightfilter_lights = dict()
+        self.rman_light_filters = dict()
+        self.rman_frame_sensitive = dict()
+        self.rman_meta_families = None
+        self.rman_mesh_hashes = dict()
+        self.num_dedup_meshes = 0
+        self.dedup_bytes_saved = 0
+        self.pending_updates = dict()
+        self.pending_updates_time = 0.0
+        self.last_edit_time = 0.0
+
+    def export_for_final_render(self, depsgraph, sg_scene, bl_view_layer, is_external=False, static_archives=None):
         self.sg_scene = sg_scene
         self.context = bpy.context #None
         self.bl_scene = depsgraph.scene_eval
@@ -159,9 +242,17 @@ class RmanScene(object):
         self.is_interactive = False
         self.is_viewport_render = False
         self.do_motion_blur = self.bl_scene.renderman.motion_blur
+        self.do_mesh_dedup = self.bl_scene.renderman.mesh_dedup
+        self.do_subd_cage = self.bl_scene.renderman.export_subd_cage
         self.rman_bake = (self.bl_scene.renderman.hider_type == 'BAKE')
+        self.static_archives = static_archives if static_archives else dict()
+        self.deferred_archive_paths = []
+        self.do_deferred_archives = (not is_external and self.bl_scene.renderman.deferred_mesh_archives)
 
-        self.export()
+        try:
+            self.export()
+        finally:
+            self.finish_deferred_archives()
 
     def export_for_interactive_render(self, context, depsgraph, sg_scene):
         self.sg_scene = sg_scene
@@ -178,6 +269,9 @@ class RmanScene(object):
             self.is_viewport_render = True
 
         self.do_motion_blur = False
+        self.do_mesh_dedup = False
+        self.do_subd_cage = False
+        self.static_archives = dict()
 
         self.export()         
 
@@ -191,11 +285,135 @@ class RmanScene(object):
         self._find_renderman_layer()        
         
         self.depsgraph = context.evaluated_depsgraph_get()
+        self.static_archives = dict()
         ob = context.active_object
         self.export_materials([m for m in self.depsgraph.ids if isinstance(m, bpy.types.Material)])
         self.export_data_blocks([ob])
         self.export_instances(obj_selected=ob)
 
+    def begin_static_archives(self, depsgraph):
+        '''
+        Get ready to write the static geometry of an animation to RIB archives,
+        with export_for_rib_archive(). end_static_archives() needs to be called 
+        when done.
+        '''
+        self.reset()
+        self.context = bpy.context
+        self.depsgraph = depsgraph
+        self.bl_scene = depsgraph.scene_eval
+        self.bl_frame_current = self.bl_scene.frame_current
+        self.bl_view_layer = depsgraph.view_layer
+        self._find_renderman_layer()
+
+        # update variables, for the archive paths
+        string_utils.set_var('scene', self.bl_scene.name)
+        string_utils.set_var('layer', self.bl_view_layer.name)
+
+        self.external_render = True
+        self.is_interactive = False
+        self.is_viewport_render = False
+        self.do_motion_blur = False
+        self.do_mesh_dedup = False
+        self.do_subd_cage = self.bl_scene.renderman.export_subd_cage
+        self.static_archives = dict()
+
+    def end_static_archives(self):
+        self.reset()
+
+    def export_for_rib_archive(self, sg_scene, ob, input_mesh=None):
+        '''
+        Export only the object space geometry of this object. Transforms, materials 
+        and attributes are left to the scenes that reference the archive, so 
+        they can still change over the frame range.
+
+        Args:
+            sg_scene (RixSGScene) - the scene graph scene to export to
+            ob (bpy.types.Object) - the evaluated object
+            input_mesh (bpy.types.Mesh) - the evaluated mesh of a MESH object, if
+                            the caller already has it
+
+        Returns:
+            (bool) - whether there was any geometry to export
+        '''
+        self.sg_scene = sg_scene
+        rman_type = object_utils._detect_primitive_(ob)
+        db_name = object_utils.get_db_name(ob, rman_type=rman_type)
+        translator = self.rman_translators.get(rman_type, None)
+        if not translator:
+            return False
+
+        rman_sg_node = translator.export(ob, db_name)
+        if input_mesh:
+            translator.update(ob, rman_sg_node, input_mesh=input_mesh)
+        else:
+            translator.update(ob, rman_sg_node)
+        if not rman_sg_node.sg_node:
+            return False
+        translator.export_object_primvars(ob, rman_sg_node.sg_node)
+        self.sg_scene.Root().AddChild(rman_sg_node.sg_node)
+        return True
+
+    def export_deferred_archive(self, ob, db_name):
+        '''
+        If this mesh is big enough, translate it into its own scene, and write that 
+        scene to a deferred archive. The mesh then gets added to static_archives, 
+        so that it is referenced as a delayed read archive.
+
+        Args:
+            ob (bpy.types.Object) - the evaluated object
+            db_name (str) - unique datablock name for the object
+        '''
+        rm = self.bl_scene.renderman
+        mesh, is_temp_mesh = object_utils._get_evaluated_mesh_(ob, subd_cage=self.do_subd_cage)
+        try:
+            if self.rman_translators['MESH'].can_defer(ob, mesh, rm.deferred_mesh_archive_min_polys):
+                self._write_deferred_archive(ob, db_name, mesh)
+        finally:
+            if is_temp_mesh:
+                ob.to_mesh_clear()
+
+    def _write_deferred_archive(self, ob, db_name, mesh):
+        rm = self.bl_scene.renderman
+        archive_dir = string_utils.expand_string(rm.path_deferred_archive_output)
+        if not os.path.exists(archive_dir):
+            os.makedirs(archive_dir)
+        archive_path = os.path.join(archive_dir, 
+                                    archive_utils.get_archive_filename('%s.%04d' % (db_name, self.bl_frame_current)))
+
+        # the archive's mesh must not end up shared with the main scene's meshes
+        sg_scene = self.sg_scene
+        do_mesh_dedup = self.do_mesh_dedup
+        archive_sg_scene = self.rman_render.sgmngr.CreateScene()
+        self.do_mesh_dedup = False
+        try:
+            has_geometry = self.export_for_rib_archive(archive_sg_scene, ob, input_mesh=mesh)
+        finally:
+            self.sg_scene = sg_scene
+            self.do_mesh_dedup = do_mesh_dedup
+
+        if not has_geometry:
+            self.rman_render.sgmngr.DeleteScene(archive_sg_scene)
+            return
+        self.deferred_archive_paths.append(archive_path)
+        if archive_utils.write_archive(self.rman_render.sgmngr, archive_sg_scene, archive_path):
+            self.static_archives[db_name] = (archive_path, object_utils.get_local_bounds(ob))
+
+    def finish_deferred_archives(self):
+        '''
+        Report on the deferred archives that were written, once the export is
+        done.
+        '''
+        if not self.do_deferred_archives:
+            return
+        # archives that failed to write don't make it into static_archives
+        deferred_archive_paths = set(self.deferred_archive_paths)
+        num_written = len([path for path, bounds in self.static_archives.values() 
+                           if path in deferred_archive_paths])
+        if self.deferred_archive_paths:
+            rfb_log().info("Deferred archives: wrote %d of %d meshes to disk" % 
+                            (num_written, len(self.deferred_archive_paths)))
+        self.do_deferred_archives = False
+
     def export_for_swatch_render(self, depsgraph, sg_scene, render_output):
         self.sg_scene = sg_scene
         self.context = bpy.context #None
@@ -205,6 +423,8 @@ class RmanScene(object):
         self.is_interactive = False
         self.is_viewport_render = False
         self.do_motion_blur = False
+        self.do_mesh_dedup = False
+        self.do_subd_cage = False
         self.rman_bake = False
         self.is_swatch_render = True
         self.export_swatch_render_scene(render_output)
@@ -222,44 +442,60 @@ class RmanScene(object):
         self.bl_frame_current = self.bl_scene.frame_current
         self.scene_any_lights = self._scene_has_lights()
 
-        rfb_log().debug("Calling export_materials()")
-        #self.export_materials(bpy.data.materials)
-        self.export_materials([m for m in self.depsgraph.ids if isinstance(m, bpy.types.Material)])
-                
-        rfb_log().debug("Calling txmake_all()")
-        texture_utils.get_txmanager().rman_scene = self  
-        texture_utils.get_txmanager().txmake_all(blocking=True)
+        with profile_utils.span('export', args={'frame': self.bl_frame_current}):
+            rfb_log().debug("Calling export_materials()")
+            with profile_utils.span('export_materials'):
+                #self.export_materials(bpy.data.materials)
+                self.export_materials([m for m in self.depsgraph.ids if isinstance(m, bpy.types.Material)])
+                    
+            rfb_log().debug("Calling txmake_all()")
+            with profile_utils.span('txmake_all'):
+                texture_utils.get_txmanager().rman_scene = self  
+                texture_utils.get_txmanager().txmake_all(blocking=True)
 
-        rfb_log().debug("Creating root scene graph node")
-        self.export_root_sg_node()
-        
-        rfb_log().debug("Calling export_data_blocks()")
-        self.export_data_blocks(bpy.data.objects)
-        #self.export_data_blocks([x for x in self.depsgraph.ids if isinstance(x, bpy.types.Object)])
+            rfb_log().debug("Creating root scene graph node")
+            self.export_root_sg_node()
+            
+            rfb_log().debug("Calling export_data_blocks()")
+            with profile_utils.span('export_data_blocks'):
+                self.export_data_blocks(bpy.data.objects)
+                #self.export_data_blocks([x for x in self.depsgraph.ids if isinstance(x, bpy.types.Object)])
+
+            with profile_utils.span('export_options'):
+                self.export_searchpaths() 
+                self.export_global_options()     
+                self.export_hider()
+                self.export_integrator()
+
+            with profile_utils.span('export_cameras'):
+                self.export_cameras([c for c in self.depsgraph.objects if isinstance(c.data, bpy.types.Camera)])
+            
+            with profile_utils.span('export_displays'):
+                if self.is_viewport_render:
+                    # For now, when rendering into Blender's viewport, create 
+                    # a simple Ci,a display
+                    self.export_viewport_display()
+                else:
+                    self.export_displays()
 
-        self.export_searchpaths() 
-        self.export_global_options()     
-        self.export_hider()
-        self.export_integrator()
-        self.export_cameras([c for c in self.depsgraph.objects if isinstance(c.data, bpy.types.Camera)])
-        
-        if self.is_viewport_render:
-            # For now, when rendering into Blender's viewport, create 
-            # a simple Ci,a display
-            self.export_viewport_display()
-        else:
-            self.export_displays()
+                self.export_samplefilters()
+                self.export_displayfilters()
 
+            if self.do_motion_blur:
+                rfb_log().debug("Calling export_instances_motion()")
+                with profile_utils.span('export_instances_motion'):
+                    self.export_instances_motion()
+            else:
+                rfb_log().debug("Calling export_instances()")
+                with profile_utils.span('export_instances'):
+                    self.export_instances()
 
-        self.export_samplefilters()
-        self.export_displayfilters()
+        if self.do_mesh_dedup:
+            rfb_log().info("Mesh deduplication: shared %d meshes, saved %.2f MB" % 
+                            (self.num_dedup_meshes, self.dedup_bytes_saved / (1024.0 * 1024.0)))
 
-        if self.do_motion_blur:
-            rfb_log().debug("Calling export_instances_motion()")
-            self.export_instances_motion()
-        else:
-            rfb_log().debug("Calling export_instances()")
-            self.export_instances()
+        if not self.is_swatch_render:
+            self.log_memory_report()
 
         if self.is_interactive:
             self.check_solo_light()
@@ -267,6 +503,73 @@ class RmanScene(object):
             if self.is_viewport_render:
                 self.export_viewport_stats()
 
+    def get_memory_report(self):
+        '''
+        Return how much primvar data was pushed to the scene graph, per object
+        and per type. Shared (deduplicated) meshes don't count towards the totals.
+
+        Returns:
+            (dict) - the report, with the keys 'objects' (db_name to rman_type, bytes,
+                    primvars and number of instances), 'types' (rman_type to count and bytes),
+                    'total_bytes', 'num_dedup_meshes' and 'dedup_bytes_saved'
+        '''
+        objects = dict()
+        types = dict()
+        total_bytes = 0
+
+        rman_sg_nodes = list(self.rman_objects.items()) + list(self.rman_particles.items())
+        for db_name, rman_sg_node in rman_sg_nodes:
+            rman_type = rman_sg_node.rman_type
+            if not rman_type:
+                # particle systems are named after their settings type
+                rman_type = db_name.split('-')[-1]
+            nbytes = rman_sg_node.get_primvar_size()
+            objects[db_name] = {'rman_type': rman_type,
+                                'bytes': nbytes,
+                                'primvars': dict(rman_sg_node.primvar_sizes),
+                                'instances': len(rman_sg_node.instances)
+                                }
+            type_entry = types.get(rman_type, None)
+            if type_entry is None:
+                type_entry = {'count': 0, 'bytes': 0}
+                types[rman_type] = type_entry
+            type_entry['count'] += 1
+            type_entry['bytes'] += nbytes
+            total_bytes += nbytes
+
+        return {'objects': objects,
+                'types': types,
+                'total_bytes': total_bytes,
+                'num_dedup_meshes': self.num_dedup_meshes,
+                'dedup_bytes_saved': self.dedup_bytes_saved
+                }
+
+    def log_memory_report(self, num_largest=10):
+        '''
+        Log the memory report as a table, per type, followed by the largest objects.
+        When profiling, the full report is also written out as JSON.
+
+        Args:
+            num_largest (int) - number of the largest objects to list
+        '''
+        report = self.get_memory_report()
+        MB = 1024.0 * 1024.0
+        lines = []
+        lines.append('Scene graph primvar memory: %.2f MB' % (report['total_bytes'] / MB))
+        lines.append('%-40s %10s %12s' % ('Type', 'Count', 'Size (MB)'))
+        for rman_type, entry in sorted(report['types'].items(), key=lambda x: x[1]['bytes'], reverse=True):
+            lines.append('%-40s %10d %12.3f' % (rman_type, entry['count'], entry['bytes'] / MB))
+
+        largest = sorted(report['objects'].items(), key=lambda x: x[1]['bytes'], reverse=True)[:num_largest]
+        if largest:
+            lines.append('')
+            lines.append('Largest:')
+            for db_name, entry in largest:
+                lines.append('%-40s %-20s %12.3f' % (db_name, entry['rman_type'], entry['bytes'] / MB))
+        rfb_log().info('\n'.join(lines))
+
+        profile_utils.write_memory_report(report)
+
     def export_swatch_render_scene(self, render_output):
         self.reset()
 
@@ -381,17 +684,34 @@ class RmanScene(object):
                         return  
 
             translator =  self.rman_translators.get(rman_type, None)
+            if rman_type == 'MESH' and self.do_deferred_archives and db_name not in self.static_archives:
+                with profile_utils.span(ob.name_full, 'MESH.deferred_archive'):
+                    self.export_deferred_archive(ob, db_name)
+            if db_name in self.static_archives:
+                # the geometry has already been written to an archive,
+                # we only need to reference it
+                translator = self.rman_translators['DELAYED_LOAD_ARCHIVE']
             if not translator:
                 return
 
             rman_sg_node = None
             if db_name in self.rman_objects:
                 return
-            rman_sg_node = translator.export(ob, db_name)
+            with profile_utils.span(ob.name_full, '%s.export' % rman_type):
+                rman_sg_node = translator.export(ob, db_name)
             if not rman_sg_node:
                 return
+            if db_name in self.static_archives:
+                path_archive, bounds = self.static_archives[db_name]
+                translator.set_archive(rman_sg_node, path_archive, bounds)
+                if self.do_motion_blur:
+                    rman_sg_node.is_transforming = object_utils.is_transforming(ob)
+                self.processed_obs[db_name] = ob
             rman_sg_node.rman_type = rman_type
             self.rman_objects[db_name] = rman_sg_node 
+            self.rman_object_ids[db_name] = object_utils.get_id_key(obj)
+            if rman_type == 'LIGHT':
+                self.rman_lights[db_name] = ob.name
 
             if rman_type in ['MESH', 'POINTS']:
                 # Deal with any particles now. Particles are children to mesh nodes.
@@ -438,7 +758,107 @@ class RmanScene(object):
                     rman_sg_node.is_deforming = False
 
     def _scene_has_lights(self):
-        return (len([x for x in self.bl_scene.objects if object_utils._detect_primitive_(x) == 'LIGHT']) > 0)        
+        return (len(self.rman_lights) > 0)
+
+    def _get_light_objects(self, light_db_names):
+        '''
+        Return the Blender objects, along with their RmanSgLight, for the 
+        given light db_names. Lights that are no longer in the scene 
+        are skipped.
+        '''
+        light_obs = []
+        for db_name in light_db_names:
+            ob_name = self.rman_lights.get(db_name, None)
+            if ob_name is None:
+                continue
+            light_ob = self.bl_scene.objects.get(ob_name, None)
+            rman_sg_node = self.rman_objects.get(db_name, None)
+            if light_ob and rman_sg_node:
+                light_obs.append((light_ob, rman_sg_node))
+        return light_obs
+
+    def index_light_filters(self, light_db_name, filter_names):
+        # remove this light from any filters it used to have
+        for filter_name in self.rman_light_filters.get(light_db_name, []):
+            lights = self.rman_lightfilter_lights.get(filter_name, None)
+            if lights:
+                lights.discard(light_db_name)
+
+        for filter_name in filter_names:
+            lights = self.rman_lightfilter_lights.get(filter_name, None)
+            if lights is None:
+                lights = set()
+                self.rman_lightfilter_lights[filter_name] = lights
+            lights.add(light_db_name)
+        self.rman_light_filters[light_db_name] = filter_names
+
+    def _unindex_light(self, light_db_name):
+        self.index_light_filters(light_db_name, [])
+        self.rman_light_filters.pop(light_db_name, None)
+        self.rman_lights.pop(light_db_name, None)
+        self.rman_frame_sensitive.pop(light_db_name, None)
+
+    def index_frame_sensitive(self, rman_sg_node, bl_type, name):
+        '''
+        Add or remove a material or light from the frame sensitive index, 
+        depending on rman_sg_node.is_frame_sensitive. The translators call this
+        after each translation, so that frame changes only need to update
+        the nodes in the index.
+
+        Args:
+            rman_sg_node (RmanSgNode) - the translated material or light
+            bl_type (str) - 'MATERIAL' or 'LIGHT'
+            name (str) - name of the Blender material or light object
+        '''
+        if rman_sg_node.is_frame_sensitive:
+            self.rman_frame_sensitive[rman_sg_node.db_name] = (bl_type, name)
+        else:
+            self.rman_frame_sensitive.pop(rman_sg_node.db_name, None)
+
+    def get_meta_families(self):
+        '''
+        Get the metaball family index, building it if it hasn't been built yet for
+        this export. Blender puts all of the metaballs whose objects have the same 
+        name before the first '.' in one family, that gets rendered by the family's
+        first object. Each metaball belongs to the first object that uses it.
+
+        Returns:
+            (dict) - dictionary of family names to the names of the objects
+                     that own the metaballs in the family
+        '''
+        if self.rman_meta_families is None:
+            families = dict()
+            owned = set()
+            for ob in bpy.data.objects:
+                if ob.type != 'META' or ob.data.name_full in owned:
+                    continue
+                owned.add(ob.data.name_full)
+                family = object_utils.get_meta_family(ob)
+                owners = families.get(family, None)
+                if owners is None:
+                    owners = []
+                    families[family] = owners
+                owners.append(ob.name_full)
+            self.rman_meta_families = families
+        return self.rman_meta_families
+
+    def _meta_object_updated(self, ob):
+        '''
+        A metaball object changed. Re-index it if it's new to its family, and
+        re-translate the family. The caller is expected to have opened a ScopedEdit.
+        '''
+        family = object_utils.get_meta_family(ob)
+        if ob.name_full not in self.get_meta_families().get(family, []):
+            self.rman_meta_families = None
+
+        # the family is rendered by its first object
+        master = self.depsgraph.objects.get(family, None)
+        if not master:
+            return
+        db_name = object_utils.get_db_name(master, rman_type='META')
+        rman_sg_node = self.rman_objects.get(db_name, None)
+        if rman_sg_node:
+            self.rman_translators['META'].update(master, rman_sg_node)
 
     def _export_instance(self, ob_inst, seg=None):
    
@@ -484,7 +904,8 @@ class RmanScene(object):
             rman_group_translator.update_transform(ob_inst, rman_sg_group)
 
             psys_translator = self.rman_translators[psys.settings.type] 
-            self.attach_particle_material(psys, parent, ob, rman_sg_group.sg_node)       
+            self.attach_particle_material(psys, parent, ob, rman_sg_group.sg_node, group_db_name, 
+                                          rman_sg_node=rman_sg_node)       
             psys_translator.add_object_instance(rman_sg_particles, rman_sg_group.sg_node)  
 
             # object attrs             
@@ -519,8 +940,9 @@ class RmanScene(object):
             translator = self.rman_translators.get(rman_type, None)
             if translator:
                 if db_name not in self.processed_obs:
-                    translator.update(ob, rman_sg_node)
-                    translator.export_object_primvars(ob, rman_sg_node.sg_node)
+                    with profile_utils.span(ob.name_full, '%s.update' % rman_type):
+                        translator.update(ob, rman_sg_node)
+                        translator.export_object_primvars(ob, rman_sg_node.sg_node)
                     self.processed_obs[db_name] = ob
 
             if rman_sg_node.sg_node is None:
@@ -546,7 +968,7 @@ class RmanScene(object):
             if translator:
                 translator.export_object_attributes(ob, rman_sg_group.sg_node)  
 
-            self.attach_material(ob, rman_sg_group.sg_node)
+            self.attach_material(ob, rman_sg_group.sg_node, group_db_name, rman_sg_node=rman_sg_node)
 
             # add instance to the RmanSgNode
             if parent_sg_node:
@@ -554,8 +976,115 @@ class RmanScene(object):
             else:
                 rman_sg_node.instances[group_db_name] = rman_sg_group         
 
+    def _is_batchable_instance(self, ob_inst, rman_types):
+        if not ob_inst.is_instance:
+            return False
+        ob = ob_inst.instance_object
+        if ob.type in ('ARMATURE', 'CURVE', 'CAMERA', 'EMPTY'):
+            return False
+        rman_type = rman_types.get(ob.name_full, None)
+        if rman_type is None:
+            rman_type = object_utils._detect_primitive_(ob)
+            rman_types[ob.name_full] = rman_type
+        return rman_type not in ('LIGHT', 'LIGHTFILTER', 'META', 'CAMERA', 'EMPTY', 'NONE')
+
+    def _export_instancer_batch(self, ob, parent, psys, instances):
+        '''
+        Export all of the instances of a prototype object, that come from the same
+        instancer (particle system, dupli verts/faces or collection instance).
+
+        Rather than setting attributes and materials on every instance, we create
+        a single instancer group that holds them, and have the instance groups
+        inherit from it. The instance groups only get a transform and the 
+        user:random_id attribute, so shaders can still vary per instance.
+
+        Args:
+            ob (bpy.types.Object) - the prototype object
+            parent (bpy.types.Object) - the object doing the instancing
+            psys (bpy.types.ParticleSystem) - particle system, if this is a particle instancer
+            instances (list) - list of (group_db_name, matrix, random_id) tuples
+        '''
+        rman_group_translator = self.rman_translators['GROUP']
+        rman_type = object_utils._detect_primitive_(ob)
+        db_name = object_utils.get_db_name(ob, rman_type=rman_type)
+        if db_name == '':
+            return
+
+        rman_sg_node = self.rman_objects.get(db_name, None)
+        if not rman_sg_node:
+            return
+
+        translator = self.rman_translators.get(rman_type, None)
+        if translator and db_name not in self.processed_obs:
+            with profile_utils.span(ob.name_full, '%s.update' % rman_type):
+                translator.update(ob, rman_sg_node)
+                translator.export_object_primvars(ob, rman_sg_node.sg_node)
+            self.processed_obs[db_name] = ob
+
+        if rman_sg_node.sg_node is None:
+            return
+
+        rman_sg_particles = None
+        parent_sg_node = None
+        parent_db_name = object_utils.get_db_name(parent, rman_type=object_utils._detect_primitive_(parent))
+        if psys:
+            particles_db_name = object_utils.get_db_name(parent, psys=psys)
+            rman_sg_particles = self.rman_particles.get(particles_db_name, None)
+            if not rman_sg_particles:
+                return
+            psys_name = psys.name
+        else:
+            psys_name = ''
+            if parent.type == "EMPTY" and parent.is_instancer:
+                parent_db_name = object_utils.get_db_name(parent)
+                parent_sg_node = self.rman_objects.get(parent_db_name, None)
+                if not parent_sg_node:
+                    parent_sg_node = rman_group_translator.export(parent, parent_db_name)
+                    self.rman_objects[parent_db_name] = parent_sg_node
+
+        instancer_db_name = '%s|%s|%s-INSTANCER' % (parent.name_full, ob.name_full, psys_name)
+        rman_sg_instancer = self.rman_objects.get(instancer_db_name, None)
+        if not rman_sg_instancer:
+            rman_sg_instancer = rman_group_translator.export(ob, instancer_db_name)
+            if rman_sg_particles:
+                psys_translator = self.rman_translators[psys.settings.type]
+                psys_translator.export_object_attributes(ob, rman_sg_instancer.sg_node)
+                self.attach_particle_material(psys, parent, ob, rman_sg_instancer.sg_node, instancer_db_name,
+                                              rman_sg_node=rman_sg_node)
+                psys_translator.add_object_instance(rman_sg_particles, rman_sg_instancer.sg_node)
+            else:
+                if translator:
+                    translator.export_object_attributes(ob, rman_sg_instancer.sg_node)
+                self.attach_material(ob, rman_sg_instancer.sg_node, instancer_db_name, rman_sg_node=rman_sg_node)
+                self.get_root_sg_node().AddChild(rman_sg_instancer.sg_node)
+            self.rman_objects[instancer_db_name] = rman_sg_instancer
+            self.rman_instancers[instancer_db_name] = (set([db_name, parent_db_name]), [])
+        group_db_names = self.rman_instancers[instancer_db_name][1]
+
+        for group_db_name, mtx, random_id in instances:
+            if group_db_name in rman_sg_node.instances:
+                # we've already added this instance
+                continue
+            rman_sg_group = rman_group_translator.export(ob, group_db_name)
+            rman_sg_group.sg_node.AddChild(rman_sg_node.sg_node)
+            rman_sg_group.sg_node.SetTransform(mtx)
+            attrs = rman_sg_group.sg_node.GetAttributes()
+            attrs.SetInteger('user:random_id', random_id)
+            rman_sg_group.sg_node.SetAttributes(attrs)
+            rman_sg_instancer.sg_node.AddChild(rman_sg_group.sg_node)
+            self.rman_objects[group_db_name] = rman_sg_group
+            group_db_names.append(group_db_name)
+
+            # add instance to the RmanSgNode
+            if parent_sg_node:
+                parent_sg_node.instances[group_db_name] = rman_sg_group 
+            else:
+                rman_sg_node.instances[group_db_name] = rman_sg_group
+
     def export_instances(self, obj_selected=None):
         objFound = False
+        rman_types = dict()
+        instancer_batches = dict()
         for ob_inst in self.depsgraph.object_instances:
             if obj_selected:
                 if objFound:
@@ -570,23 +1099,108 @@ class RmanScene(object):
                 if not objFound:
                     continue
 
+            elif self._is_batchable_instance(ob_inst, rman_types):
+                # collect the instances for each prototype, and export 
+                # them all in one go below
+                self._add_to_instancer_batch(ob_inst, instancer_batches)
+                continue
+
             self._export_instance(ob_inst)  
 
-    def attach_material(self, ob, group):
-        for mat in object_utils._get_used_materials_(ob): 
+        for ob, parent, psys, instances in instancer_batches.values():
+            self._export_instancer_batch(ob, parent, psys, instances)
+
+    def _add_to_instancer_batch(self, ob_inst, instancer_batches):
+        '''
+        Add an instance to the batch for its prototype and instancer, for 
+        _export_instancer_batch(). ob_inst is only valid while we're iterating 
+        over object_instances, so we grab what we need now.
+
+        Args:
+            ob_inst (DepsgraphObjectInstance) - the instance
+            instancer_batches (dict) - the batches, keyed by (parent name, prototype name, 
+                                       particle system name)
+
+        Returns:
+            (bool) - whether this instance started a new batch
+        '''
+        ob = ob_inst.instance_object
+        parent = ob_inst.parent
+        psys = ob_inst.particle_system
+        key = (parent.name_full, ob.name_full, psys.name if psys else '')
+        batch = instancer_batches.get(key, None)
+        is_new = (batch is None)
+        if is_new:
+            batch = (ob, parent, psys, [])
+            instancer_batches[key] = batch
+        mtx = transform_utils.convert_matrix(ob_inst.matrix_world)
+        batch[3].append((object_utils.get_group_db_name(ob_inst), mtx, ob_inst.random_id))
+        return is_new
+
+    def _remove_instancer(self, instancer_db_name):
+        '''
+        Delete an instancer group made by _export_instancer_batch(), along with
+        its instance groups.
+        '''
+        db_names, group_db_names = self.rman_instancers.pop(instancer_db_name)
+        for group_db_name in group_db_names:
+            for db_name in db_names:
+                rman_sg_node = self.rman_objects.get(db_name, None)
+                if rman_sg_node:
+                    rman_sg_node.instances.pop(group_db_name, None)
+            rman_sg_group = self.rman_objects.pop(group_db_name, None)
+            if rman_sg_group and rman_sg_group.sg_node:
+                self.sg_scene.DeleteDagNode(rman_sg_group.sg_node)
+        rman_sg_instancer = self.rman_objects.pop(instancer_db_name, None)
+        if rman_sg_instancer and rman_sg_instancer.sg_node:
+            self.sg_scene.DeleteDagNode(rman_sg_instancer.sg_node)
+        self._unindex_group_materials(instancer_db_name)
+
+    def _index_group_materials(self, group_db_name, group, mat_db_names):
+        # remove this group from any materials it used to have
+        for mat_db_name in self.rman_group_materials.get(group_db_name, []):
+            groups = self.rman_material_groups.get(mat_db_name, None)
+            if groups:
+                groups.pop(group_db_name, None)
+
+        for mat_db_name in mat_db_names:
+            groups = self.rman_material_groups.get(mat_db_name, None)
+            if groups is None:
+                groups = dict()
+                self.rman_material_groups[mat_db_name] = groups
+            groups[group_db_name] = group
+        self.rman_group_materials[group_db_name] = mat_db_names
+
+    def _unindex_group_materials(self, group_db_name):
+        self._index_group_materials(group_db_name, None, [])
+        self.rman_group_materials.pop(group_db_name, None)
+
+    def attach_material(self, ob, group, group_db_name='', rman_sg_node=None):
+        # meshes cache the material indices their faces use, 
+        # so that instances don't need to look again
+        used_material_ids = getattr(rman_sg_node, 'used_material_ids', None)
+        mat_db_names = []
+        for mat in object_utils._get_used_materials_(ob, used_material_ids=used_material_ids): 
             if not mat:
                 continue
             mat_db_name = object_utils.get_db_name(mat)
+            mat_db_names.append(mat_db_name)
             rman_sg_material = self.rman_materials.get(mat_db_name, None)
             if rman_sg_material and rman_sg_material.sg_node:
                 group.SetMaterial(rman_sg_material.sg_node)        
 
-    def attach_particle_material(self, psys, ob, inst_ob, group):
+        if group_db_name:
+            self._index_group_materials(group_db_name, group, mat_db_names)
+
+    def attach_particle_material(self, psys, ob, inst_ob, group, group_db_name='', rman_sg_node=None):
+        mat_db_names = []
         if psys.settings.renderman.use_object_material:
-            for mat in object_utils._get_used_materials_(inst_ob): 
+            used_material_ids = getattr(rman_sg_node, 'used_material_ids', None)
+            for mat in object_utils._get_used_materials_(inst_ob, used_material_ids=used_material_ids): 
                 if not mat:
                     continue
                 mat_db_name = object_utils.get_db_name(mat)
+                mat_db_names.append(mat_db_name)
                 rman_sg_material = self.rman_materials.get(mat_db_name, None)
                 if rman_sg_material and rman_sg_material.sg_node:
                     group.SetMaterial(rman_sg_material.sg_node) 
@@ -595,20 +1209,130 @@ class RmanScene(object):
             if mat_idx < len(ob.material_slots):
                 mat = ob.material_slots[mat_idx].material
                 mat_db_name = object_utils.get_db_name(mat)
+                mat_db_names.append(mat_db_name)
                 rman_sg_material = self.rman_materials.get(mat_db_name, None)
                 if rman_sg_material:
                     group.SetMaterial(rman_sg_material.sg_node)                    
 
-    def export_instances_motion(self, obj_selected=None):
-        actual_subframes = []
-        origframe = self.bl_scene.frame_current
+        if group_db_name:
+            self._index_group_materials(group_db_name, group, mat_db_names)
 
-        mb_segs = self.bl_scene.renderman.motion_segments
-        origframe = self.bl_scene.frame_current
-        #actual_subframes = [origframe + subframe for subframe in subframes]        
+    def _add_motion_work(self, ob_inst, motion_work):
+        '''
+        Figure out what needs to be exported for this instance on the rest of the
+        motion samples, and add it to motion_work. Static objects don't add anything,
+        so that the later motion samples only need to look at what is moving.
+
+        Args:
+            ob_inst (DepsgraphObjectInstance) - the instance that was exported on the first sample
+            motion_work (dict) - dictionary of motion step to the work for that step, keyed by
+                                 (kind, db_name)
+        '''
+        if ob_inst.is_instance:
+            ob = ob_inst.instance_object.original  
+        else:
+            ob = ob_inst.object
 
+        if ob.type not in ['MESH']:
+            return
+
+        rman_type = object_utils._detect_primitive_(ob)
+        db_name = object_utils.get_db_name(ob, rman_type=rman_type)              
+        if db_name == '':
+            return
+
+        # deal with particles first
+        for psys in ob.particle_systems:
+            if psys.settings.type != 'EMITTER' or psys.settings.render_type == 'OBJECT':
+                # for now, we won't deal with deforming hair
+                continue
+            psys_db_name = object_utils.get_db_name(ob, psys=psys)
+            rman_psys_node = self.rman_particles.get(psys_db_name, None)
+            if not rman_psys_node:
+                continue
+            for step in rman_psys_node.motion_steps:
+                motion_work.setdefault(step, dict())[('PSYS', psys_db_name)] = (ob.original, psys.name, rman_psys_node)
+
+        if ob.name_full not in self.moving_objects:
+            return
+
+        rman_sg_node = self.rman_objects.get(db_name, None)
+        if not rman_sg_node:
+            return
+
+        if rman_sg_node.is_transforming:
+            group_db_name = object_utils.get_group_db_name(ob_inst)
+            rman_sg_group = rman_sg_node.instances.get(group_db_name, None)
+            if rman_sg_group:
+                self.rman_translators['GROUP'].update_transform_num_samples(rman_sg_group, rman_sg_node.motion_steps)
+                parent = None
+                if ob_inst.is_instance:
+                    parent = ob_inst.parent.original
+                for step in rman_sg_node.motion_steps:
+                    motion_work.setdefault(step, dict())[('XFORM', group_db_name)] = (ob.original, parent, rman_sg_group)
+
+        if rman_sg_node.is_deforming:
+            for step in rman_sg_node.motion_steps:
+                motion_work.setdefault(step, dict())[('DEFORM', db_name)] = (ob.original, rman_type, rman_sg_node)
+
+    def _export_motion_sample(self, work, samp, seg):
+        '''
+        Export one of the motion samples after the first, using the work 
+        collected by _add_motion_work().
+
+        Args:
+            work (dict) - the work for this motion step
+            samp (int) - the index of the motion sample
+            seg (float) - the motion step
+        '''
+        rman_group_translator = self.rman_translators['GROUP']
+        instance_groups = dict()
+
+        for (kind, db_name), entry in work.items():
+            if kind == 'PSYS':
+                ob_orig, psys_name, rman_psys_node = entry
+                ob = ob_orig.evaluated_get(self.depsgraph)
+                psys = ob.particle_systems.get(psys_name, None)
+                if psys:
+                    psys_translator = self.rman_translators[psys.settings.type]
+                    psys_translator.export_deform_sample(rman_psys_node, ob, psys, samp)
+
+            elif kind == 'XFORM':
+                ob_orig, parent, rman_sg_group = entry
+                if parent is None:
+                    ob = ob_orig.evaluated_get(self.depsgraph)
+                    rman_group_translator.update_transform_sample(ob, rman_sg_group, samp, seg)
+                else:
+                    # instances only exist while iterating over object_instances,
+                    # so these get handled below
+                    instance_groups.setdefault(parent.name_full, dict())[db_name] = rman_sg_group
+
+            elif kind == 'DEFORM':
+                ob_orig, rman_type, rman_sg_node = entry
+                translator = self.rman_translators.get(rman_type, None)
+                if translator:
+                    with profile_utils.span(ob_orig.name_full, '%s.export_deform_sample' % rman_type):
+                        translator.export_deform_sample(rman_sg_node, ob_orig.evaluated_get(self.depsgraph), samp)
+
+        if instance_groups:
+            for ob_inst in self.depsgraph.object_instances:
+                if not ob_inst.is_instance:
+                    continue
+                groups = instance_groups.get(ob_inst.parent.name_full, None)
+                if not groups:
+                    continue
+                rman_sg_group = groups.get(object_utils.get_group_db_name(ob_inst), None)
+                if rman_sg_group:
+                    rman_group_translator.update_transform_sample(ob_inst, rman_sg_group, samp, seg)
+
+    def export_instances_motion(self, obj_selected=None):
+        origframe = self.bl_scene.frame_current
         motion_steps = sorted(list(self.motion_steps))
 
+        # The first motion sample exports everything, and collects the work
+        # that the rest of the samples need to do into motion_work. 
+        motion_work = dict()
+
         first_sample = False
         for samp, seg in enumerate(motion_steps):
             first_sample = (samp == 0)
@@ -619,15 +1343,20 @@ class RmanScene(object):
 
             self.depsgraph.update()
 
-            total = len(self.depsgraph.object_instances)
-            objFound = False
-            
             # update camera
             if not first_sample and self.main_camera.is_transforming and seg in self.main_camera.motion_steps:
                 cam_translator =  self.rman_translators['CAMERA']
                 cam_translator.update_transform(self.depsgraph.scene_eval.camera, self.main_camera, samp)
 
-            for i, ob_inst in enumerate(self.depsgraph.object_instances):  
+            if not first_sample:
+                with profile_utils.span('motion sample %d' % samp, args={'seg': seg}):
+                    self._export_motion_sample(motion_work.get(seg, dict()), samp, seg)
+                continue
+
+            objFound = False
+            rman_types = dict()
+            instancer_batches = dict()
+            for ob_inst in self.depsgraph.object_instances:  
                 if obj_selected:
                     if objFound:
                         break
@@ -641,62 +1370,32 @@ class RmanScene(object):
                     if not objFound:
                         continue       
 
-                if first_sample:
-                    # for the first motion sample use _export_instance()
-                    self._export_instance(ob_inst, seg=seg)  
-                    continue  
-
-                rman_group_translator = self.rman_translators['GROUP']
-                if ob_inst.is_instance:
-                    ob = ob_inst.instance_object.original  
-                else:
-                    ob = ob_inst.object
-
-                group_db_name = object_utils.get_group_db_name(ob_inst)          
-
-                if ob.type not in ['MESH']:
+                elif self._is_batchable_instance(ob_inst, rman_types) and \
+                        ob_inst.instance_object.name_full not in self.moving_objects:
+                    # instances of prototypes that don't move only need the
+                    # first sample, so they can be batched like in export_instances().
+                    # The prototype may still have particles that need the other samples.
+                    if self._add_to_instancer_batch(ob_inst, instancer_batches):
+                        self._add_motion_work(ob_inst, motion_work)
                     continue
 
-                rman_type = object_utils._detect_primitive_(ob)
-                db_name = object_utils.get_db_name(ob, rman_type=rman_type)              
-                if db_name == '':
-                    continue
+                # for the first motion sample use _export_instance()
+                self._export_instance(ob_inst, seg=seg)  
+                self._add_motion_work(ob_inst, motion_work)
 
-                # deal with particles first
-                for psys in ob.particle_systems:
-                    psys_translator = self.rman_translators[psys.settings.type]
-                    psys_db_name = object_utils.get_db_name(ob, psys=psys)
-                    rman_psys_node = self.rman_particles.get(psys_db_name, None)
-                    if not rman_psys_node:
-                        continue
-                    if not seg in rman_psys_node.motion_steps:
-                        continue
-                    if psys.settings.type == 'HAIR' and psys.settings.render_type == 'PATH':
-                        # for now, we won't deal with deforming hair
-                        continue
-                    elif psys.settings.type == 'EMITTER' and psys.settings.render_type != 'OBJECT':
-                        psys_translator.export_deform_sample(rman_psys_node, ob, psys, samp)                  
+            for ob, parent, psys, instances in instancer_batches.values():
+                self._export_instancer_batch(ob, parent, psys, instances)
 
-                if ob.name_full not in self.moving_objects:
-                    continue
-
-                rman_sg_node = self.rman_objects.get(db_name, None)
-                if not rman_sg_node:
-                    continue
-                
-                if not seg in rman_sg_node.motion_steps:
-                    continue
-
-                if rman_sg_node.is_transforming:
-                    rman_sg_group = rman_sg_node.instances.get(group_db_name, None)
-                    if rman_sg_group:
-                        rman_group_translator.update_transform_num_samples(rman_sg_group, rman_sg_node.motion_steps ) # should have been set in _export_instances()                       
-                        rman_group_translator.update_transform_sample( ob_inst, rman_sg_group, samp, seg)
-
-                if rman_sg_node.is_deforming:
-                    translator = self.rman_translators.get(rman_type, None)
-                    if translator:
-                        translator.export_deform_sample(rman_sg_node, ob, samp)                     
+        # now that all of the samples are in, let the multi-material
+        # meshes hand them to their children
+        mesh_translator = self.rman_translators['MESH']
+        deformed_meshes = dict()
+        for work in motion_work.values():
+            for (kind, db_name), entry in work.items():
+                if kind == 'DEFORM' and entry[1] == 'MESH':
+                    deformed_meshes[db_name] = entry[2]
+        for rman_sg_mesh in deformed_meshes.values():
+            mesh_translator.finish_deform_samples(rman_sg_mesh)
 
         self.rman_render.bl_engine.frame_set(origframe, subframe=0)  
 
@@ -1112,298 +1811,411 @@ class RmanScene(object):
             material_translator = self.rman_translators["MATERIAL"]
             light_translator = self.rman_translators["LIGHT"]
 
-            with self.rman.SGManager.ScopedEdit(self.sg_scene):  
-                for mat in bpy.data.materials:   
-                    db_name = object_utils.get_db_name(mat)  
+            # updating re-indexes the node, so iterate over a copy
+            for db_name, (bl_type, name) in list(self.rman_frame_sensitive.items()):
+                if bl_type == 'MATERIAL':
+                    mat = bpy.data.materials.get(name, None)
                     rman_sg_material = self.rman_materials.get(db_name, None)
-                    if rman_sg_material and rman_sg_material.is_frame_sensitive:
+                    if mat and rman_sg_material:
                         material_translator.update(mat, rman_sg_material)
+                        continue
+                else:
+                    o = bpy.data.objects.get(name, None)
+                    rman_sg_node = self.rman_objects.get(db_name, None)
+                    if o and rman_sg_node:
+                        light_translator.update(o, rman_sg_node)
+                        continue
+                # no longer in the scene
+                self.rman_frame_sensitive.pop(db_name, None)
 
-                for o in bpy.data.objects:
-                    if o.type == 'LIGHT':                                
-                        obj_key = object_utils.get_db_name(o, rman_type='LIGHT') 
-                        rman_sg_node = self.rman_objects[obj_key]
-                        if rman_sg_node.is_frame_sensitive:
-                            light_translator.update(o, rman_sg_node)        
-
-    def _material_updated(self, obj):
-        mat = obj.id
+    def _material_updated(self, mat):
         db_name = object_utils.get_db_name(mat)
         rman_sg_material = self.rman_materials.get(db_name, None)
         translator = self.rman_translators["MATERIAL"]
-        with self.rman.SGManager.ScopedEdit(self.sg_scene):   
-            mat = obj.id              
-            if not rman_sg_material:
-                rman_sg_material = translator.export(mat, db_name)
-                self.rman_materials[db_name] = rman_sg_material
-                # Not sure of a better method to do this.
-                # There doesn't seem to be an API call to know what objects in the scene
-                # have this specific material, so we loop thru all objs
-                for ob_inst in self.depsgraph.object_instances:
-                    psys = None
-                    if ob_inst.is_instance:
-                        ob = ob_inst.instance_object
-                        group_db_name =  object_utils.get_group_db_name(ob_inst)
-                        psys = ob_inst.particle_system 
-                    else:
-                        ob = ob_inst.object
-                        group_db_name =  object_utils.get_group_db_name(ob_inst) 
-                    rman_type = object_utils._detect_primitive_(ob)
-                    obj_db_name = object_utils.get_db_name(ob, rman_type=rman_type)
-                    rman_sg_node = self.rman_objects.get(obj_db_name, None)
-
-                    if rman_sg_node:
-                        for m in object_utils._get_used_materials_(ob):
-                            if m == mat:
-                                if group_db_name in rman_sg_node.instances:
-                                    rman_sg_node.instances[group_db_name].sg_node.SetMaterial(rman_sg_material.sg_node)
-
-            else:
-                translator.update(mat, rman_sg_material)   
+        if not rman_sg_material:
+            rman_sg_material = translator.export(mat, db_name)
+            self.rman_materials[db_name] = rman_sg_material
+            # attach to any groups that were already asking for this material
+            if rman_sg_material and rman_sg_material.sg_node:
+                for group in self.rman_material_groups.get(db_name, dict()).values():
+                    group.SetMaterial(rman_sg_material.sg_node)
 
-    def _object_transform_updated(self, obj):
-        ob = obj.id         
+        else:
+            translator.update(mat, rman_sg_material)   
+
+    def _get_instance_matrices(self):
+        '''
+        Snapshot the matrices of all of the depsgraph instances, keyed by
+        their group db_name. The snapshot is taken at most once per 
+        update_scene() call, so that updating the transform of many objects 
+        only costs one pass over depsgraph.object_instances. 
+
+        Returns:
+            (tuple) - dictionary of group db_name to matrix, and dictionary of
+                      instancer name to the group db_names it is instancing
+        '''
+        if self.instance_matrices is None:
+            matrices = dict()
+            instancer_groups = dict()
+            for ob_inst in self.depsgraph.object_instances:
+                group_db_name = object_utils.get_group_db_name(ob_inst)
+                matrices[group_db_name] = transform_utils.convert_matrix(ob_inst.matrix_world)
+                if ob_inst.is_instance:
+                    parent_name = ob_inst.parent.name_full
+                    groups = instancer_groups.get(parent_name, None)
+                    if groups is None:
+                        groups = []
+                        instancer_groups[parent_name] = groups
+                    groups.append(group_db_name)
+            self.instance_matrices = (matrices, instancer_groups)
+        return self.instance_matrices
+
+    def _object_transform_updated(self, ob):
+        '''
+        Update the transform of the groups of this object. The caller is
+        expected to have opened a ScopedEdit.
+        '''
         rman_type = object_utils._detect_primitive_(ob)
         obj_key = object_utils.get_db_name(ob, rman_type=rman_type) 
         rman_group_translator = self.rman_translators['GROUP']  
         rman_sg_node = self.rman_objects.get(obj_key, None)
-        rm = ob.renderman
-
-        with self.rman.SGManager.ScopedEdit(self.sg_scene):                
-            if rman_type == 'LIGHTFILTER':
-                group_db_name = object_utils.get_group_db_name(ob)
-                rman_sg_group = self.rman_objects.get(group_db_name, None)                
-                rman_group_translator.update_transform(ob, rman_sg_group)
-
-            elif obj.id.is_instancer:
-                for ob_inst in self.depsgraph.object_instances:                                
-                    if ob_inst.is_instance and ob_inst.parent == ob:     
-                        group_db_name = object_utils.get_group_db_name(ob_inst)
-                        rman_sg_group = self.rman_objects.get(group_db_name, None)
-                        if rman_sg_group:
-                            rman_group_translator.update_transform(ob_inst, rman_sg_group)
-            else:
-                if rman_type == "META":
-                    self.rman_translators['META'].update(ob, rman_sg_node)
-                elif rman_type == "CAMERA":                    
-                    self.rman_translators['CAMERA'].update_transform(ob, rman_sg_node) 
-                else:                       
-                    for k,rman_sg_group in rman_sg_node.instances.items():     
-                        for ob_inst in self.depsgraph.object_instances: 
-                            group_db_name = object_utils.get_group_db_name(ob_inst)
-                            if group_db_name == k:
-                                rman_group_translator.update_transform(ob_inst, rman_sg_group)
-                                break
-
-    def _obj_geometry_updated(self, obj):
-        ob = obj.id
+
+        if rman_type == 'LIGHTFILTER':
+            group_db_name = object_utils.get_group_db_name(ob)
+            rman_sg_group = self.rman_objects.get(group_db_name, None)                
+            rman_group_translator.update_transform(ob, rman_sg_group)
+
+        elif ob.is_instancer:
+            matrices, instancer_groups = self._get_instance_matrices()
+            for group_db_name in instancer_groups.get(ob.name_full, []):
+                rman_sg_group = self.rman_objects.get(group_db_name, None)
+                if rman_sg_group:
+                    rman_sg_group.sg_node.SetTransform(matrices[group_db_name])
+        elif rman_sg_node:
+            if rman_type == "META":
+                self._meta_object_updated(ob)
+            elif rman_type == "CAMERA":                    
+                self.rman_translators['CAMERA'].update_transform(ob, rman_sg_node) 
+            else:                       
+                for k,rman_sg_group in rman_sg_node.instances.items():
+                    if k == ob.name_full:
+                        # not an instance, no need to look at the snapshot
+                        rman_group_translator.update_transform(ob, rman_sg_group)
+                        continue
+                    matrices, instancer_groups = self._get_instance_matrices()
+                    mtx = matrices.get(k, None)
+                    if mtx is not None:
+                        rman_sg_group.sg_node.SetTransform(mtx)
+
+    def _obj_geometry_updated(self, ob):
+        '''
+        Re-translate this object. The caller is expected to have opened a ScopedEdit.
+        '''
         rman_type = object_utils._detect_primitive_(ob)
         obj_key = object_utils.get_db_name(ob, rman_type=rman_type) 
         rman_sg_node = self.rman_objects[obj_key]
             
-        with self.rman.SGManager.ScopedEdit(self.sg_scene):
-            if rman_type == 'LIGHTFILTER':
-                self.rman_translators['LIGHTFILTER'].update(ob, rman_sg_node)
-                for light_ob in [x for x in self.bl_scene.objects if object_utils._detect_primitive_(x) == 'LIGHT']:
-                    light_key = object_utils.get_db_name(light_ob, rman_type='LIGHT')
-                    rman_sg_light = self.rman_objects[light_key]
-                    if rman_sg_light:
-                        self.rman_translators['LIGHT'].update_light_filters(light_ob, rman_sg_light)
-
-            elif rman_type == 'LIGHT':
-                self.rman_translators['LIGHT'].update(ob, rman_sg_node)
-                                                    
-                if not self.scene_solo_light:
-                    # only set if a solo light hasn't been set
-                    rman_sg_node.sg_node.SetHidden(ob.data.renderman.mute)
-            else:
-                translator = self.rman_translators.get(rman_type, None)
-                if not translator:
-                    return
-                translator.update(ob, rman_sg_node)
-                group_db_name = object_utils.get_group_db_name(ob)
+        if rman_type == 'LIGHTFILTER':
+            self.rman_translators['LIGHTFILTER'].update(ob, rman_sg_node)
+            light_db_names = list(self.rman_lightfilter_lights.get(ob.name, []))
+            for light_ob, rman_sg_light in self._get_light_objects(light_db_names):
+                self.rman_translators['LIGHT'].update_light_filters(light_ob, rman_sg_light)
+
+        elif rman_type == 'LIGHT':
+            self.rman_translators['LIGHT'].update(ob, rman_sg_node)
+                                                
+            if not self.scene_solo_light:
+                # only set if a solo light hasn't been set
+                rman_sg_node.sg_node.SetHidden(ob.data.renderman.mute)
+
+        elif rman_type == 'META':
+            self._meta_object_updated(ob)
+        else:
+            translator = self.rman_translators.get(rman_type, None)
+            if not translator:
+                return
+            translator.update(ob, rman_sg_node)
+            group_db_name = object_utils.get_group_db_name(ob)
+            rman_sg_group = rman_sg_node.instances.get(group_db_name, None)
+            if rman_sg_group:
+                self.attach_material(ob, rman_sg_group.sg_node, group_db_name, rman_sg_node=rman_sg_node)
 
-                for mat in object_utils._get_used_materials_(ob): 
-                    if not mat:
-                        continue
-                    mat_db_name = object_utils.get_db_name(mat)
-                    rman_sg_material = self.rman_materials.get(mat_db_name, None)
-                    if rman_sg_material:
-                        rman_sg_node.instances[group_db_name].sg_node.SetMaterial(rman_sg_material.sg_node)
-
-                if rman_type in ['MESH', 'POINTS']:
-                    for psys in ob.particle_systems:
-                        psys_translator = self.rman_translators[psys.settings.type]
-                        if psys.settings.type == 'HAIR' and psys.settings.render_type == 'PATH':
-                            hair_db_name = object_utils.get_db_name(ob, psys=psys)                                        
-                            rman_sg_hair_node = self.rman_particles.get(hair_db_name, None)
-                            if rman_sg_hair_node:
-                                psys_translator.update(ob, psys, rman_sg_hair_node) 
-                            else:
-                                rman_sg_hair_node = psys_translator.export(ob, psys, hair_db_name)
-                                rman_sg_node.sg_node.AddChild(rman_sg_hair_node.sg_node) 
-                                self.rman_particles[hair_db_name] = rman_sg_hair_node
-                        elif psys.settings.type == 'EMITTER':
-                            psys_db_name = object_utils.get_db_name(ob, psys=psys)
-                            rman_sg_particles_node = self.rman_particles.get(psys_db_name, None)
-                            if psys.settings.render_type != 'OBJECT':
-                                if rman_sg_particles_node:
-                                    psys_translator.update(ob, psys, rman_sg_particles_node)
-                                else:
-                                    rman_sg_particles_node = psys_translator.export(ob, psys, psys_db_name)
-                                    rman_sg_node.sg_node.AddChild(rman_sg_particles_node.sg_node)  
-                                    self.rman_particles[psys_db_name] = rman_sg_particles_node 
-                            elif psys.settings.render_type == 'OBJECT':
-                                if rman_sg_particles_node:
-                                    psys_translator.update(ob, psys, rman_sg_particles_node)          
-                                else:
-                                    rman_sg_particles_node = psys_translator.export(ob, psys, psys_db_name)
-                                    self.sg_scene.Root().AddChild(rman_sg_particles_node.sg_node)                                     
-                                    self.rman_particles[psys_db_name] = rman_sg_particles_node     
-
-                                inst_ob = psys.settings.instance_object 
-                                rman_group_translator = self.rman_translators['GROUP']
+            if rman_type in ['MESH', 'POINTS']:
+                for psys in ob.particle_systems:
+                    psys_translator = self.rman_translators[psys.settings.type]
+                    if psys.settings.type == 'HAIR' and psys.settings.render_type == 'PATH':
+                        hair_db_name = object_utils.get_db_name(ob, psys=psys)                                        
+                        rman_sg_hair_node = self.rman_particles.get(hair_db_name, None)
+                        if rman_sg_hair_node:
+                            psys_translator.update(ob, psys, rman_sg_hair_node) 
+                        else:
+                            rman_sg_hair_node = psys_translator.export(ob, psys, hair_db_name)
+                            rman_sg_node.sg_node.AddChild(rman_sg_hair_node.sg_node) 
+                            self.rman_particles[hair_db_name] = rman_sg_hair_node
+                    elif psys.settings.type == 'EMITTER':
+                        psys_db_name = object_utils.get_db_name(ob, psys=psys)
+                        rman_sg_particles_node = self.rman_particles.get(psys_db_name, None)
+                        if psys.settings.render_type != 'OBJECT':
+                            if rman_sg_particles_node:
                                 psys_translator.update(ob, psys, rman_sg_particles_node)
+                            else:
+                                rman_sg_particles_node = psys_translator.export(ob, psys, psys_db_name)
+                                rman_sg_node.sg_node.AddChild(rman_sg_particles_node.sg_node)  
+                                self.rman_particles[psys_db_name] = rman_sg_particles_node 
+                        elif psys.settings.render_type == 'OBJECT':
+                            if rman_sg_particles_node:
+                                psys_translator.update(ob, psys, rman_sg_particles_node)          
+                            else:
+                                rman_sg_particles_node = psys_translator.export(ob, psys, psys_db_name)
+                                self.sg_scene.Root().AddChild(rman_sg_particles_node.sg_node)                                     
+                                self.rman_particles[psys_db_name] = rman_sg_particles_node     
 
-                                # For object instances, we need to loop through the depsgraph instances
-                                for ob_inst in self.depsgraph.object_instances:                                
-                                    if ob_inst.is_instance and ob_inst.instance_object == inst_ob and ob_inst.particle_system == psys:   
-                                        db_name = object_utils.get_db_name(inst_ob, rman_type=rman_type)          
-                                        if db_name == '':
-                                            continue
+                            inst_ob = psys.settings.instance_object 
+                            rman_group_translator = self.rman_translators['GROUP']
+                            psys_translator.update(ob, psys, rman_sg_particles_node)
 
-                                        rman_sg_node = self.rman_objects.get(db_name, None)           
-                                        if not rman_sg_node:
-                                            continue
-                                        group_db_name = object_utils.get_group_db_name(ob_inst)
+                            # For object instances, we need to loop through the depsgraph instances
+                            for ob_inst in self.depsgraph.object_instances:                                
+                                if ob_inst.is_instance and ob_inst.instance_object == inst_ob and ob_inst.particle_system == psys:   
+                                    db_name = object_utils.get_db_name(inst_ob, rman_type=rman_type)          
+                                    if db_name == '':
+                                        continue
 
-                                        rman_sg_group = rman_group_translator.export(ob, group_db_name)
-                                        rman_sg_group.sg_node.AddChild(rman_sg_node.sg_node)
-                                        rman_group_translator.update_transform(ob_inst, rman_sg_group)
+                                    rman_sg_node = self.rman_objects.get(db_name, None)           
+                                    if not rman_sg_node:
+                                        continue
+                                    group_db_name = object_utils.get_group_db_name(ob_inst)
 
-                                        psys_translator.add_object_instance(rman_sg_particles_node, rman_sg_group.sg_node) 
-            
-                                        # object attrs             
-                                        psys_translator.export_object_attributes(ob, rman_sg_group.sg_node) 
+                                    rman_sg_group = rman_group_translator.export(ob, group_db_name)
+                                    rman_sg_group.sg_node.AddChild(rman_sg_node.sg_node)
+                                    rman_group_translator.update_transform(ob_inst, rman_sg_group)
 
-                                        self.rman_objects[group_db_name] = rman_sg_group
-                                        rman_sg_node.instances[group_db_name] = rman_sg_group
-                                        self.attach_particle_material(psys, ob, inst_ob, rman_sg_group.sg_node)             
+                                    psys_translator.add_object_instance(rman_sg_particles_node, rman_sg_group.sg_node) 
+        
+                                    # object attrs             
+                                    psys_translator.export_object_attributes(ob, rman_sg_group.sg_node) 
+
+                                    self.rman_objects[group_db_name] = rman_sg_group
+                                    rman_sg_node.instances[group_db_name] = rman_sg_group
+                                    self.attach_particle_material(psys, ob, inst_ob, rman_sg_group.sg_node, group_db_name,
+                                                                  rman_sg_node=rman_sg_node)             
+
+    def queue_updates(self, depsgraph):
+        '''
+        Record what changed in this depsgraph update. Updates are coalesced by 
+        ID, so when they get processed, we only translate the latest state 
+        of each ID, no matter how many times it changed in between.
+
+        Args:
+            depsgraph (bpy.types.Depsgraph) - the depsgraph Blender passed to view_update
+        '''
+        for obj in depsgraph.updates:
+            ob = obj.id
+            kinds = set()
+            if isinstance(ob, bpy.types.Scene):
+                key = ('SCENE', object_utils.get_id_key(ob))
+            elif isinstance(ob, bpy.types.World):
+                key = ('WORLD', object_utils.get_id_key(ob))
+            elif isinstance(ob, bpy.types.Material):
+                key = ('MATERIAL', object_utils.get_id_key(ob))
+            elif isinstance(ob, bpy.types.Object):
+                key = ('OBJECT', object_utils.get_id_key(ob))
+                if obj.is_updated_geometry:
+                    kinds.add('GEOMETRY')
+                if obj.is_updated_transform:
+                    kinds.add('TRANSFORM')
+            else:
+                continue
+
+            if not self.pending_updates:
+                self.pending_updates_time = time.time()
+            self.pending_updates.setdefault(key, set()).update(kinds)
+
+    def _get_update_delay(self):
+        '''
+        Return how long, in seconds, we still need to wait before we 
+        can process the pending updates, given the edit latency and the 
+        max edit rate in the preferences.
+        '''
+        prefs = prefs_utils.get_addon_prefs()
+        due = self.pending_updates_time + prefs.rman_ipr_edit_latency
+        if prefs.rman_ipr_max_edit_rate > 0.0:
+            due = max(due, self.last_edit_time + (1.0 / prefs.rman_ipr_max_edit_rate))
+        return due - time.time()
+
+    def _update_timer_cb(self):
+        self.update_timer_registered = False
+        if not self.rman_render.rman_interactive_running or not self.pending_updates:
+            return None
+        try:
+            # We need a valid context and depsgraph to process the updates,
+            # so ask Blender to call view_update again
+            bl_engine = self.rman_render.bl_engine
+            bl_engine.tag_update()
+            bl_engine.tag_redraw()
+        except ReferenceError:
+            pass
+        return None
 
     def update_scene(self, context, depsgraph):
+        '''
+        Called from view_update during interactive rendering. The updates are 
+        queued, and processed once the edit latency has passed and we aren't 
+        going over the max edit rate. If it's too early, a timer will get
+        Blender to call us again when they're due.
+        '''
+        self.queue_updates(depsgraph)
+        if not self.pending_updates:
+            return
+
+        delay = self._get_update_delay()
+        if delay > 0.0:
+            if not self.update_timer_registered:
+                self.update_timer_registered = True
+                bpy.app.timers.register(self._update_timer_cb, first_interval=delay)
+            return
+
+        pending_updates = self.pending_updates
+        self.pending_updates = dict()
+        with self.rman.SGManager.ScopedEdit(self.sg_scene):
+            self._process_updates(context, depsgraph, pending_updates)
+        self.last_edit_time = time.time()
+
+    def _process_updates(self, context, depsgraph, pending_updates):
+        '''
+        Translate the coalesced updates. The caller is expected to have opened a 
+        ScopedEdit, so that all of the updates go to the renderer as one edit.
+
+        Args:
+            context (bpy.types.Context) - the current context
+            depsgraph (bpy.types.Depsgraph) - the current depsgraph
+            pending_updates (dict) - the updates from queue_updates()
+        '''
         new_objs = []
         new_cams = []
         self.depsgraph = depsgraph
         self.bl_scene = depsgraph.scene_eval
         do_delete = False
         delete_obs = []
-        for obj in depsgraph.updates:
-            ob = obj.id
-
-            if isinstance(obj.id, bpy.types.Scene):
-                self._scene_updated()
-                # here, we check if an object got deleted
-                # by looking at the selected objects
-                selected_obs = context.selected_objects
-                if selected_obs:
-                    for o in selected_obs:
-                        rman_type = object_utils._detect_primitive_(o)
-                        obj_key = object_utils.get_db_name(o, rman_type=rman_type)  
-                        self.current_ob.append(o.name_full)
-                        self.current_ob_db_name.append(obj_key)
-                else:
-                    if self.current_ob:
-                        for i,cur_ob in enumerate(self.current_ob):
-                            if not self.depsgraph.objects.get(cur_ob):
-                                delete_obs.append(self.current_ob_db_name[i])
-                                do_delete = True
-                    if not do_delete:
-                        self.current_ob = []
-                        self.current_ob_db_name = []
-
+        transform_updated_obs = []
+        self.instance_matrices = None
+
+        scene_updated = False
+        world_updated = False
+        updated_mats = []
+        updated_obs = []
+        depsgraph_obs = None
+        for (id_type, id_key), kinds in pending_updates.items():
+            if id_type == 'SCENE':
+                scene_updated = True
+            elif id_type == 'WORLD':
+                world_updated = True
+            elif id_type == 'MATERIAL':
+                mat = bpy.data.materials.get(id_key, None)
+                if mat:
+                    updated_mats.append(mat.evaluated_get(depsgraph))
+            else:
+                if depsgraph_obs is None:
+                    depsgraph_obs = dict([(object_utils.get_id_key(ob), ob) for ob in depsgraph.objects])
+                # the object may have been deleted since it was queued
+                ob = depsgraph_obs.get(id_key, None)
+                if ob:
+                    updated_obs.append((ob, kinds))
+
+        if scene_updated:
+            self._scene_updated()
+            # here, we check if any objects got deleted, by looking
+            # for the objects we translated that aren't in bpy.data
+            # anymore. Hidden objects are still there, so they don't 
+            # count as deleted
+            for obj_key, id_key in self.rman_object_ids.items():
+                if bpy.data.objects.get(id_key, None) is None:
+                    delete_obs.append(obj_key)
+                    do_delete = True
+
+        if world_updated and self.world_df_node:
+            self.export_displayfilters()
+
+        for mat in updated_mats:
+            rfb_log().debug("Material updated: %s" % mat.name)
+            self._material_updated(mat)
+
+        for ob, kinds in updated_obs:
+            rman_type = object_utils._detect_primitive_(ob)
+            obj_key = object_utils.get_db_name(ob, rman_type=rman_type)                                
+
+            if obj_key == "":
                 continue
 
-            elif isinstance(obj.id, bpy.types.World):
-                if self.world_df_node:
-                    with self.rman.SGManager.ScopedEdit(self.sg_scene): 
-                        self.export_displayfilters()
-
-            elif isinstance(obj.id, bpy.types.Camera):
-                #cam = obj.object
+            if obj_key not in self.rman_objects:
+                rfb_log().debug("New object added: %s" % ob.name)
+                if ob.type == 'CAMERA' and not self.is_viewport_render:
+                    new_cams.append(ob)
+                else:
+                    new_objs.append(ob)
                 continue
 
-            elif isinstance(obj.id, bpy.types.Material):
-                rfb_log().debug("Material updated: %s" % obj.id.name)
-                self._material_updated(obj)
-
-            elif isinstance(obj.id, bpy.types.Object):
+            if 'GEOMETRY' in kinds:
+                rfb_log().debug("Object updated: %s" % ob.name)
+                self._obj_geometry_updated(ob)                    
+                                      
+            if 'TRANSFORM' in kinds:
+                rfb_log().debug("Transform updated: %s" % ob.name)
+                transform_updated_obs.append(ob)
 
-                rman_type = object_utils._detect_primitive_(ob)
-                obj_key = object_utils.get_db_name(ob, rman_type=rman_type)                                
-
-                if obj_key == "":
-                    continue
-
-                if obj_key not in self.rman_objects:
-                    rfb_log().debug("New object added: %s" % obj.id.name)
-                    if ob.type == 'CAMERA' and not self.is_viewport_render:
-                        new_cams.append(obj.id)
-                    else:
-                        new_objs.append(obj.id)
-                    continue
-
-                if obj.is_updated_geometry:
-                    rfb_log().debug("Object updated: %s" % obj.id.name)
-                    self._obj_geometry_updated(obj)                    
-                                          
-                if obj.is_updated_transform:
-                    rfb_log().debug("Transform updated: %s" % obj.id.name)
-                    self._object_transform_updated(obj)
+        for ob in transform_updated_obs:
+            self._object_transform_updated(ob)
+        self.instance_matrices = None
 
         # there are new objects
         if new_objs:
-            with self.rman.SGManager.ScopedEdit(self.sg_scene): 
-                rfb_log().debug("Adding new objects:")
-                self.export_data_blocks(new_objs)
-                for new_obj in new_objs:
-                    for ob_inst in self.depsgraph.object_instances:
-                        if ob_inst and ob_inst.instance_object == new_obj:
-                            self._export_instance(ob_inst)
-                        elif ob_inst.object == new_obj:
-                            self._export_instance(ob_inst)
-
-                self.scene_any_lights = self._scene_has_lights()
-                if self.world_df_node and self.scene_any_lights:
-                    self.export_displayfilters()
+            rfb_log().debug("Adding new objects:")
+            self.export_data_blocks(new_objs)
+            for new_obj in new_objs:
+                for ob_inst in self.depsgraph.object_instances:
+                    if ob_inst and ob_inst.instance_object == new_obj:
+                        self._export_instance(ob_inst)
+                    elif ob_inst.object == new_obj:
+                        self._export_instance(ob_inst)
+                if new_obj.type == 'META':
+                    # add it to its family
+                    self._meta_object_updated(new_obj)
+
+            self.scene_any_lights = self._scene_has_lights()
+            if self.world_df_node and self.scene_any_lights:
+                self.export_displayfilters()
 
         # new cameras
         if new_cams and not self.is_viewport_render:
-            with self.rman.SGManager.ScopedEdit(self.sg_scene): 
-                rfb_log().debug("Adding new cameras:")
-                self.export_cameras(new_cams)         
+            rfb_log().debug("Adding new cameras:")
+            self.export_cameras(new_cams)         
 
         # delete any objects, if necessary    
         if do_delete:
             rfb_log().debug("Deleting objects")
-            with self.rman.SGManager.ScopedEdit(self.sg_scene):
-                for obj_key in delete_obs:
-                    rman_sg_node = self.rman_objects.get(obj_key, None)
-                    if not rman_sg_node:
-                        return
-                    for k,v in rman_sg_node.instances.items():
-                        if v.sg_node:
-                            self.sg_scene.DeleteDagNode(v.sg_node)
-                        self.rman_objects.pop(k)
-                    # For now, don't delete the geometry itself
-                    # self.sg_scene.DeleteDagNode(rman_sg_node.sg_node)
-                    self.rman_objects.pop(obj_key)    
-
-                self.scene_any_lights = self._scene_has_lights()     
-                if not self.scene_any_lights:
-                    self.export_displayfilters()
-
-            self.current_ob = []
-            self.current_ob_db_name = []       
+            for obj_key in delete_obs:
+                self.rman_object_ids.pop(obj_key, None)
+                rman_sg_node = self.rman_objects.get(obj_key, None)
+                if not rman_sg_node:
+                    continue
+                for k,v in rman_sg_node.instances.items():
+                    if v.sg_node:
+                        self.sg_scene.DeleteDagNode(v.sg_node)
+                    self.rman_objects.pop(k)
+                    self._unindex_group_materials(k)
+                # For now, don't delete the geometry itself
+                # self.sg_scene.DeleteDagNode(rman_sg_node.sg_node)
+                self.rman_objects.pop(obj_key)    
+                self._unindex_light(obj_key)
+
+            # and any instancers that used them
+            for instancer_db_name, (db_names, group_db_names) in list(self.rman_instancers.items()):
+                if not db_names.isdisjoint(delete_obs):
+                    self._remove_instancer(instancer_db_name)
+
+            self.scene_any_lights = self._scene_has_lights()     
+            if not self.scene_any_lights:
+                self.export_displayfilters()
         
     def update_cropwindow(self, cropwindow=None):
         if cropwindow:
@@ -1449,11 +2261,7 @@ class RmanScene(object):
                     
         with self.rman.SGManager.ScopedEdit(self.sg_scene):
             
-            for light_ob in [x for x in self.bl_scene.objects if object_utils._detect_primitive_(x) == 'LIGHT']:
-                db_name = object_utils.get_db_name(light_ob, rman_type='LIGHT')
-                rman_sg_node = self.rman_objects.get(db_name, None)
-                if not rman_sg_node:
-                    continue
+            for light_ob, rman_sg_node in self._get_light_objects(self.rman_lights.keys()):
                 if light_ob.data.renderman.solo:
                     rman_sg_node.sg_node.SetHidden(0)
                 else:
@@ -1466,9 +2274,5 @@ class RmanScene(object):
         self.scene_solo_light = self.bl_scene.renderman.solo_light
                     
         with self.rman.SGManager.ScopedEdit(self.sg_scene):                                         
-            for light_ob in [x for x in self.bl_scene.objects if object_utils._detect_primitive_(x) == 'LIGHT']:
-                db_name = object_utils.get_db_name(light_ob, rman_type='LIGHT')
-                rman_sg_node = self.rman_objects.get(db_name, None)
-                if not rman_sg_node:
-                    continue
+            for light_ob, rman_sg_node in self._get_light_objects(self.rman_lights.keys()):
                 rman_sg_node.sg_node.SetHidden(light_ob.data.renderman.mute)
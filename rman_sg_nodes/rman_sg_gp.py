@@ -1,10 +1,17 @@
 from .rman_sg_node import RmanSgNode
 
 class RmanSgGreaseP(RmanSgNode):
+    '''
+    Attributes:
+        layers (dict) - dictionary of layer names to their RmanSgGreasePLayer. Each
+                        layer is a child group of sg_node, so that layers can be
+                        updated on their own
+    '''
 
     def __init__(self, rman_scene, sg_node, db_name):
         super().__init__(rman_scene, sg_node, db_name)
         self.matrix_world = None
+        self.layers = dict()
 
     @property
     def matrix_world(self):
@@ -12,4 +19,35 @@ class RmanSgGreaseP(RmanSgNode):
 
     @matrix_world.setter
     def matrix_world(self, mtx):
-        self.__matrix_world = mtx  
\ No newline at end of file
+        self.__matrix_world = mtx  
+
+    @property
+    def layers(self):
+        return self.__layers
+
+    @layers.setter
+    def layers(self, layers):
+        self.__layers = layers
+
+class RmanSgGreasePLayer(RmanSgNode):
+    '''
+    One layer of a grease pencil object. sg_node is a group, that holds one
+    mesh, points or curves node for each of the materials used in the layer.
+
+    Attributes:
+        layer_hash (str) - hash of the stroke data of the layer, when it was last
+                           translated. If it hasn't changed, the layer doesn't need
+                           to be translated again
+    '''
+
+    def __init__(self, rman_scene, sg_node, db_name):
+        super().__init__(rman_scene, sg_node, db_name)
+        self.layer_hash = ''
+
+    @property
+    def layer_hash(self):
+        return self.__layer_hash
+
+    @layer_hash.setter
+    def layer_hash(self, layer_hash):
+        self.__layer_hash = layer_hash
@@ -12,6 +12,8 @@ class RmanSgMesh(RmanSgNode):
         self.subdiv_scheme = 'none'
         self.is_multi_material = False
         self.multi_material_children = []
+        self.multi_material_facesets = []
+        self.used_material_ids = None
 
     @property
     def matrix_world(self):
@@ -59,4 +61,20 @@ class RmanSgMesh(RmanSgNode):
 
     @subdiv_scheme.setter
     def subdiv_scheme(self, subdiv_scheme):
-        self.__subdiv_scheme = subdiv_scheme                                       
\ No newline at end of file
+        self.__subdiv_scheme = subdiv_scheme
+
+    @property
+    def multi_material_facesets(self):
+        return self.__multi_material_facesets
+
+    @multi_material_facesets.setter
+    def multi_material_facesets(self, multi_material_facesets):
+        self.__multi_material_facesets = multi_material_facesets
+
+    @property
+    def used_material_ids(self):
+        return self.__used_material_ids
+
+    @used_material_ids.setter
+    def used_material_ids(self, used_material_ids):
+        self.__used_material_ids = used_material_ids
@@ -9,6 +9,9 @@ class RmanSgNode(object):
         instances (dict) - instances that uses this sg_node
         motion_steps (list) - the full list of motion time samples that are required for this Blender object
         is_frame_sensitive (bool) - indicates that the sg_node should be updated on frame changes
+        primvar_sizes (dict) - size, in bytes, of the primvar payloads pushed to the scene graph
+                            for this node, keyed by primvar name. Time samples and child nodes 
+                            (ex: multi-material children) add to the entries.
  
     '''
     def __init__(self, rman_scene, sg_node, db_name):
@@ -27,6 +30,31 @@ class RmanSgNode(object):
         # in texture paths
         self.is_frame_sensitive = False
 
+        self.primvar_sizes = dict()
+
+    def add_primvar_size(self, name, data, item_size=4):
+        '''
+        Record the size of a primvar payload that was pushed to the scene graph.
+
+        Args:
+            name (str) - the primvar name
+            data (list) - the data that was pushed. Either a numpy array, or a flat list
+            item_size (int) - size in bytes of each item in data, when data is a list
+        '''
+        nbytes = getattr(data, 'nbytes', None)
+        if nbytes is None:
+            nbytes = len(data) * item_size
+        self.primvar_sizes[name] = self.primvar_sizes.get(name, 0) + nbytes
+
+    def clear_primvar_sizes(self):
+        self.primvar_sizes = dict()
+
+    def get_primvar_size(self):
+        '''
+        Return the total size, in bytes, of all of the primvar payloads of this node.
+        '''
+        return sum(self.primvar_sizes.values())
+
     @property
     def rman_scene(self):
         return self.__rman_scene
@@ -97,4 +125,12 @@ class RmanSgNode(object):
 
     @is_frame_sensitive.setter
     def is_frame_sensitive(self, is_frame_sensitive):
-        self.__is_frame_sensitive = is_frame_sensitive             
\ No newline at end of file
+        self.__is_frame_sensitive = is_frame_sensitive
+
+    @property
+    def primvar_sizes(self):
+        return self.__primvar_sizes
+
+    @primvar_sizes.setter
+    def primvar_sizes(self, primvar_sizes):
+        self.__primvar_sizes = primvar_sizes
@@ -492,14 +492,14 @@ def make_sphere(m):
             z0  = math.sin(lat0) * radius
             zr0 = math.cos(lat0) * radius
         
-            v.append(Vector(transform_utils.transform_points( m, [x*zr0, y*zr0, z0])))
+            v.append([x*zr0, y*zr0, z0])
 
         for i in range(0, lats+1):
             lat0 = math.pi * (-0.5 + float(i / lats))
             z0  = math.sin(lat0) * radius
             zr0 =  math.cos(lat0) * radius
          
-            v.append(Vector(transform_utils.transform_points( m, [-x*zr0, -y*zr0, z0])))   
+            v.append([-x*zr0, -y*zr0, z0])
 
     for i in range(0, lats+1):
         lat0 = math.pi * (-0.5 + float(i / lats))
@@ -511,9 +511,9 @@ def make_sphere(m):
             x = math.cos(lng)
             y = math.sin(lng)
             
-            v.append(Vector(transform_utils.transform_points( m, [x*zr0, y*zr0, z0])))
+            v.append([x*zr0, y*zr0, z0])
 
-    return v
+    return transform_utils.transform_points(m, v)
 
 def draw_rect_light(ob):
     _SHADER_.bind()
@@ -525,33 +525,25 @@ def draw_rect_light(ob):
     m = m @ Matrix.Rotation(math.radians(180.0), 4, 'Y')
     m = m @ Matrix.Rotation(math.radians(90.0), 4, 'Z')
 
-    box = []
-    for pt in s_rmanLightLogo['box']:
-        box.append( Vector(transform_utils.transform_points( m, pt)))
+    box = transform_utils.transform_points(m, s_rmanLightLogo['box'])
 
     box_indices = _get_indices(s_rmanLightLogo['box'])
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": box}, indices=box_indices)    
     batch.draw(_SHADER_)
 
-    arrow = []
-    for pt in s_rmanLightLogo['arrow']:
-        arrow.append( Vector(transform_utils.transform_points( m, pt)))   
+    arrow = transform_utils.transform_points(m, s_rmanLightLogo['arrow'])
 
     arrow_indices = _get_indices(s_rmanLightLogo['arrow'])
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": arrow}, indices=arrow_indices)    
     batch.draw(_SHADER_)
 
-    R_outside = []
-    for pt in s_rmanLightLogo['R_outside']:
-        R_outside.append( Vector(transform_utils.transform_points( m, pt)))
+    R_outside = transform_utils.transform_points(m, s_rmanLightLogo['R_outside'])
 
     R_outside_indices = _get_indices(s_rmanLightLogo['R_outside'])
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": R_outside}, indices=R_outside_indices)    
     batch.draw(_SHADER_)
   
-    R_inside = []
-    for pt in s_rmanLightLogo['R_inside']:
-        R_inside.append( Vector(transform_utils.transform_points( m, pt)))
+    R_inside = transform_utils.transform_points(m, s_rmanLightLogo['R_inside'])
 
     R_inside_indices = _get_indices(s_rmanLightLogo['R_inside'])
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": R_inside}, indices=R_inside_indices)    
@@ -568,17 +560,13 @@ def draw_sphere_light(ob):
     m = m @ Matrix.Rotation(math.radians(180.0), 4, 'Y')
     m = m @ Matrix.Rotation(math.radians(90.0), 4, 'Z')
 
-    R_outside = []
-    for pt in s_rmanLightLogo['R_outside']:
-        R_outside.append( Vector(transform_utils.transform_points( m, pt)))
+    R_outside = transform_utils.transform_points(m, s_rmanLightLogo['R_outside'])
 
     R_outside_indices = _get_indices(s_rmanLightLogo['R_outside'])
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": R_outside}, indices=R_outside_indices)    
     batch.draw(_SHADER_)
   
-    R_inside = []
-    for pt in s_rmanLightLogo['R_inside']:
-        R_inside.append( Vector(transform_utils.transform_points( m, pt)))
+    R_inside = transform_utils.transform_points(m, s_rmanLightLogo['R_inside'])
 
     R_inside_indices = _get_indices(s_rmanLightLogo['R_inside'])
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": R_inside}, indices=R_inside_indices)    
@@ -612,99 +600,77 @@ def draw_envday_light(ob):
     m = Matrix(ob_matrix)
     m = m @ Matrix.Rotation(math.radians(90.0), 4, 'X')
 
-    west_rr_shape = []
-    for pt in s_envday['west_rr_shape']:
-        west_rr_shape.append( Vector(transform_utils.transform_points( m, pt)))
+    west_rr_shape = transform_utils.transform_points(m, s_envday['west_rr_shape'])
 
     west_rr_indices = _get_indices(s_envday['west_rr_shape'])
 
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": west_rr_shape}, indices=west_rr_indices)    
     batch.draw(_SHADER_)
 
-    east_rr_shape = []
-    for pt in s_envday['east_rr_shape']:
-        east_rr_shape.append( Vector(transform_utils.transform_points( m, pt)))
+    east_rr_shape = transform_utils.transform_points(m, s_envday['east_rr_shape'])
 
     east_rr_indices = _get_indices(s_envday['east_rr_shape'])
 
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": east_rr_shape}, indices=east_rr_indices)    
     batch.draw(_SHADER_)   
 
-    south_rr_shape = []
-    for pt in s_envday['south_rr_shape']:
-        south_rr_shape.append( Vector(transform_utils.transform_points( m, pt)))
+    south_rr_shape = transform_utils.transform_points(m, s_envday['south_rr_shape'])
 
     south_rr_indices = _get_indices(s_envday['south_rr_shape'])
 
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": south_rr_shape}, indices=south_rr_indices)    
     batch.draw(_SHADER_)  
 
-    north_rr_shape = []
-    for pt in s_envday['north_rr_shape']:
-        north_rr_shape.append( Vector(transform_utils.transform_points( m, pt)))
+    north_rr_shape = transform_utils.transform_points(m, s_envday['north_rr_shape'])
 
     north_rr_indices = _get_indices(s_envday['north_rr_shape'])
 
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": north_rr_shape}, indices=north_rr_indices)    
     batch.draw(_SHADER_)             
 
-    inner_circle_rr_shape = []
-    for pt in s_envday['inner_circle_rr_shape']:
-        inner_circle_rr_shape.append( Vector(transform_utils.transform_points( m, pt)))
+    inner_circle_rr_shape = transform_utils.transform_points(m, s_envday['inner_circle_rr_shape'])
 
     inner_circle_rr_shape_indices = _get_indices(s_envday['inner_circle_rr_shape'])
 
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": inner_circle_rr_shape}, indices=inner_circle_rr_shape_indices)    
     batch.draw(_SHADER_)   
 
-    outer_circle_rr_shape = []
-    for pt in s_envday['outer_circle_rr_shape']:
-        outer_circle_rr_shape.append( Vector(transform_utils.transform_points( m, pt)))
+    outer_circle_rr_shape = transform_utils.transform_points(m, s_envday['outer_circle_rr_shape'])
 
     outer_circle_rr_shape_indices = _get_indices(s_envday['outer_circle_rr_shape'])
 
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": outer_circle_rr_shape}, indices=outer_circle_rr_shape_indices)    
     batch.draw(_SHADER_)  
 
-    compass_shape = []
-    for pt in s_envday['compass_shape']:
-        compass_shape.append( Vector(transform_utils.transform_points( m, pt)))
+    compass_shape = transform_utils.transform_points(m, s_envday['compass_shape'])
 
     compass_shape_indices = _get_indices(s_envday['compass_shape'])
 
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": compass_shape}, indices=compass_shape_indices)    
     batch.draw(_SHADER_)    
 
-    east_arrow_shape = []
-    for pt in s_envday['east_arrow_shape']:
-        east_arrow_shape.append( Vector(transform_utils.transform_points( m, pt)))
+    east_arrow_shape = transform_utils.transform_points(m, s_envday['east_arrow_shape'])
 
     east_arrow_shape_indices = _get_indices(s_envday['east_arrow_shape'])
 
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": east_arrow_shape}, indices=east_arrow_shape_indices)    
     batch.draw(_SHADER_)      
 
-    west_arrow_shape = []
-    for pt in s_envday['west_arrow_shape']:
-        west_arrow_shape.append( Vector(transform_utils.transform_points( m, pt)))
+    west_arrow_shape = transform_utils.transform_points(m, s_envday['west_arrow_shape'])
 
     west_arrow_shape_indices = _get_indices(s_envday['west_arrow_shape'])
 
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": west_arrow_shape}, indices=west_arrow_shape_indices)    
     batch.draw(_SHADER_)         
 
-    north_arrow_shape = []
-    for pt in s_envday['north_arrow_shape']:
-        north_arrow_shape.append( Vector(transform_utils.transform_points( m, pt)))
+    north_arrow_shape = transform_utils.transform_points(m, s_envday['north_arrow_shape'])
 
     north_arrow_shape_indices = _get_indices(s_envday['north_arrow_shape'])
 
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": north_arrow_shape}, indices=north_arrow_shape_indices)    
     batch.draw(_SHADER_)         
 
-    south_arrow_shape = []
-    for pt in s_envday['south_arrow_shape']:
-        south_arrow_shape.append( Vector(transform_utils.transform_points( m, pt)))
+    south_arrow_shape = transform_utils.transform_points(m, s_envday['south_arrow_shape'])
 
     south_arrow_shape_indices = _get_indices(s_envday['south_arrow_shape'])
 
@@ -730,9 +696,7 @@ def draw_envday_light(ob):
         else:
             sphere_indices.append((i, i+1))    
 
-    sphere_shape = []
-    for pt in sphere:
-        sphere_shape.append(Vector(transform_utils.transform_points( translate, pt)))
+    sphere_shape = transform_utils.transform_points(translate, sphere)
  
 
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": sphere_shape}, indices=sphere_indices)    
@@ -751,33 +715,25 @@ def draw_disk_light(ob):
     m = m @ Matrix.Rotation(math.radians(180.0), 4, 'Y')
     m = m @ Matrix.Rotation(math.radians(90.0), 4, 'Z')
 
-    disk = []
-    for pt in s_diskLight:
-        disk.append( Vector(transform_utils.transform_points( m, pt)))
+    disk = transform_utils.transform_points(m, s_diskLight)
 
     disk_indices = _get_indices(s_diskLight)
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": disk}, indices=disk_indices)    
     batch.draw(_SHADER_)
 
-    arrow = []
-    for pt in s_rmanLightLogo['arrow']:
-        arrow.append( Vector(transform_utils.transform_points( m, pt)))   
+    arrow = transform_utils.transform_points(m, s_rmanLightLogo['arrow'])
 
     arrow_indices = _get_indices(s_rmanLightLogo['arrow'])
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": arrow}, indices=arrow_indices)    
     batch.draw(_SHADER_)
 
-    R_outside = []
-    for pt in s_rmanLightLogo['R_outside']:
-        R_outside.append( Vector(transform_utils.transform_points( m, pt)))
+    R_outside = transform_utils.transform_points(m, s_rmanLightLogo['R_outside'])
 
     R_outside_indices = _get_indices(s_rmanLightLogo['R_outside'])
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": R_outside}, indices=R_outside_indices)    
     batch.draw(_SHADER_)
   
-    R_inside = []
-    for pt in s_rmanLightLogo['R_inside']:
-        R_inside.append( Vector(transform_utils.transform_points( m, pt)))
+    R_inside = transform_utils.transform_points(m, s_rmanLightLogo['R_inside'])
 
     R_inside_indices = _get_indices(s_rmanLightLogo['R_inside'])
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": R_inside}, indices=R_inside_indices)    
@@ -795,49 +751,37 @@ def draw_dist_light(ob):
     m = m @ Matrix.Rotation(math.radians(180.0), 4, 'Y')
     m = m @ Matrix.Rotation(math.radians(90.0), 4, 'Z')     
 
-    disk = []
-    for pt in s_diskLight:
-        disk.append( Vector(transform_utils.transform_points( m, pt)))
+    disk = transform_utils.transform_points(m, s_diskLight)
 
     disk_indices = _get_indices(s_diskLight)
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": disk}, indices=disk_indices)    
     batch.draw(_SHADER_)    
 
-    arrow1 = []
-    for pt in s_distantLight['arrow1']:
-        arrow1.append( Vector(transform_utils.transform_points( m, pt)))   
+    arrow1 = transform_utils.transform_points(m, s_distantLight['arrow1'])
 
     arrow1_indices = _get_indices(s_distantLight['arrow1'])
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": arrow1}, indices=arrow1_indices)    
     batch.draw(_SHADER_)    
 
-    arrow2 = []
-    for pt in s_distantLight['arrow2']:
-        arrow2.append( Vector(transform_utils.transform_points( m, pt)))   
+    arrow2 = transform_utils.transform_points(m, s_distantLight['arrow2'])
 
     arrow2_indices = _get_indices(s_distantLight['arrow2'])
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": arrow2}, indices=arrow2_indices)    
     batch.draw(_SHADER_) 
 
-    arrow3 = []
-    for pt in s_distantLight['arrow3']:
-        arrow3.append( Vector(transform_utils.transform_points( m, pt)))   
+    arrow3 = transform_utils.transform_points(m, s_distantLight['arrow3'])
 
     arrow3_indices = _get_indices(s_distantLight['arrow3'])
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": arrow3}, indices=arrow3_indices)    
     batch.draw(_SHADER_)         
 
-    R_outside = []
-    for pt in s_rmanLightLogo['R_outside']:
-        R_outside.append( Vector(transform_utils.transform_points( m, pt)))
+    R_outside = transform_utils.transform_points(m, s_rmanLightLogo['R_outside'])
 
     R_outside_indices = _get_indices(s_rmanLightLogo['R_outside'])
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": R_outside}, indices=R_outside_indices)    
     batch.draw(_SHADER_)
   
-    R_inside = []
-    for pt in s_rmanLightLogo['R_inside']:
-        R_inside.append( Vector(transform_utils.transform_points( m, pt)))
+    R_inside = transform_utils.transform_points(m, s_rmanLightLogo['R_inside'])
 
     R_inside_indices = _get_indices(s_rmanLightLogo['R_inside'])
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": R_inside}, indices=R_inside_indices)    
@@ -853,17 +797,13 @@ def draw_portal_light(ob):
     m = m @ Matrix.Rotation(math.radians(180.0), 4, 'Y')
     m = m @ Matrix.Rotation(math.radians(90.0), 4, 'Z')
 
-    R_outside = []
-    for pt in s_rmanLightLogo['R_outside']:
-        R_outside.append( Vector(transform_utils.transform_points( m, pt)))
+    R_outside = transform_utils.transform_points(m, s_rmanLightLogo['R_outside'])
 
     R_outside_indices = _get_indices(s_rmanLightLogo['R_outside'])
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": R_outside}, indices=R_outside_indices)    
     batch.draw(_SHADER_)
   
-    R_inside = []
-    for pt in s_rmanLightLogo['R_inside']:
-        R_inside.append( Vector(transform_utils.transform_points( m, pt)))
+    R_inside = transform_utils.transform_points(m, s_rmanLightLogo['R_inside'])
 
     R_inside_indices = _get_indices(s_rmanLightLogo['R_inside'])
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": R_inside}, indices=R_inside_indices)    
@@ -872,9 +812,7 @@ def draw_portal_light(ob):
     m = Matrix(ob.matrix_world)
     m = m @ Matrix.Rotation(math.radians(90.0), 4, 'X')
     m = m @ Matrix.Scale(0.5, 4)
-    rays = []
-    for pt in s_portalRays:
-        rays.append( Vector(transform_utils.transform_points( m, pt)))   
+    rays = transform_utils.transform_points(m, s_portalRays)
 
     rays_indices = _get_indices(s_portalRays)
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": rays}, indices=rays_indices)    
@@ -893,17 +831,13 @@ def draw_dome_light(ob):
     m = Matrix.Rotation(angle, 4, axis)
     m = m @ Matrix.Scale(100, 4)
 
-    R_outside = []
-    for pt in s_rmanLightLogo['R_outside']:
-        R_outside.append( Vector(transform_utils.transform_points( m, pt)))
+    R_outside = transform_utils.transform_points(m, s_rmanLightLogo['R_outside'])
 
     R_outside_indices = _get_indices(s_rmanLightLogo['R_outside'])
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": R_outside}, indices=R_outside_indices)    
     batch.draw(_SHADER_)
   
-    R_inside = []
-    for pt in s_rmanLightLogo['R_inside']:
-        R_inside.append( Vector(transform_utils.transform_points( m, pt)))
+    R_inside = transform_utils.transform_points(m, s_rmanLightLogo['R_inside'])
 
     R_inside_indices = _get_indices(s_rmanLightLogo['R_inside'])
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": R_inside}, indices=R_inside_indices)    
@@ -929,9 +863,7 @@ def draw_cylinder_light(ob):
 
     m = Matrix(ob.matrix_world)
 
-    cylinder = []
-    for pt in s_cylinderLight['vtx']:
-        cylinder.append( Vector(transform_utils.transform_points( m, pt)))
+    cylinder = transform_utils.transform_points(m, s_cylinderLight['vtx'])
 
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": cylinder}, indices=s_cylinderLight['indices'])    
     batch.draw(_SHADER_)  
@@ -972,18 +904,14 @@ def draw_rounded_rectangles( left, right,
     draw_arc(a, b, 10, 3, right, -bottom, pts)
 
     translate = m #Matrix.Translation( Vector([0,0, zOffset1])) @ m
-    shape_pts = []
-    for pt in pts:
-        shape_pts.append( Vector(transform_utils.transform_points( translate, pt)))
+    shape_pts = transform_utils.transform_points(translate, pts)
     shape_pts_indices = _get_indices(shape_pts)
 
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": shape_pts}, indices=shape_pts_indices)    
     batch.draw(_SHADER_)  
 
-    shape_pts = []
     translate = m #Matrix.Translation( Vector([0,0, zOffset2])) @ m
-    for pt in pts:
-        shape_pts.append( Vector(transform_utils.transform_points( translate, pt)))
+    shape_pts = transform_utils.transform_points(translate, pts)
     shape_pts_indices = _get_indices(shape_pts)
 
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": shape_pts}, indices=shape_pts_indices)    
@@ -1136,27 +1064,21 @@ def draw_ramp_light_filter(ob):
         # begin
         begin_m = m @ Matrix.Scale(begin, 4)      
 
-        disk = []
-        for pt in s_diskLight:
-            disk.append( Vector(transform_utils.transform_points( begin_m, pt)))
+        disk = transform_utils.transform_points(begin_m, s_diskLight)
 
         disk_indices = _get_indices(s_diskLight)
         batch = batch_for_shader(_SHADER_, 'LINES', {"pos": disk}, indices=disk_indices)    
         batch.draw(_SHADER_)
 
         m2 = begin_m @ Matrix.Rotation(math.radians(90.0), 4, 'Y')
-        disk = []
-        for pt in s_diskLight:
-            disk.append( Vector(transform_utils.transform_points( m2, pt)))
+        disk = transform_utils.transform_points(m2, s_diskLight)
 
         disk_indices = _get_indices(s_diskLight)
         batch = batch_for_shader(_SHADER_, 'LINES', {"pos": disk}, indices=disk_indices)    
         batch.draw(_SHADER_)
 
         m3 = begin_m @ Matrix.Rotation(math.radians(90.0), 4, 'X')
-        disk = []
-        for pt in s_diskLight:
-            disk.append( Vector(transform_utils.transform_points( m3, pt)))
+        disk = transform_utils.transform_points(m3, s_diskLight)
 
         disk_indices = _get_indices(s_diskLight)
         batch = batch_for_shader(_SHADER_, 'LINES', {"pos": disk}, indices=disk_indices)    
@@ -1165,27 +1087,21 @@ def draw_ramp_light_filter(ob):
         # end
         end_m = m @ Matrix.Scale(end, 4)      
 
-        disk = []
-        for pt in s_diskLight:
-            disk.append( Vector(transform_utils.transform_points( end_m, pt)))
+        disk = transform_utils.transform_points(end_m, s_diskLight)
 
         disk_indices = _get_indices(s_diskLight)
         batch = batch_for_shader(_SHADER_, 'LINES', {"pos": disk}, indices=disk_indices)    
         batch.draw(_SHADER_)
 
         m2 = end_m @ Matrix.Rotation(math.radians(90.0), 4, 'Y')
-        disk = []
-        for pt in s_diskLight:
-            disk.append( Vector(transform_utils.transform_points( m2, pt)))
+        disk = transform_utils.transform_points(m2, s_diskLight)
 
         disk_indices = _get_indices(s_diskLight)
         batch = batch_for_shader(_SHADER_, 'LINES', {"pos": disk}, indices=disk_indices)    
         batch.draw(_SHADER_)
 
         m3 = end_m @ Matrix.Rotation(math.radians(90.0), 4, 'X')
-        disk = []
-        for pt in s_diskLight:
-            disk.append( Vector(transform_utils.transform_points( m3, pt)))
+        disk = transform_utils.transform_points(m3, s_diskLight)
 
         disk_indices = _get_indices(s_diskLight)
         batch = batch_for_shader(_SHADER_, 'LINES', {"pos": disk}, indices=disk_indices)    
@@ -1199,9 +1115,7 @@ def draw_ramp_light_filter(ob):
         m = m @ Matrix.Rotation(math.radians(180.0), 4, 'Y')
         m = m @ Matrix.Rotation(math.radians(90.0), 4, 'Z')
 
-        box = []
-        for pt in s_rmanLightLogo['box']:
-            box.append( Vector(transform_utils.transform_points( m, pt)))        
+        box = transform_utils.transform_points(m, s_rmanLightLogo['box'])
         n = mathutils.geometry.normal(box)
         n.normalize()
         box1 = []
@@ -1236,9 +1150,7 @@ def draw_ramp_light_filter(ob):
         if begin > 0.0:
             m1 = m @ Matrix.Scale(begin, 4)      
 
-            disk = []
-            for pt in s_diskLight:
-                disk.append( Vector(transform_utils.transform_points( m1, pt)))
+            disk = transform_utils.transform_points(m1, s_diskLight)
 
             disk_indices = _get_indices(s_diskLight)
             batch = batch_for_shader(_SHADER_, 'LINES', {"pos": disk}, indices=disk_indices)    
@@ -1247,9 +1159,7 @@ def draw_ramp_light_filter(ob):
 
         m2 = m @ Matrix.Scale(end, 4)      
 
-        disk = []
-        for pt in s_diskLight:
-            disk.append( Vector(transform_utils.transform_points( m2, pt)))
+        disk = transform_utils.transform_points(m2, s_diskLight)
 
         disk_indices = _get_indices(s_diskLight)
         batch = batch_for_shader(_SHADER_, 'LINES', {"pos": disk}, indices=disk_indices)    
@@ -1283,9 +1193,7 @@ def draw_barn_light_filter(ob, parents):
     m = m @ Matrix.Rotation(math.radians(180.0), 4, 'Y')
     m = m @ Matrix.Rotation(math.radians(90.0), 4, 'Z')
 
-    box = []
-    for pt in s_rmanLightLogo['box']:
-        box.append( Vector(transform_utils.transform_points( m, pt)))
+    box = transform_utils.transform_points(m, s_rmanLightLogo['box'])
 
     box_indices = _get_indices(s_rmanLightLogo['box'])
     batch = batch_for_shader(_SHADER_, 'LINES', {"pos": box}, indices=box_indices)    
@@ -0,0 +1,53 @@
+from ..rfb_logger import rfb_log
+import os
+import re
+
+def get_archive_filename(db_name, ext='rib'):
+    '''
+    Return a file name for the archive of this data block, with any
+    characters that aren't safe in file names replaced.
+
+    Args:
+        db_name (str) - unique datablock name
+        ext (str) - file extension
+
+    Returns:
+        (str) - the file name
+    '''
+    return '%s.%s' % (re.sub(r'[^\w\-\.]', '_', db_name), ext)
+
+def write_archive(sgmngr, sg_scene, archive_path, rib_options=''):
+    '''
+    Write a scene to a RIB archive, and delete the scene. This happens on the 
+    calling thread, as soon as the scene is handed over, so only one archive scene 
+    is ever in memory, on top of the main scene. RixSG isn't documented as safe to 
+    use from more than one thread at a time.
+
+    Args:
+        sgmngr (SGManager) - scene graph manager the scene was created with
+        sg_scene (RixSGScene) - the scene to write
+        archive_path (str) - path of the archive
+        rib_options (str) - RIB format options
+
+    Returns:
+        (bool) - whether the archive was written
+    '''
+    try:
+        sg_scene.Render("rib %s -archive %s" % (archive_path, rib_options))
+    except Exception as e:
+        rfb_log().error("Could not write archive %s: %s" % (archive_path, str(e)))
+        return False
+    finally:
+        sgmngr.DeleteScene(sg_scene)
+    return True
+
+def remove_archives(archive_paths):
+    '''
+    Remove archive files that are no longer needed.
+    '''
+    for path in archive_paths:
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            rfb_log().warning("Could not remove archive %s: %s" % (path, str(e)))
@@ -1,11 +1,26 @@
 import bpy
 import numpy as np
 
+def get_id_key(bl_id):
+    '''
+    Return a key that identifies this ID, and that can be used to look it up
+    again in bpy.data. name_full can't be used for that, because for IDs from a
+    library it includes the name of the library, which bpy.data won't match.
+
+    Args:
+        bl_id (bpy.types.ID) - the ID, original or evaluated
+
+    Returns:
+        (tuple) - (name, library filepath). The filepath is None for local IDs
+    '''
+    lib = bl_id.original.library
+    return (bl_id.name, lib.filepath if lib else None)
+
 def get_db_name(ob, rman_type='', psys=None):
     db_name = ''    
 
     if psys:
-        '%s|%s-%s' % (ob.name_full, psys.name, psys.settings.type)
+        db_name = '%s|%s-%s' % (ob.name_full, psys.name, psys.settings.type)
 
     elif rman_type != '' and rman_type != 'NONE':
         if rman_type == 'META':
@@ -76,6 +91,31 @@ def is_subd_displace_last(ob):
     return (ob.modifiers[len(ob.modifiers) - 2].type == 'SUBSURF' and
             ob.modifiers[len(ob.modifiers) - 1].type == 'DISPLACE')
 
+def get_subd_modifiers(ob):
+    '''
+    Return the trailing modifiers that RenderMan can handle itself, i.e.: a
+    SUBSURF modifier, or a SUBSURF followed by a DISPLACE. The SUBSURF
+    modifier is always first in the returned list.
+    '''
+    if is_subd_last(ob):
+        return [ob.modifiers[len(ob.modifiers) - 1]]
+    if is_subd_displace_last(ob):
+        return [ob.modifiers[len(ob.modifiers) - 2], ob.modifiers[len(ob.modifiers) - 1]]
+    return []
+
+def get_subd_scheme(ob):
+    '''
+    Return the RenderMan subdivision scheme for this object. An explicit
+    scheme on the mesh wins, otherwise it's derived from the SUBSURF modifier.
+    '''
+    scheme = ob.data.renderman.rman_subdiv_scheme
+    if scheme != 'none':
+        return scheme
+    subd_mods = get_subd_modifiers(ob)
+    if subd_mods and subd_mods[0].subdivision_type == 'SIMPLE':
+        return 'bilinear'
+    return 'catmull-clark'
+
 def is_smoke(ob):
     for mod in ob.modifiers:
         if mod.type == "SMOKE" and mod.domain_settings:
@@ -119,6 +159,61 @@ def _is_deforming_(ob):
 
     return is_deforming_fluid(ob)
 
+__TRANSFORM_PATHS__ = ['location', 'rotation_euler', 'rotation_quaternion', 'rotation_axis_angle',
+                        'scale', 'delta_location', 'delta_rotation_euler', 'delta_rotation_quaternion',
+                        'delta_scale']
+
+def is_static_geometry(ob):
+    '''
+    Whether the object space geometry of this mesh stays the same over the
+    frame range. The object itself is still allowed to move. Anything we
+    can't be sure about (drivers, modifiers other than subdivision, shape keys,
+    particles, animated mesh data) is considered animated.
+
+    Meshes with more than one material are also left out, since their face sets
+    need the materials from the main scene, which aren't there when the
+    archives get written.
+    '''
+    if ob.type != 'MESH' or _detect_primitive_(ob) != 'MESH':
+        return False
+    if ob.particle_systems or is_smoke(ob):
+        return False
+
+    subd_mods = get_subd_modifiers(ob)
+    for mod in ob.modifiers:
+        if mod not in subd_mods:
+            return False
+
+    if ob.data.shape_keys or ob.data.animation_data:
+        return False
+
+    mesh = ob.data
+    if len(mesh.materials) > 1 and len(mesh.polygons) > 0:
+        material_ids = np.zeros(len(mesh.polygons), dtype=np.int32)
+        mesh.polygons.foreach_get('material_index', material_ids)
+        if np.any(material_ids != material_ids[0]):
+            return False
+
+    anim = ob.animation_data
+    if anim:
+        if anim.drivers:
+            return False
+        if anim.action:
+            for fcurve in anim.action.fcurves:
+                if fcurve.data_path not in __TRANSFORM_PATHS__:
+                    return False
+    return True
+
+def get_local_bounds(ob):
+    '''
+    Return the object space bounding box of this object, as 
+    (xmin, xmax, ymin, ymax, zmin, zmax)
+    '''
+    xs = [v[0] for v in ob.bound_box]
+    ys = [v[1] for v in ob.bound_box]
+    zs = [v[2] for v in ob.bound_box]
+    return (min(xs), max(xs), min(ys), max(ys), min(zs), max(zs))
+
 def is_transforming(ob, recurse=False):
     transforming = (ob.animation_data is not None)
     if not transforming and ob.parent:
@@ -169,19 +264,36 @@ def _detect_primitive_(ob):
     else:
         return rm.primitive    
 
-def _get_used_materials_(ob):
+def _get_used_material_ids_(material_ids):
+    '''
+    Return the material indices in material_ids (the material index of 
+    each face), in the order they first appear.
+    '''
+    mat_ids, first = np.unique(material_ids, return_index=True)
+    return mat_ids[np.argsort(first)].tolist()
+
+def _get_used_materials_(ob, used_material_ids=None):
+    '''
+    Return the materials used by this object.
+
+    Args:
+        ob (bpy.types.Object) - the evaluated object
+        used_material_ids (list) - material indices used by the faces of the mesh, 
+                                   if we already know them. See RmanSgMesh.used_material_ids
+
+    Returns:
+        (list) - list of bpy.types.Material
+    '''
     if ob.type == 'MESH' and len(ob.data.materials) > 0:
         if len(ob.data.materials) == 1:
             return [ob.data.materials[0]]
-        mat_ids = []
         mesh = ob.data
-        num_materials = len(ob.data.materials)
-        for p in mesh.polygons:
-            if p.material_index not in mat_ids:
-                mat_ids.append(p.material_index)
-            if num_materials == len(mat_ids):
-                break
-        return [mesh.materials[i] for i in mat_ids]
+        if used_material_ids is None:
+            material_ids = np.zeros(len(mesh.polygons), dtype=np.int32)
+            mesh.polygons.foreach_get('material_index', material_ids)
+            used_material_ids = _get_used_material_ids_(material_ids)
+        num_materials = len(mesh.materials)
+        return [mesh.materials[i] for i in used_material_ids if i < num_materials]
     else:
         return [ob.active_material]     
 
@@ -190,23 +302,73 @@ def _get_mesh_points_(mesh):
     P = np.zeros(nvertices*3, dtype=np.float32)
     mesh.vertices.foreach_get('co', P)
     P = np.reshape(P, (nvertices, 3))
-    return P.tolist()
+    return P
 
 def _get_mesh_(mesh, get_normals=False):
 
     P = _get_mesh_points_(mesh)
-    nverts = []
-    verts = []
-    N = []    
-
-    for p in mesh.polygons:
-        nverts.append(p.loop_total)
-        verts.extend(p.vertices)
-        if get_normals:
-            if p.use_smooth:
-                for vi in p.vertices:
-                    N.extend(mesh.vertices[vi].normal)
-            else:
-                N.extend(list(p.normal) * p.loop_total)
+    N = []
+
+    npolygons = len(mesh.polygons)
+    nverts = np.zeros(npolygons, dtype=np.int32)
+    mesh.polygons.foreach_get('loop_total', nverts)
+
+    nloops = len(mesh.loops)
+    verts = np.zeros(nloops, dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', verts)
+
+    if get_normals:
+        # split normals already account for flat shaded polygons,
+        # so we can grab them for every corner in one call
+        mesh.calc_normals_split()
+        N = np.zeros(nloops*3, dtype=np.float32)
+        mesh.loops.foreach_get('normal', N)
+        N = np.reshape(N, (nloops, 3))
+
+    return (nverts, verts, P, N)
+
+def get_subd_cage(ob):
+    '''
+    Return the base cage of a mesh whose only modifier is a SUBSURF, which
+    RenderMan can do itself. The cage is the original mesh, before any modifiers,
+    so we can read it without turning the modifier off.
+
+    A SUBSURF followed by a DISPLACE doesn't get a cage: we don't translate the 
+    DISPLACE modifier, so the cage would silently lose the displacement. Those 
+    meshes use the evaluated mesh instead.
+
+    Returns:
+        (bpy.types.Mesh) - the cage, or None if the mesh has other modifiers or
+                           shape keys, and the evaluated mesh has to be used
+    '''
+    if len(ob.modifiers) != 1 or not is_subd_last(ob):
+        return None
+    subsurf = ob.modifiers[0]
+    if not subsurf.show_render or subsurf.render_levels == 0:
+        return None
+    mesh = ob.original.data
+    if mesh.shape_keys:
+        return None
+    return mesh
+
+def _get_evaluated_mesh_(ob, subd_cage=False):
+    '''
+    Return the mesh to export for this evaluated object. If the object is a plain
+    mesh, with no modifiers and no shape keys, we can use its data directly 
+    and skip the to_mesh() copy.
+
+    Args:
+        ob (bpy.types.Object) - the evaluated object
+        subd_cage (bool) - use the base cage of meshes with trailing subdivision
+                           modifiers, if we can. See get_subd_cage()
 
-    return (nverts, verts, P, N)
\ No newline at end of file
+    Returns:
+        (tuple) - the mesh, and whether it needs to be freed with to_mesh_clear()
+    '''
+    if ob.type == 'MESH' and not ob.modifiers and not ob.data.shape_keys:
+        return (ob.data, False)
+    if subd_cage and ob.type == 'MESH' and is_subdmesh(ob):
+        cage = get_subd_cage(ob)
+        if cage is not None:
+            return (cage, False)
+    return (ob.to_mesh(), True)
@@ -0,0 +1,227 @@
+from ..rfb_logger import rfb_log
+from . import prefs_utils
+import os
+import time
+import json
+import threading
+import bpy
+
+__RFB_PROFILER__ = None
+
+class RmanProfileSpan(object):
+    '''
+    Context manager that times a span of work, and records it with the
+    profiler when it exits.
+    '''
+
+    def __init__(self, profiler, name, category, args):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.add_span(self.name, self.category, self.start, time.perf_counter(), self.args)
+        return False
+
+class RmanNullSpan(object):
+    '''
+    Span used when profiling is off. Does nothing.
+    '''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+__NULL_SPAN__ = RmanNullSpan()
+
+class RmanProfiler(object):
+    '''
+    Records nested spans of work during scene translation, and writes them out as
+    a Chrome trace (which can be loaded in chrome://tracing or Perfetto), along
+    with a summary table of counts and cumulative times per category.
+
+    Attributes:
+        label (str) - what is being profiled, ex: the render type
+        start (float) - when profiling started
+        events (list) - Chrome trace events, one per span
+        stats (dict) - dictionary of category to [count, total time in seconds]
+        slowest (list) - the slowest spans that aren't phases, as (time, category, name)
+    '''
+
+    def __init__(self, label):
+        self.label = label
+        self.start = time.perf_counter()
+        self.events = []
+        self.stats = dict()
+        self.slowest = []
+        self.pid = os.getpid()
+
+    def add_span(self, name, category, start, end, args):
+        duration = end - start
+        event = {'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': (start - self.start) * 1000000.0,
+                'dur': duration * 1000000.0,
+                'pid': self.pid,
+                'tid': threading.get_ident()
+                }
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+        stat = self.stats.get(category, None)
+        if stat is None:
+            stat = [0, 0.0]
+            self.stats[category] = stat
+        stat[0] += 1
+        stat[1] += duration
+
+        if category != 'phase':
+            self.slowest.append((duration, category, name))
+
+    def get_summary(self, num_slowest=20):
+        '''
+        Return the summary table as a string.
+
+        Args:
+            num_slowest (int) - number of the slowest spans to list
+
+        Returns:
+            (str) - the summary table
+        '''
+        total = time.perf_counter() - self.start
+        lines = []
+        lines.append('RenderMan export profile: %s (%.3f s)' % (self.label, total))
+        lines.append('%-40s %10s %12s %12s' % ('Category', 'Count', 'Total (ms)', 'Avg (ms)'))
+        for category, (count, cum_time) in sorted(self.stats.items(), key=lambda x: x[1][1], reverse=True):
+            lines.append('%-40s %10d %12.3f %12.3f' % (category, count, cum_time * 1000.0, (cum_time / count) * 1000.0))
+
+        if self.slowest:
+            lines.append('')
+            lines.append('Slowest:')
+            for duration, category, name in sorted(self.slowest, reverse=True)[:num_slowest]:
+                lines.append('%-40s %-20s %12.3f' % (name, category, duration * 1000.0))
+        return '\n'.join(lines)
+
+    def write(self, trace_path):
+        '''
+        Write the Chrome trace to trace_path, and the summary table next to it,
+        with a .txt extension.
+        '''
+        trace_dir = os.path.dirname(trace_path)
+        if trace_dir and not os.path.exists(trace_dir):
+            os.makedirs(trace_dir)
+
+        with open(trace_path, 'w') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+
+        summary = self.get_summary()
+        with open('%s.txt' % os.path.splitext(trace_path)[0], 'w') as f:
+            f.write(summary)
+            f.write('\n')
+
+        rfb_log().info("Wrote export profile to %s" % trace_path)
+        rfb_log().info(summary)
+
+def is_profiling_enabled():
+    '''
+    Profiling is turned on by the RFB_PROFILE environment variable, or
+    the preferences.
+    '''
+    if 'RFB_PROFILE' in os.environ:
+        return os.environ['RFB_PROFILE'] not in ('', '0')
+    try:
+        return prefs_utils.get_addon_prefs().rman_profile_export
+    except:
+        return False
+
+def get_profile_path():
+    '''
+    Where to write the trace. The RFB_PROFILE_FILE environment variable overrides
+    the preferences. By default, write to Blender's temp directory.
+    '''
+    if 'RFB_PROFILE_FILE' in os.environ:
+        return os.environ['RFB_PROFILE_FILE']
+    trace_path = ''
+    try:
+        trace_path = prefs_utils.get_addon_prefs().rman_profile_file
+    except:
+        pass
+    if trace_path:
+        return bpy.path.abspath(trace_path)
+    return os.path.join(prefs_utils.get_bl_temp_dir(), 'rfb_export_profile.json')
+
+def start_profiling(label):
+    '''
+    Start recording spans, if profiling is turned on.
+
+    Args:
+        label (str) - what is being profiled
+    '''
+    global __RFB_PROFILER__
+    if is_profiling_enabled():
+        __RFB_PROFILER__ = RmanProfiler(label)
+    else:
+        __RFB_PROFILER__ = None
+
+def stop_profiling():
+    '''
+    Stop recording spans, and write out the trace and summary.
+    '''
+    global __RFB_PROFILER__
+    profiler = __RFB_PROFILER__
+    __RFB_PROFILER__ = None
+    if not profiler:
+        return
+    try:
+        profiler.write(get_profile_path())
+    except (IOError, OSError) as e:
+        rfb_log().error("Could not write export profile: %s" % str(e))
+
+def write_memory_report(report):
+    '''
+    Write a scene memory report (see RmanScene.get_memory_report()) as JSON, 
+    next to the trace, with a .memory.json extension. Does nothing if 
+    profiling is off.
+
+    Args:
+        report (dict) - the memory report
+    '''
+    if __RFB_PROFILER__ is None:
+        return
+    report_path = '%s.memory.json' % os.path.splitext(get_profile_path())[0]
+    try:
+        report_dir = os.path.dirname(report_path)
+        if report_dir and not os.path.exists(report_dir):
+            os.makedirs(report_dir)
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=4)
+        rfb_log().info("Wrote memory report to %s" % report_path)
+    except (IOError, OSError) as e:
+        rfb_log().error("Could not write memory report: %s" % str(e))
+
+def span(name, category='phase', args=None):
+    '''
+    Return a context manager that times the work done inside of it.
+
+    Args:
+        name (str) - name of the span, ex: the phase or the object name
+        category (str) - category the span is counted under in the summary, ex: MESH.update.
+                        Spans with the category 'phase' are left out of the slowest list.
+        args (dict) - extra info to show in the trace
+
+    Returns:
+        (RmanProfileSpan) - the span, or a span that does nothing if profiling is off
+    '''
+    if __RFB_PROFILER__ is None:
+        return __NULL_SPAN__
+    return RmanProfileSpan(__RFB_PROFILER__, name, category, args)
@@ -685,8 +685,6 @@ def set_material_rixparams(node, rman_sg_node, params, mat_name=None):
                         # FIXME: Need a better way to check for a frame variable
                         if '{F' in prop:
                             rman_sg_node.is_frame_sensitive = True
-                        else:
-                            rman_sg_node.is_frame_sensitive = False                            
                     elif 'arraySize' in meta:
                         isArray = True
                         if type(prop) == int:
@@ -753,8 +751,6 @@ def set_rixparams(node, rman_sg_node, params, light):
                 # FIXME: Need a better way to check for a frame variable
                 if '{F' in prop:
                     rman_sg_node.is_frame_sensitive = True
-                else:
-                    rman_sg_node.is_frame_sensitive = False
 
             else:
                 val = string_utils.convert_val(prop, type_hint=type)
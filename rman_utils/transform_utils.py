@@ -1,6 +1,23 @@
 import rman
+import numpy as np
 
 def convert_matrix(m):
+    '''
+    Convert a Blender matrix to a flat list of 16 floats, in the order
+    RenderMan wants it. An (N, 4, 4) array of matrices can also be given,
+    ex: the matrices of all of the instances of an object, in which case
+    they all get converted at once.
+
+    Args:
+        m (mathutils.Matrix) - the matrix, or an (N, 4, 4) numpy array of matrices
+
+    Returns:
+        (list) - the 16 floats, or an (N, 16) numpy array if m was an array of matrices
+    '''
+    if isinstance(m, np.ndarray):
+        mtx = np.reshape(m, (-1, 4, 4))
+        return np.ascontiguousarray(np.reshape(np.transpose(mtx, (0, 2, 1)), (-1, 16)))
+
     v = [m[0][0], m[1][0], m[2][0], m[3][0],
         m[0][1], m[1][1], m[2][1], m[3][1],
         m[0][2], m[1][2], m[2][2], m[3][2],
@@ -22,16 +39,26 @@ def convert_ob_bounds(ob_bb):
             ob_bb[7][1], ob_bb[0][2], ob_bb[1][2])    
 
 def transform_points(transform_mtx, P):
-    transform_pts = []
-    mtx = convert_matrix( transform_mtx )
-    m = rman.Types.RtMatrix4x4( mtx[0],mtx[1],mtx[2],mtx[3],
-                                mtx[4],mtx[5],mtx[6],mtx[7],
-                                mtx[8],mtx[9],mtx[10],mtx[11],
-                                mtx[12],mtx[13],mtx[14],mtx[15])
-    for i in range(0, len(P), 3):
-        pt = m.pTransform( rman.Types.RtFloat3(P[i], P[i+1], P[i+2]) )
-        transform_pts.append(pt.x)
-        transform_pts.append(pt.y)
-        transform_pts.append(pt.z)
+    '''
+    Transform points by a matrix.
+
+    Args:
+        transform_mtx (mathutils.Matrix) - the matrix
+        P (list) - the points. Either a flat list of floats, or a (N, 3) array
 
-    return transform_pts 
\ No newline at end of file
+    Returns:
+        (numpy.ndarray) - contiguous float32 array of the transformed points, with
+                          the same shape as P (flat if P was flat)
+    '''
+    pts = np.asarray(P, dtype=np.float32)
+    if pts.size == 0:
+        return np.zeros(pts.shape, dtype=np.float32)
+    shape = pts.shape
+    pts = np.reshape(pts, (-1, 3))
+    m = np.reshape(convert_matrix(transform_mtx), (4, 4))
+    transform_pts = pts @ m[:3, :3].astype(np.float32) + m[3, :3].astype(np.float32)
+    if np.any(m[:, 3] != (0.0, 0.0, 0.0, 1.0)):
+        # projective matrix, divide by w
+        w = pts @ m[:3, 3].astype(np.float32) + np.float32(m[3, 3])
+        transform_pts /= w[:, None]
+    return np.ascontiguousarray(np.reshape(transform_pts, shape))
@@ -1,16 +1,42 @@
 from .rman_translator import RmanTranslator
 from ..rman_sg_nodes.rman_sg_blobby import RmanSgBlobby
 from ..rman_utils import object_utils
-from ..rman_utils import string_utils
-from mathutils import Matrix
+from ..rman_utils import transform_utils
 
 import bpy
 import math
-
-def get_mball_parent(mball):
-    for ob in bpy.data.objects:
-        if ob.data == mball:
-            return ob
+import numpy as np
+
+def get_element_transforms(matrix_world, elements):
+    '''
+    Get the transforms of the elements of a metaball, for RiBlobby.
+
+    Args:
+        matrix_world (mathutils.Matrix) - world matrix of the object that owns the metaball
+        elements (bpy.types.MetaBallElements) - the elements of the metaball
+
+    Returns:
+        (numpy.ndarray) - (N, 16) array, with the transform of each element
+    '''
+    nelements = len(elements)
+    co = np.zeros(nelements * 3, dtype=np.float32)
+    elements.foreach_get('co', co)
+    radius = np.zeros(nelements, dtype=np.float32)
+    elements.foreach_get('radius', radius)
+
+    # mballs that are only linked to the master by name have their own position,
+    # and have to be transformed relative to the master
+    ploc, prot, psc = matrix_world.decompose()
+    ro = np.array([list(row) for row in prot.to_matrix()], dtype=np.float64)
+
+    # translate @ scale(radius) @ rotation, for each element
+    m = np.zeros((nelements, 4, 4), dtype=np.float64)
+    m[:, 0:3, 0:3] = radius[:, None, None] * ro[None, :, :]
+    m[:, 0:3, 3] = np.reshape(co, (nelements, 3))
+    m[:, 3, 3] = 1.0
+
+    mtx = np.array([list(row) for row in matrix_world], dtype=np.float64)
+    return transform_utils.convert_matrix(mtx[None, :, :] @ m).astype(np.float32)
 
 class RmanBlobbyTranslator(RmanTranslator):
 
@@ -34,64 +60,42 @@ class RmanBlobbyTranslator(RmanTranslator):
         rm = ob.renderman
         prim = rm.primitive
 
-        # we are searching the global metaball collection for all mballs
-        # linked to the current object context, so we can export them
+        # we are looking up all of the mballs in the family of the
+        # current object in the family index, so we can export them
         # all as one family in RiBlobby
 
         family = object_utils.get_meta_family(ob)
-        master = bpy.data.objects[family]
-
-        fam_blobs = []
-
-        for mball in bpy.data.metaballs:
-            fam_blobs.extend([el for el in mball.elements if get_mball_parent(
-                el.id_data).name.split('.')[0] == family])
+        owners = self.rman_scene.get_meta_families().get(family, [])
 
         # transform
-        tform = []
-
-        # opcodes
-        op = []
-        count = len(fam_blobs)
-        for i in range(count):
-            op.append(1001)  # only blobby ellipsoids for now...
-            op.append(i * 16)
-
-        for meta_el in fam_blobs:
-
+        tforms = []
+        for owner_name in owners:
             # Because all meta elements are stored in a single collection,
             # these elements have a link to their parent MetaBall, but NOT the actual tree parent object.
-            # So I have to go find the parent that owns it.  We need the tree parent in order
+            # The family index has the parent that owns each mball.  We need the tree parent in order
             # to get any world transforms that alter position of the metaball.
-            parent = get_mball_parent(meta_el.id_data)
+            parent = bpy.data.objects.get(owner_name, None)
+            if not parent or parent.type != 'META':
+                continue
+            elements = parent.data.elements
+            if len(elements) < 1:
+                continue
+            tforms.append(get_element_transforms(parent.matrix_world, elements))
 
-            m = {}
-            loc = meta_el.co
+        count = sum([len(t) for t in tforms])
+        tform = np.concatenate(tforms).ravel() if tforms else np.zeros(0, dtype=np.float32)
 
-            # mballs that are only linked to the master by name have their own position,
-            # and have to be transformed relative to the master
-            ploc, prot, psc = parent.matrix_world.decompose()
-
-            m = Matrix.Translation(loc)
-
-            sc = Matrix(((meta_el.radius, 0, 0, 0),
-                        (0, meta_el.radius, 0, 0),
-                        (0, 0, meta_el.radius, 0),
-                        (0, 0, 0, 1)))
-
-            ro = prot.to_matrix().to_4x4()
-
-            m2 = m @ sc @ ro
-            tform = tform + string_utils.convert_val(parent.matrix_world @ m2)
-
-        op.append(0)  # blob operation:add
-        op.append(count)
-        for n in range(count):
-            op.append(n)
+        # opcodes
+        op = np.zeros(count * 3 + 2, dtype=np.int32)
+        op[0:count * 2:2] = 1001  # only blobby ellipsoids for now...
+        op[1:count * 2:2] = np.arange(count) * 16
+        op[count * 2] = 0  # blob operation:add
+        op[count * 2 + 1] = count
+        op[count * 2 + 2:] = np.arange(count)
 
         primvar = rman_sg_blobby.sg_node.GetPrimVars()  
         rman_sg_blobby.sg_node.Define(count)
         primvar.SetIntegerArray(self.rman_scene.rman.Tokens.Rix.k_Ri_code, op, len(op))            
         primvar.SetFloatArray(self.rman_scene.rman.Tokens.Rix.k_Ri_floats, tform, len(tform))      
         #primvar.SetFloat(self.rman_scene.rman.Tokens.Rix.k_displacementbound_sphere, rm.displacementbound)
-        rman_sg_blobby.sg_node.SetPrimVars(primvar)        
+        rman_sg_blobby.sg_node.SetPrimVars(primvar)
@@ -24,7 +24,9 @@ class RmanDraTranslator(RmanTranslator):
         rm = ob.renderman
         path_archive = filepath_utils.get_real_path(rm.path_archive)
         bounds = (-100000, 100000, -100000, 100000, -100000, 100000 )
+        self.set_archive(rman_sg_dra, path_archive, bounds)
 
+    def set_archive(self, rman_sg_dra, path_archive, bounds):
         primvar = rman_sg_dra.sg_node.GetPrimVars()
         primvar.SetString(self.rman_scene.rman.Tokens.Rix.k_filename, path_archive)
         primvar.SetFloatArray(self.rman_scene.rman.Tokens.Rix.k_bound, bounds, 6)
@@ -1,18 +1,79 @@
 from .rman_translator import RmanTranslator
 from ..rman_sg_nodes.rman_sg_gp import RmanSgGreaseP
+from ..rman_sg_nodes.rman_sg_gp import RmanSgGreasePLayer
 from ..rman_utils import object_utils
 from ..rman_utils import string_utils
 from ..rfb_logger import rfb_log
 
 import bpy
 import math
+import hashlib
 import numpy as np
 
+def _get_stroke_points_(strokes):
+    '''
+    Get the points of a list of strokes, all in one set of arrays.
+
+    Args:
+        strokes (list) - list of bpy.types.GPencilStroke
+
+    Returns:
+        (tuple) - (P, pressure, counts). P is a (N, 3) array of all of the points,
+                  pressure is the pressure of each point, and counts is the number
+                  of points in each stroke
+    '''
+    counts = np.array([len(stroke.points) for stroke in strokes], dtype=np.int32)
+    num_pts = int(counts.sum())
+    P = np.zeros(num_pts*3, dtype=np.float32)
+    pressure = np.zeros(num_pts, dtype=np.float32)
+    start = 0
+    for stroke, count in zip(strokes, counts):
+        end = start + count
+        stroke.points.foreach_get('co', P[start*3:end*3])
+        stroke.points.foreach_get('pressure', pressure[start:end])
+        start = end
+
+    return (np.reshape(P, (num_pts, 3)), pressure, counts)
+
+def _get_stroke_triangles_(strokes, counts):
+    '''
+    Get the fill triangles of a list of strokes, all in one set of arrays.
+    The vertex indices are offset, so that they index into the points returned
+    by _get_stroke_points_.
+
+    Args:
+        strokes (list) - list of bpy.types.GPencilStroke
+        counts (numpy.ndarray) - number of points in each stroke
+
+    Returns:
+        (tuple) - (verts, st). verts is the vertex indices of the triangles,
+                  and st is the facevarying uvs
+    '''
+    ntris = np.array([len(stroke.triangles) for stroke in strokes], dtype=np.int32)
+    total = int(ntris.sum())
+    verts = np.zeros((3, total), dtype=np.int32)
+    st = np.zeros((3, total*2), dtype=np.float32)
+    start = 0
+    for stroke, count in zip(strokes, ntris):
+        end = start + count
+        tris = stroke.triangles
+        for i, corner in enumerate(('1', '2', '3')):
+            tris.foreach_get('v%s' % corner, verts[i, start:end])
+            tris.foreach_get('uv%s' % corner, st[i, start*2:end*2])
+        start = end
+
+    # each stroke's indices start after the points of the strokes before it
+    offsets = np.cumsum(counts) - counts
+    verts = verts.T + np.repeat(offsets, ntris)[:, None]
+    st = np.reshape(np.transpose(np.reshape(st, (3, total, 2)), (1, 0, 2)), -1)
+
+    return (np.ascontiguousarray(np.reshape(verts, -1)), np.ascontiguousarray(st))
+
 class RmanGPencilTranslator(RmanTranslator):
 
     def __init__(self, rman_scene):
         super().__init__(rman_scene)
-        self.bl_type = 'GPENCIL' 
+        self.bl_type = 'GPENCIL'
 
 
     def export_object_primvars(self, ob, sg_node):
@@ -21,159 +82,203 @@ class RmanGPencilTranslator(RmanTranslator):
 
     def export(self, ob, db_name):
         prim_type = object_utils._detect_primitive_(ob)
-        
+
         sg_node = self.rman_scene.sg_scene.CreateGroup(db_name)
         rman_sg_gpencil = RmanSgGreaseP(self.rman_scene, sg_node, db_name)
 
         return rman_sg_gpencil
 
     def update(self, ob, rman_sg_gpencil):
-        for c in [ rman_sg_gpencil.sg_node.GetChild(i) for i in range(0, rman_sg_gpencil.sg_node.GetNumChildren())]:
-            rman_sg_gpencil.sg_node.RemoveChild(c)
-            self.rman_scene.sg_scene.DeleteDagNode(c)        
-        
-        self._get_strokes_(ob, rman_sg_gpencil)     
-
-        return True    
-
-    def _create_mesh(self, ob, i, lyr, stroke, rman_sg_gpencil, rman_sg_material):
-
-        gp_ob = ob.data     
-
-        pts = stroke.points
-        nverts = []
-        verts = []
-        st = []
-
-        num_pts = len(pts)
-        P = np.zeros(num_pts*3, dtype=np.float32)
-        pts.foreach_get('co', P)
-        P = P.tolist()
-
-        mesh_sg = self.rman_scene.sg_scene.CreateMesh('%s-MESH-%d' % (lyr.info, i))
-        for t in stroke.triangles:
-            nverts.append(3)
-            verts.append(t.v1)
-            verts.append(t.v2)
-            verts.append(t.v3)
-            st.extend(t.uv1)
-            st.extend(t.uv2)
-            st.extend(t.uv3)            
-
-        num_polygons = len(stroke.triangles)
-        num_verts = len(verts)
-        mesh_sg.Define( num_polygons, num_pts, num_verts )
-                            
+        '''
+        Translate the visible layers of the grease pencil object. The strokes of
+        each layer are merged into one primitive per material. Layers whose strokes
+        haven't changed since the last update are left alone.
+        '''
+        gp_ob = ob.data
+        layers = dict()
+
+        for nm,lyr in gp_ob.layers.items():
+            if lyr.hide:
+                continue
+            rman_sg_layer = rman_sg_gpencil.layers.pop(lyr.info, None)
+            layers[lyr.info] = self._update_layer(ob, lyr, rman_sg_gpencil, rman_sg_layer)
+
+        # remove any layers that were deleted or hidden
+        for rman_sg_layer in rman_sg_gpencil.layers.values():
+            rman_sg_gpencil.sg_node.RemoveChild(rman_sg_layer.sg_node)
+            self.rman_scene.sg_scene.DeleteDagNode(rman_sg_layer.sg_node)
+        rman_sg_gpencil.layers = layers
+
+        rman_sg_gpencil.clear_primvar_sizes()
+        for rman_sg_layer in layers.values():
+            for name, nbytes in rman_sg_layer.primvar_sizes.items():
+                rman_sg_gpencil.primvar_sizes[name] = rman_sg_gpencil.primvar_sizes.get(name, 0) + nbytes
+
+        return True
+
+    def _get_batches_(self, gp_ob, lyr):
+        # group the strokes of the layer by material, and by how
+        # they get rendered: 'MESH' for fills, 'POINTS' or 'CURVES'
+        batches = dict()
+        for frame in lyr.frames:
+            for stroke in frame.strokes:
+                mat = gp_ob.materials[stroke.material_index]
+                if mat.grease_pencil.hide:
+                    continue
+
+                if len(stroke.triangles) > 0:
+                    kind = 'MESH'
+                elif mat.grease_pencil.mode in ['DOTS', 'BOX']:
+                    kind = 'POINTS'
+                elif len(stroke.points) < 2:
+                    # not enough points to be a curve. export as points
+                    kind = 'POINTS'
+                else:
+                    kind = 'CURVES'
+                key = (stroke.material_index, kind)
+                strokes = batches.get(key, None)
+                if strokes is None:
+                    strokes = []
+                    batches[key] = strokes
+                strokes.append(stroke)
+
+        return batches
+
+    def _update_layer(self, ob, lyr, rman_sg_gpencil, rman_sg_layer):
+        gp_ob = ob.data
+
+        # get all of the data for the layer, and see if it has changed
+        h = hashlib.sha1()
+        prims = []
+        for (mat_idx, kind), strokes in self._get_batches_(gp_ob, lyr).items():
+            mat = gp_ob.materials[mat_idx]
+            if kind == 'MESH':
+                arrays = self._get_mesh_arrays(strokes)
+            elif kind == 'POINTS':
+                arrays = self._get_points_arrays(strokes)
+            else:
+                arrays = self._get_curves_arrays(strokes)
+            h.update(('%d|%s|%s' % (mat_idx, mat.name, kind)).encode('utf-8'))
+            for a in arrays:
+                h.update(a.tobytes())
+            prims.append((mat_idx, mat, kind, arrays))
+        layer_hash = h.hexdigest()
+
+        if rman_sg_layer:
+            if rman_sg_layer.layer_hash == layer_hash:
+                return rman_sg_layer
+            for c in [ rman_sg_layer.sg_node.GetChild(i) for i in range(0, rman_sg_layer.sg_node.GetNumChildren())]:
+                rman_sg_layer.sg_node.RemoveChild(c)
+                self.rman_scene.sg_scene.DeleteDagNode(c)
+        else:
+            layer_db_name = '%s|%s' % (rman_sg_gpencil.db_name, lyr.info)
+            sg_node = self.rman_scene.sg_scene.CreateGroup(layer_db_name)
+            rman_sg_layer = RmanSgGreasePLayer(self.rman_scene, sg_node, layer_db_name)
+            rman_sg_gpencil.sg_node.AddChild(sg_node)
+
+        rman_sg_layer.clear_primvar_sizes()
+        rman_sg_layer.layer_hash = layer_hash
+        for mat_idx, mat, kind, arrays in prims:
+            mat_db_name = object_utils.get_db_name(mat)
+            rman_sg_material = self.rman_scene.rman_materials.get(mat_db_name, None)
+            # the same material can be in more than one slot, so
+            # name the prim after the slot
+            prim_name = '%s|%d-%s' % (rman_sg_layer.db_name, mat_idx, kind)
+            if kind == 'MESH':
+                self._create_mesh(prim_name, arrays, rman_sg_layer, rman_sg_material)
+            elif kind == 'POINTS':
+                self._create_points(prim_name, arrays, rman_sg_layer, rman_sg_material)
+            else:
+                self._create_curves(prim_name, arrays, rman_sg_layer, rman_sg_material)
+
+        return rman_sg_layer
+
+    def _get_mesh_arrays(self, strokes):
+        P, pressure, counts = _get_stroke_points_(strokes)
+        verts, st = _get_stroke_triangles_(strokes, counts)
+        nverts = np.full(len(verts) // 3, 3, dtype=np.int32)
+        return (P, nverts, verts, st)
+
+    def _get_points_arrays(self, strokes):
+        P, pressure, counts = _get_stroke_points_(strokes)
+        width_factor = 0.0012 * np.array([stroke.line_width for stroke in strokes], dtype=np.float32)
+        widths = pressure * np.repeat(width_factor, counts) #0.03
+        return (P, widths)
+
+    def _get_curves_arrays(self, strokes):
+        P, pressure, counts = _get_stroke_points_(strokes)
+        width_factor = 0.00083 * np.array([stroke.line_width for stroke in strokes], dtype=np.float32)
+        widths = pressure * np.repeat(width_factor, counts) #0.05
+
+        # double the first and last
+        nvertices = counts + 2
+        starts = np.cumsum(counts) - counts
+        local_idx = np.arange(int(nvertices.sum())) - np.repeat(np.cumsum(nvertices) - nvertices, nvertices)
+        idx = np.repeat(starts, nvertices) + np.clip(local_idx - 1, 0, np.repeat(counts - 1, nvertices))
+
+        return (np.ascontiguousarray(P[idx]), nvertices, np.ascontiguousarray(widths[idx]))
+
+    def _create_mesh(self, name, arrays, rman_sg_layer, rman_sg_material):
+        P, nverts, verts, st = arrays
+
+        mesh_sg = self.rman_scene.sg_scene.CreateMesh(name)
+        mesh_sg.Define( len(nverts), len(P), len(verts) )
+
         primvar = mesh_sg.GetPrimVars()
         primvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex")
 
         primvar.SetIntegerDetail(self.rman_scene.rman.Tokens.Rix.k_Ri_nvertices, nverts, "uniform")
-        primvar.SetIntegerDetail(self.rman_scene.rman.Tokens.Rix.k_Ri_vertices, verts, "facevarying")  
-        primvar.SetFloatArrayDetail("st", st, 2, "facevarying")  
+        primvar.SetIntegerDetail(self.rman_scene.rman.Tokens.Rix.k_Ri_vertices, verts, "facevarying")
+        primvar.SetFloatArrayDetail("st", st, 2, "facevarying")
         mesh_sg.SetPrimVars(primvar)
+        rman_sg_layer.add_primvar_size("P", P)
+        rman_sg_layer.add_primvar_size("nvertices", nverts)
+        rman_sg_layer.add_primvar_size("vertices", verts)
+        rman_sg_layer.add_primvar_size("st", st)
         if rman_sg_material:
-            mesh_sg.SetMaterial(rman_sg_material.sg_node)         
-        rman_sg_gpencil.sg_node.AddChild(mesh_sg)     
-
-    def _create_points(self, ob, i, lyr, stroke, rman_sg_gpencil, rman_sg_material):
-        gp_ob = ob.data 
-
-        num_pts = len(stroke.points)
-        points = np.zeros(num_pts*3, dtype=np.float32)
-        widths = np.zeros(num_pts, dtype=np.float32)
-        stroke.points.foreach_get('co', points)
-        stroke.points.foreach_get('pressure', widths)
-
-        points = np.reshape(points, (num_pts, 3))
-        points = points.tolist()        
-        
-        width_factor = 0.0012 * stroke.line_width
-        widths = widths * width_factor #0.03
-        widths = widths.tolist()
-
-        points_sg = self.rman_scene.sg_scene.CreatePoints("%s-DOTS-%d" % (lyr.info, i))
-        i += 1                
-        points_sg.Define(num_pts)
+            mesh_sg.SetMaterial(rman_sg_material.sg_node)
+        rman_sg_layer.sg_node.AddChild(mesh_sg)
+
+    def _create_points(self, name, arrays, rman_sg_layer, rman_sg_material):
+        points, widths = arrays
+
+        points_sg = self.rman_scene.sg_scene.CreatePoints(name)
+        points_sg.Define(len(points))
         primvar = points_sg.GetPrimVars()
 
-        primvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, points, "vertex")  
-        primvar.SetFloatDetail(self.rman_scene.rman.Tokens.Rix.k_width, widths, "vertex")              
-                    
+        primvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, points, "vertex")
+        primvar.SetFloatDetail(self.rman_scene.rman.Tokens.Rix.k_width, widths, "vertex")
+
         points_sg.SetPrimVars(primvar)
+        rman_sg_layer.add_primvar_size("P", points)
+        rman_sg_layer.add_primvar_size("width", widths)
 
         # Attach material
         if rman_sg_material:
-            points_sg.SetMaterial(rman_sg_material.sg_node)          
-
-        rman_sg_gpencil.sg_node.AddChild(points_sg)                  
-        
-    def _create_curve(self, ob, i, lyr, stroke, rman_sg_gpencil, rman_sg_material):
-        gp_ob = ob.data       
-
-        vertsArray = []
-        num_pts = len(stroke.points)
-        points = np.zeros(num_pts*3, dtype=np.float32)
-        widths = np.zeros(num_pts, dtype=np.float32)
-        stroke.points.foreach_get('co', points)
-        stroke.points.foreach_get('pressure', widths)
-
-        points = np.reshape(points, (num_pts, 3))
-        points = points.tolist()        
-        
-        width_factor = 0.00083 * stroke.line_width
-        widths = widths * width_factor #0.05
-        widths = widths.tolist()
+            points_sg.SetMaterial(rman_sg_material.sg_node)
 
-        # double the first and last
-        points = points[:1] + \
-            points + points[-1:]
-
-        if len(points) < 4:
-            # not enough points to be a curve. export as points
-            self._create_points(ob, i, lyr, stroke, rman_sg_gpencil, rman_sg_material)
-            return
+        rman_sg_layer.sg_node.AddChild(points_sg)
 
-        widths = widths[:1] + widths + widths[-1:]
-        vertsArray.append(len(points))
+    def _create_curves(self, name, arrays, rman_sg_layer, rman_sg_material):
+        points, vertsArray, widths = arrays
 
-        curves_sg = self.rman_scene.sg_scene.CreateCurves("%s-STROKE-%d" % (lyr.info, i))
-        i += 1                
+        curves_sg = self.rman_scene.sg_scene.CreateCurves(name)
         curves_sg.Define(self.rman_scene.rman.Tokens.Rix.k_cubic, "nonperiodic", "catmull-rom", len(vertsArray), len(points))
         primvar = curves_sg.GetPrimVars()
 
-        primvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, points, "vertex")                
+        primvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, points, "vertex")
         primvar.SetIntegerDetail(self.rman_scene.rman.Tokens.Rix.k_Ri_nvertices, vertsArray, "uniform")
         primvar.SetIntegerDetail("index", range(len(vertsArray)), "uniform")
 
         primvar.SetFloatDetail(self.rman_scene.rman.Tokens.Rix.k_width, widths, "vertex")
-                    
+
         curves_sg.SetPrimVars(primvar)
+        rman_sg_layer.add_primvar_size("P", points)
+        rman_sg_layer.add_primvar_size("nvertices", vertsArray)
+        rman_sg_layer.add_primvar_size("width", widths)
 
         # Attach material
         if rman_sg_material:
-            curves_sg.SetMaterial(rman_sg_material.sg_node)          
+            curves_sg.SetMaterial(rman_sg_material.sg_node)
 
-        rman_sg_gpencil.sg_node.AddChild(curves_sg)                  
-
-    def _get_strokes_(self, ob, rman_sg_gpencil):
-
-        gp_ob = ob.data
-
-        for nm,lyr in gp_ob.layers.items():
-            if lyr.hide:
-                continue
-            for frame in lyr.frames:
-                for i, stroke in enumerate(frame.strokes):
-                    mat =  gp_ob.materials[stroke.material_index]
-                    if mat.grease_pencil.hide:
-                        continue   
-
-                    mat_db_name = object_utils.get_db_name(mat)
-                    rman_sg_material = self.rman_scene.rman_materials.get(mat_db_name, None)                              
-                    if len(stroke.triangles) > 0:
-                        self._create_mesh(ob, i, lyr, stroke, rman_sg_gpencil, rman_sg_material)
-                    else:
-                        if mat.grease_pencil.mode in ['DOTS', 'BOX']:
-                            self._create_points(ob, i, lyr, stroke, rman_sg_gpencil, rman_sg_material)
-                        else:
-                            self._create_curve(ob, i, lyr, stroke, rman_sg_gpencil, rman_sg_material)
+        rman_sg_layer.sg_node.AddChild(curves_sg)
@@ -2,7 +2,7 @@ from .rman_translator import RmanTranslator
 from ..rman_utils import transform_utils
 from ..rman_utils import object_utils
 from ..rman_sg_nodes.rman_sg_hair import RmanSgHair
-from mathutils import Vector
+import itertools
 import math
 import bpy    
 import numpy as np
@@ -27,6 +27,7 @@ class RmanHairTranslator(RmanTranslator):
             rman_sg_hair.sg_node.RemoveChild(c)
             self.rman_scene.sg_scene.DeleteDagNode(c)
 
+        rman_sg_hair.clear_primvar_sizes()
         curves = self._get_strands_(ob, psys)
         if not curves:
             rman_sg_hair.sg_node = None
@@ -41,15 +42,22 @@ class RmanHairTranslator(RmanTranslator):
             primvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, points, "vertex")                
             primvar.SetIntegerDetail(self.rman_scene.rman.Tokens.Rix.k_Ri_nvertices, vertsArray, "uniform")
             primvar.SetIntegerDetail("index", range(len(vertsArray)), "uniform")
+            rman_sg_hair.add_primvar_size("P", points)
+            rman_sg_hair.add_primvar_size("nvertices", vertsArray)
+            rman_sg_hair.add_primvar_size("index", vertsArray)
 
             if widthString == self.rman_scene.rman.Tokens.Rix.k_constantwidth:
                 primvar.SetFloatDetail(widthString, widths, "constant")
+                rman_sg_hair.add_primvar_size("width", [widths])
             else:
                 primvar.SetFloatDetail(widthString, widths, "vertex")
+                rman_sg_hair.add_primvar_size("width", widths)
 
             if len(scalpS):
                 primvar.SetFloatDetail("scalpS", scalpS, "uniform")                
                 primvar.SetFloatDetail("scalpT", scalpT, "uniform")
+                rman_sg_hair.add_primvar_size("scalpS", scalpS)
+                rman_sg_hair.add_primvar_size("scalpT", scalpT)
                     
             curves_sg.SetPrimVars(primvar)
 
@@ -97,85 +105,81 @@ class RmanHairTranslator(RmanTranslator):
         export_st = psys.settings.renderman.export_scalp_st and psys_modifier and len(
             ob.data.uv_layers) > 0
 
+        # the strands we are exporting. If there are children, only the children
+        # get rendered
+        first_strand = num_parents if psys.settings.child_type != 'NONE' else 0
+        pindices = np.arange(first_strand, total_hair_count)
+        nstrands = len(pindices)
+        if nstrands == 0:
+            return []
+
+        # gather all of the strand points, in one pass
+        npts = steps + 1
+        co = np.fromiter(itertools.chain.from_iterable(psys.co_hair(ob, particle_no=pindex, step=step)
+                                                       for pindex in range(first_strand, total_hair_count)
+                                                       for step in range(npts)),
+                         dtype=np.float32, count=nstrands * npts * 3)
+        co = np.reshape(co, (nstrands, npts, 3))
+
+        # a zero length point means the strand ends prematurely
+        ended = ~np.any(co, axis=2)
+        strand_lens = np.where(np.any(ended, axis=1), np.argmax(ended, axis=1), npts)
+
+        # catmull-rom requires at least 4 vertices, and we double
+        # the first and last points
+        valid = strand_lens > 1
+        pindices = pindices[valid]
+        strand_lens = strand_lens[valid]
+        co = co[valid]
+        if len(pindices) == 0:
+            return []
+        verts_per_strand = (strand_lens + 2).astype(np.int32)
+
+        # index of each output point, in its strand
+        starts = np.cumsum(verts_per_strand) - verts_per_strand
+        strand_of_pt = np.repeat(np.arange(len(pindices)), verts_per_strand)
+        local_idx = np.arange(int(verts_per_strand.sum())) - np.repeat(starts, verts_per_strand)
+        # double the first and last
+        step_idx = np.clip(local_idx - 1, 0, np.repeat(strand_lens - 1, verts_per_strand))
+
+        # put points in object space
+        points = transform_utils.transform_points(ob.matrix_world.inverted_safe(), co[strand_of_pt, step_idx])
+
+        # for varying width make the width array
+        if not conwidth:
+            decr = np.repeat((base_width - tip_width) / (verts_per_strand - 2), verts_per_strand)
+            hair_width = (base_width - decr * np.maximum(local_idx - 1, 0)).astype(np.float32)
+            hair_width[starts + verts_per_strand - 1] = tip_width
+
+        # get the scalp S
+        scalpS = np.zeros(0, dtype=np.float32)
+        scalpT = np.zeros(0, dtype=np.float32)
+        if export_st:
+            particles = psys.particles
+            st = np.array([psys.uv_on_emitter(psys_modifier,
+                                              particles[int(pindex) if pindex < num_parents else (int(pindex) - num_parents) % num_parents],
+                                              int(pindex))
+                           for pindex in pindices], dtype=np.float32)
+            scalpS = np.ascontiguousarray(st[:, 0])
+            scalpT = np.ascontiguousarray(st[:, 1])
+
+        # if we get more than 100000 vertices, export ri.Curve and reset.  This
+        # is to avoid a maxint on the array length
         curve_sets = []
-
-        points = []
-
-        vertsArray = []
-        scalpS = []
-        scalpT = []
-        nverts = 0
-
-        ob_inv_mtx = ob.matrix_world.inverted_safe()
-        
-        for pindex in range(total_hair_count):
-            if psys.settings.child_type != 'NONE' and pindex < num_parents:
-                continue
-
-            strand_points = []
-            # walk through each strand
-            for step in range(0, steps + 1):           
-                pt = psys.co_hair(ob, particle_no=pindex, step=step)
-
-                if pt.length_squared == 0:
-                    # this strand ends prematurely                    
-                    break                
-
-                # put points in object space
-                pt = Vector(transform_utils.transform_points( ob_inv_mtx, pt))
-
-                strand_points.append(pt)
-
-            if len(strand_points) > 1:
-                # double the first and last
-                strand_points = strand_points[:1] + \
-                    strand_points + strand_points[-1:]
-                vertsInStrand = len(strand_points)
-
-                # catmull-rom requires at least 4 vertices
-                if vertsInStrand < 4:
-                    continue
-
-                # for varying width make the width array
-                if not conwidth:
-                    decr = (base_width - tip_width) / (vertsInStrand - 2)
-                    hair_width.extend([base_width] + [(base_width - decr * i)
-                                                    for i in range(vertsInStrand - 2)] +
-                                    [tip_width])
-
-                # add the last point again
-                points.extend(strand_points)
-                vertsArray.append(vertsInStrand)
-                nverts += vertsInStrand
-
-                # get the scalp S
-                if export_st:
-                    if pindex >= num_parents:
-                        particle = psys.particles[
-                            (pindex - num_parents) % num_parents]
-                    else:
-                        particle = psys.particles[pindex]
-                    st = psys.uv_on_emitter(psys_modifier, particle, pindex)
-                    scalpS.append(st[0])
-                    scalpT.append(st[1])
-
-            # if we get more than 100000 vertices, export ri.Curve and reset.  This
-            # is to avoid a maxint on the array length
-            if nverts > 100000:
-                curve_sets.append(
-                    (vertsArray, points, widthString, hair_width, scalpS, scalpT))
-
-                nverts = 0
-                points = []
-                vertsArray = []
-                if not conwidth:
-                    hair_width = []
-                scalpS = []
-                scalpT = []
-
-        if nverts > 0:
-            curve_sets.append((vertsArray, points, widthString,
-                            hair_width, scalpS, scalpT))
+        pt_ends = starts + verts_per_strand
+        first = 0
+        while first < len(verts_per_strand):
+            base = starts[first]
+            # the chunk ends with the first strand that takes it over the limit
+            last = min(np.searchsorted(pt_ends, base + 100000, side='right'), len(verts_per_strand) - 1)
+            pt_first = base
+            pt_last = pt_ends[last]
+            curve_sets.append((verts_per_strand[first:last + 1],
+                               points[pt_first:pt_last],
+                               widthString,
+                               hair_width if conwidth else hair_width[pt_first:pt_last],
+                               scalpS[first:last + 1],
+                               scalpT[first:last + 1]))
+            first = last + 1
 
         return curve_sets              
-            
\ No newline at end of file
@@ -85,6 +85,7 @@ class RmanLightTranslator(RmanTranslator):
         rm = light.renderman      
 
         light_filters = []
+        filter_names = []
         lightfilter_translator = self.rman_scene.rman_translators['LIGHTFILTER']
         
         for lf in rm.light_filters:
@@ -97,9 +98,13 @@ class RmanLightTranslator(RmanTranslator):
                 if not rman_sg_lightfilter:
                     rman_sg_lightfilter = lightfilter_translator.export(light_filter, light_filter_db_name)
                 lightfilter_translator.update(light_filter, rman_sg_lightfilter)
+                if rman_sg_lightfilter.is_frame_sensitive:
+                    # filters get updated along with their light
+                    rman_sg_light.is_frame_sensitive = True
 
 
                 light_filters.append(rman_sg_lightfilter.sg_node)
+                filter_names.append(light_filter.name)
 
                 '''
                 coordsys = self.rman_scene.rman_objects.get(rman_sg_lightfilter.coord_sys, None)
@@ -110,6 +115,8 @@ class RmanLightTranslator(RmanTranslator):
         if len(light_filters) > 0:
             rman_sg_light.sg_node.SetLightFilter(light_filters)          
 
+        self.rman_scene.index_light_filters(rman_sg_light.db_name, filter_names)
+
     def update(self, ob, rman_sg_light):
 
         light = ob.data
@@ -119,6 +126,10 @@ class RmanLightTranslator(RmanTranslator):
         if self.rman_scene.bl_scene:
             group_name = get_light_group(ob, self.rman_scene.bl_scene)
 
+        # set again by the light filters or light shader, if they use 
+        # the {F} frame variable
+        rman_sg_light.is_frame_sensitive = False
+
         # light filters
         self.update_light_filters(ob, rman_sg_light)
         
@@ -240,4 +251,6 @@ class RmanLightTranslator(RmanTranslator):
             m = transform_utils.convert_matrix4x4(s_orientPxrEnvDayLightInv)
             sunDirection = m.vTransform(string_utils.convert_val(prop))
             rixparams.SetVector("sunDirection", sunDirection)
-        """
\ No newline at end of file
+        """
+
+        self.rman_scene.index_frame_sensitive(rman_sg_light, 'LIGHT', ob.name)
@@ -52,6 +52,7 @@ class RmanLightFilterTranslator(RmanTranslator):
 
     def update(self, ob, rman_sg_lightfilter):
         lightfilter_node = ob.data.renderman.get_light_node()
+        rman_sg_lightfilter.is_frame_sensitive = False
         property_utils.property_group_to_rixparams(lightfilter_node, rman_sg_lightfilter, rman_sg_lightfilter.sg_node, light=ob.data)
         rixparams = rman_sg_lightfilter.sg_node.params
         rixparams.SetString("coordsys", rman_sg_lightfilter.coord_sys)
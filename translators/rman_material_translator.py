@@ -32,10 +32,13 @@ class RmanMaterialTranslator(RmanTranslator):
 
         rm = mat.renderman
         succeed = False
+        # set again by any texture paths using the {F} frame variable
+        rman_sg_material.is_frame_sensitive = False
 
         if mat.grease_pencil:
             if not mat.node_tree or not shadergraph_utils.is_renderman_nodetree(mat):
                 self.export_shader_grease_pencil(mat, rman_sg_material, handle=rman_sg_material.db_name )
+                self.rman_scene.index_frame_sensitive(rman_sg_material, 'MATERIAL', mat.name)
                 return
 
         if mat.node_tree:
@@ -44,6 +47,8 @@ class RmanMaterialTranslator(RmanTranslator):
         if not succeed:
             succeed = self.export_simple_shader(mat, rman_sg_material, mat_handle=rman_sg_material.db_name)     
 
+        self.rman_scene.index_frame_sensitive(rman_sg_material, 'MATERIAL', mat.name)
+
     def export_shader_grease_pencil(self, mat, rman_sg_material, handle):
         gp_mat = mat.grease_pencil
 
@@ -6,130 +6,376 @@ from ..rman_utils import property_utils
 
 import bpy
 import math
+import hashlib
+import numpy as np
 
-def _get_mats_faces_(nverts, material_ids):
+def _get_mats_faces_(material_ids):
+    '''
+    Group the faces of a mesh by their material index.
 
-    mats = {}
-    for face_id, num_verts in enumerate(nverts):
-        mat_id = material_ids[face_id]
-        if mat_id not in mats:
-            mats[mat_id] = []
-        mats[mat_id].append(face_id)
-    return mats
+    Args:
+        material_ids (numpy.ndarray) - material index of each face
 
-def _is_multi_material_(ob, mesh):
+    Returns:
+        (list) - list of (material index, face indices) tuples, sorted by material index
+    '''
+    order = np.argsort(material_ids, kind='stable').astype(np.int32)
+    mat_ids, starts = np.unique(material_ids[order], return_index=True)
+    return list(zip(mat_ids.tolist(), np.split(order, starts[1:])))
+
+def _is_multi_material_(ob, mesh, material_ids=None):
     if type(mesh) != bpy.types.Mesh or len(ob.data.materials) < 2 \
             or len(mesh.polygons) == 0:
         return False
-    first_mat = mesh.polygons[0].material_index
-    for p in mesh.polygons:
-        if p.material_index != first_mat:
-            return True
-    return False
+    if material_ids is None:
+        material_ids = _get_material_ids(ob, mesh)
+    return bool(np.any(material_ids != material_ids[0]))
 
 # requires facevertex interpolation
 def _get_mesh_uv_(mesh, name="", flipvmode='NONE'):
-    uvs = []
+    '''
+    Return the uvs of one of the uv layers of this mesh, one per loop.
+
+    Args:
+        mesh (bpy.types.Mesh) - the mesh
+        name (str) - name of the uv layer. The active layer is used if empty
+        flipvmode (str) - how to flip v: 'NONE', 'UV' (1 - v) or 'TILE' (flip within each UDIM tile)
+
+    Returns:
+        (numpy.ndarray) - flat array of (u, v) pairs, or None if there's no such layer
+    '''
     if not name:
         uv_loop_layer = mesh.uv_layers.active
     else:
-        # assuming uv loop layers and uv textures share identical indices
-        idx = mesh.uv_textures.keys().index(name)
-        uv_loop_layer = mesh.uv_layers[idx]
+        uv_loop_layer = mesh.uv_layers.get(name, None)
 
     if uv_loop_layer is None:
         return None
 
-    for uvloop in uv_loop_layer.data:
-        uvs.append(uvloop.uv.x)
-        # renderman expects UVs flipped vertically from blender
-        # best to do this in pattern, provided here as additional option
-        if flipvmode == 'UV':
-            uvs.append(1.0-uvloop.uv.y)
-        elif flipvmode == 'TILE':
-            uvs.append(math.ceil(uvloop.uv.y) - uvloop.uv.y + math.floor(uvloop.uv.y))
-        elif flipvmode == 'NONE':
-            uvs.append(uvloop.uv.y)
+    uvs = np.zeros(len(mesh.loops)*2, dtype=np.float32)
+    uv_loop_layer.data.foreach_get('uv', uvs)
+
+    # renderman expects UVs flipped vertically from blender
+    # best to do this in pattern, provided here as additional option
+    v = uvs[1::2]
+    if flipvmode == 'UV':
+        uvs[1::2] = 1.0 - v
+    elif flipvmode == 'TILE':
+        uvs[1::2] = np.ceil(v) - v + np.floor(v)
 
     return uvs
 
 def _get_mesh_vcol_(mesh, name=""):
-    vcol_layer = mesh.vertex_colors[name] if name != "" \
+    '''
+    Return the colors of one of the vertex color layers of this mesh, one per loop.
+    Alpha is dropped.
+
+    Returns:
+        (numpy.ndarray) - (nloops, 3) array of colors, or None if there's no such layer
+    '''
+    vcol_layer = mesh.vertex_colors.get(name, None) if name != "" \
         else mesh.vertex_colors.active
-    cols = []
 
     if vcol_layer is None:
         return None
 
-    for vcloop in vcol_layer.data:
-        cols.extend(vcloop.color)
+    nloops = len(mesh.loops)
+    cols = np.zeros(nloops*4, dtype=np.float32)
+    vcol_layer.data.foreach_get('color', cols)
+    cols = np.reshape(cols, (nloops, 4))
 
-    return cols    
+    return np.ascontiguousarray(cols[:, :3])
 
 def _get_mesh_vgroup_(ob, mesh, name=""):
-    vgroup = ob.vertex_groups[name] if name != "" else ob.vertex_groups.active
-    weights = []
+    '''
+    Return the weight of every vertex in one of the object's vertex groups.
+    Vertices that aren't in the group get 0.
+
+    Returns:
+        (numpy.ndarray) - weight per vertex, or None if there's no such group
+    '''
+    vgroup = ob.vertex_groups.get(name, None) if name != "" else ob.vertex_groups.active
 
     if vgroup is None:
         return None
 
+    # there's no bulk access to the group weights, so this still needs 
+    # to visit each vertex's groups
+    weights = np.zeros(len(mesh.vertices), dtype=np.float32)
+    group_index = vgroup.index
     for v in mesh.vertices:
-        if len(v.groups) == 0:
-            weights.append(0.0)
-        else:
-            weights.extend([g.weight for g in v.groups
-                            if g.group == vgroup.index])
+        for g in v.groups:
+            if g.group == group_index:
+                weights[v.index] = g.weight
+                break
 
     return weights
 
 def _get_material_ids(ob, geo):
         
-    material_ids = string_utils.convert_val([p.material_index for p in geo.polygons])
+    material_ids = np.zeros(len(geo.polygons), dtype=np.int32)
+    geo.polygons.foreach_get('material_index', material_ids)
     return material_ids
 
-def _get_primvars_(ob, geo, rixparams, interpolation=""):
+def _get_edge_creases_(mesh):
+    '''
+    Return the vertices and crease weights of the creased edges in this mesh.
+
+    Returns:
+        (tuple) - (edges, creases), a (num_creased, 2) array of vertex indices
+                  and the crease weight of each of those edges
+    '''
+    nedges = len(mesh.edges)
+    creases = np.zeros(nedges, dtype=np.float32)
+    mesh.edges.foreach_get('crease', creases)
+    creased = np.flatnonzero(creases > 0.0)
+    if len(creased) == 0:
+        return (np.zeros((0, 2), dtype=np.int32), creases[creased])
+
+    edges = np.zeros(nedges*2, dtype=np.int32)
+    mesh.edges.foreach_get('vertices', edges)
+    edges = np.reshape(edges, (nedges, 2))
+    return (edges[creased], creases[creased])
+
+def _get_vertex_creases_(mesh):
+    '''
+    Return the crease weight of each vertex, for the versions of Blender that
+    have vertex creases.
+
+    Returns:
+        (numpy.ndarray) - crease weight per vertex, or None if there aren't any
+    '''
+    if len(mesh.vertices) == 0 or not hasattr(mesh.vertices[0], 'crease'):
+        return None
+    creases = np.zeros(len(mesh.vertices), dtype=np.float32)
+    mesh.vertices.foreach_get('crease', creases)
+    return creases
+
+def _get_crease_chains_(edges):
+    '''
+    Join creased edges that share a vertex into chains. A chain stops at
+    any vertex that isn't used by exactly two of the edges, so junctions and
+    open ends start new chains. Closed loops repeat their first vertex at the end.
+
+    Args:
+        edges (numpy.ndarray) - (num_edges, 2) vertex indices of the edges
+
+    Returns:
+        (list) - list of chains, each a list of vertex indices
+    '''
+    adjacent = dict()
+    for i, (v0, v1) in enumerate(edges.tolist()):
+        adjacent.setdefault(v0, []).append((v1, i))
+        adjacent.setdefault(v1, []).append((v0, i))
+
+    used = np.zeros(len(edges), dtype=bool)
+    chains = []
+
+    def walk(start, next_v, edge):
+        chain = [start]
+        v = start
+        while True:
+            used[edge] = True
+            chain.append(next_v)
+            v = next_v
+            if v == start or len(adjacent[v]) != 2:
+                return chain
+            (a, a_edge), (b, b_edge) = adjacent[v]
+            next_v, edge = (a, a_edge) if not used[a_edge] else (b, b_edge)
+            if used[edge]:
+                return chain
+
+    # open chains first, starting from their ends and junctions
+    for v, neighbors in adjacent.items():
+        if len(neighbors) == 2:
+            continue
+        for next_v, edge in neighbors:
+            if not used[edge]:
+                chains.append(walk(v, next_v, edge))
+
+    # whatever is left are closed loops
+    for edge in np.flatnonzero(~used).tolist():
+        if not used[edge]:
+            v0, v1 = edges[edge].tolist()
+            chains.append(walk(v0, v1, edge))
+
+    return chains
+
+def _get_mesh_hash_(ob, mesh, arrays):
+    '''
+    Hash everything that ends up on the RixSG mesh: topology, points, normals,
+    primvar sources, subdiv settings, creases and materials. Objects with equal 
+    hashes can share the same scene graph mesh.
+
+    Args:
+        ob (bpy.types.Object) - the evaluated object
+        mesh (bpy.types.Mesh) - the mesh we are exporting
+        arrays (list) - numpy arrays already extracted from the mesh (nverts, verts, P, N)
+
+    Returns:
+        (str) - hex digest of the mesh
+    '''
+    h = hashlib.sha1()
+    for a in arrays:
+        h.update(np.ascontiguousarray(a).tobytes())
+
+    rm = ob.data.renderman
+    settings = [ob.renderman.primitive, rm.rman_subdiv_scheme, rm.rman_subdivInterp, 
+                rm.rman_subdivFacevaryingInterp, rm.export_default_uv, rm.export_default_vcol,
+                getattr(rm, 'export_flipv', 'NONE'), object_utils.is_subdmesh(ob)]
+    subd_mods = object_utils.get_subd_modifiers(ob)
+    if subd_mods:
+        settings.extend([subd_mods[0].subdivision_type, subd_mods[0].use_creases])
+    settings.extend([(p.name, p.data_source, p.data_name) for p in rm.prim_vars])
+    for prop_name, meta in ob.renderman.prop_meta.items():
+        if 'primvar' in meta:
+            settings.append((prop_name, str(getattr(ob.renderman, prop_name))))
+    for prop_name, meta in rm.prop_meta.items():
+        if 'primvar' in meta:
+            settings.append((prop_name, str(getattr(rm, prop_name))))
+    settings.extend([m.name_full if m else '' for m in mesh.materials])
+    h.update(repr(settings).encode('utf-8'))
+
+    nloops = len(mesh.loops)
+    if rm.export_default_uv and mesh.uv_layers.active:
+        uvs = np.zeros(nloops*2, dtype=np.float32)
+        mesh.uv_layers.active.data.foreach_get('uv', uvs)
+        h.update(uvs.tobytes())
+    if rm.export_default_vcol and mesh.vertex_colors.active:
+        cols = np.zeros(nloops*4, dtype=np.float32)
+        mesh.vertex_colors.active.data.foreach_get('color', cols)
+        h.update(cols.tobytes())
+    for p in rm.prim_vars:
+        if p.data_source == 'VERTEX_COLOR':
+            vcol_layer = mesh.vertex_colors.get(p.data_name, None) if p.data_name else mesh.vertex_colors.active
+            if vcol_layer:
+                cols = np.zeros(nloops*4, dtype=np.float32)
+                vcol_layer.data.foreach_get('color', cols)
+                h.update(cols.tobytes())
+        elif p.data_source == 'UV_TEXTURE':
+            uv_layer = mesh.uv_layers.get(p.data_name, None) if p.data_name else mesh.uv_layers.active
+            if uv_layer:
+                uvs = np.zeros(nloops*2, dtype=np.float32)
+                uv_layer.data.foreach_get('uv', uvs)
+                h.update(uvs.tobytes())
+        elif p.data_source == 'VERTEX_GROUP':
+            weights = _get_mesh_vgroup_(ob, mesh, p.data_name)
+            if weights is not None:
+                h.update(weights.tobytes())
+
+    if len(mesh.materials) > 1:
+        material_ids = np.zeros(len(mesh.polygons), dtype=np.int32)
+        mesh.polygons.foreach_get('material_index', material_ids)
+        h.update(material_ids.tobytes())
+
+    if object_utils.is_subdmesh(ob):
+        creases = np.zeros(len(mesh.edges), dtype=np.float32)
+        mesh.edges.foreach_get('crease', creases)
+        h.update(creases.tobytes())
+        vertex_creases = _get_vertex_creases_(mesh)
+        if vertex_creases is not None:
+            h.update(vertex_creases.tobytes())
+
+    return h.hexdigest()
+
+def _demote_to_vertex_(data, verts, npoints):
+    '''
+    If all of the corners of each vertex have the same value, return the data
+    with one value per vertex, so that it can use vertex interpolation instead of
+    facevarying. Data with seams (ex: uv seams, or flat shaded normals) can't be
+    demoted.
+
+    Args:
+        data (numpy.ndarray) - (nloops, n) array, with a value per loop (corner)
+        verts (numpy.ndarray) - vertex index of each loop
+        npoints (int) - number of vertices
+
+    Returns:
+        (numpy.ndarray) - (npoints, n) array, or None if there are any seams
+    '''
+    vertex_data = np.zeros((npoints,) + data.shape[1:], dtype=data.dtype)
+    vertex_data[verts] = data
+    if not np.array_equal(vertex_data[verts], data):
+        return None
+    return vertex_data
+
+def _get_primvars_(ob, geo, rixparams, interpolation="", rman_sg_mesh=None, verts=None):
+    '''
+    Add the uv, vertex color and custom primvars of the mesh to rixparams.
+
+    Args:
+        ob (bpy.types.Object) - the evaluated object
+        geo (bpy.types.Mesh) - the mesh we are exporting
+        rixparams (RixParamList) - the primvars to add to
+        interpolation (str) - interpolation of the per loop primvars
+        rman_sg_mesh (RmanSgMesh) - the mesh, for recording the primvar sizes
+        verts (numpy.ndarray) - vertex index of each loop. If given, facevarying primvars
+                                without seams get demoted to vertex interpolation.
+    '''
 
     rm = ob.data.renderman
 
     interpolation = 'facevarying' if not interpolation else interpolation
 
+    def get_detail(data, ncomps):
+        # returns the data and interpolation to use
+        if verts is None or interpolation != 'facevarying':
+            return (data, interpolation)
+        vertex_data = _demote_to_vertex_(np.reshape(data, (-1, ncomps)), verts, len(geo.vertices))
+        if vertex_data is None:
+            return (data, interpolation)
+        if data.ndim == 1:
+            # flat arrays stay flat
+            vertex_data = np.reshape(vertex_data, -1)
+        return (vertex_data, 'vertex')
+
+    def set_uvs(name, uvs):
+        uvs, detail = get_detail(uvs, 2)
+        rixparams.SetFloatArrayDetail(name, uvs, 2, detail)
+        if rman_sg_mesh:
+            rman_sg_mesh.add_primvar_size(name, uvs)
+
+    def set_vcols(name, vcols):
+        vcols, detail = get_detail(vcols, 3)
+        rixparams.SetColorDetail(name, vcols, detail)
+        if rman_sg_mesh:
+            rman_sg_mesh.add_primvar_size(name, vcols)
+
     if rm.export_default_uv:
         flipvmode = 'NONE'
         if hasattr(rm, 'export_flipv'):
             flipvmode = rm.export_flipv
         uvs = _get_mesh_uv_(geo, flipvmode=flipvmode)
-        if uvs and len(uvs) > 0:
-            rixparams.SetFloatArrayDetail("st", uvs, 2, interpolation)
+        if uvs is not None and len(uvs) > 0:
+            set_uvs("st", uvs)
 
-    
-    # FIXME: SetColorDetail seems to be failing. Might be a bug in RtParamList.
     if rm.export_default_vcol:
         vcols = _get_mesh_vcol_(geo)
-        if vcols and len(vcols) > 0:
-            rixparams.SetColorDetail("Cs", string_utils.convert_val(vcols, type_hint="color"), interpolation)
+        if vcols is not None and len(vcols) > 0:
+            set_vcols("Cs", vcols)
     
     # custom prim vars
 
     for p in rm.prim_vars:
         if p.data_source == 'VERTEX_COLOR':
             vcols = _get_mesh_vcol_(geo, p.data_name)
-            
-            # FIXME: SetColorDetail seems to be failing. Might be a bug in RtParamList.
-            if vcols and len(vcols) > 0:
-                rixparams.SetColorDetail(p.name, string_utils.convert_val(vcols, type_hint="color"), interpolation)
+            if vcols is not None and len(vcols) > 0:
+                set_vcols(p.name, vcols)
             
         elif p.data_source == 'UV_TEXTURE':
             flipvmode = 'NONE'
             if hasattr(rm, 'export_flipv'):
                 flipvmode = rm.export_flipv
             uvs = _get_mesh_uv_(geo, p.data_name, flipvmode=flipvmode)
-            if uvs and len(uvs) > 0:
-                rixparams.SetFloatArrayDetail(p.name, uvs, 2, interpolation)
+            if uvs is not None and len(uvs) > 0:
+                set_uvs(p.name, uvs)
 
         elif p.data_source == 'VERTEX_GROUP':
             weights = _get_mesh_vgroup_(ob, geo, p.data_name)
-            if weights and len(weights) > 0:
+            if weights is not None and len(weights) > 0:
                 rixparams.SetFloatDetail(p.name, weights, "vertex")
+                if rman_sg_mesh:
+                    rman_sg_mesh.add_primvar_size(p.name, weights)
 
     for prop_name, meta in rm.prop_meta.items():
         if 'primvar' not in meta:
@@ -159,17 +405,12 @@ class RmanMeshTranslator(RmanTranslator):
         super().__init__(rman_scene)
         self.bl_type = 'MESH' 
 
-    def _get_subd_tags_(self, ob, mesh, primvar):
-        creases = []
+    def _get_subd_tags_(self, ob, mesh, primvar, rman_sg_mesh=None):
 
-        # only do creases 1 edge at a time for now,
-        # detecting chains might be tricky..
-        for e in mesh.edges:
-            if e.crease > 0.0:
-                creases.append((e.vertices[0], e.vertices[1],
-                                e.crease * e.crease * 10))
-                # squared, to match blender appareance better
-                #: range 0 - 10 (infinitely sharp)
+        # if we were tagged as a subdiv by a modifier, respect
+        # its crease setting
+        subd_mods = object_utils.get_subd_modifiers(ob)
+        use_creases = subd_mods[0].use_creases if subd_mods else True
 
         tags = ['interpolateboundary', 'facevaryinginterpolateboundary']
         nargs = [1, 0, 0, 1, 0, 0]
@@ -178,12 +419,30 @@ class RmanMeshTranslator(RmanTranslator):
         floatargs = []
         stringargs = []   
 
-        if len(creases) > 0:
-            for c in creases:
-                tags.append('crease')
-                nargs.extend([2, 1, 0])
-                intargs.extend([c[0], c[1]])
-                floatargs.append(c[2])           
+        if use_creases:
+            # squared, to match blender appareance better
+            #: range 0 - 10 (infinitely sharp)
+            edges, creases = _get_edge_creases_(mesh)
+            if len(edges):
+                # edges in a chain need to have the same sharpness
+                crease_values, crease_ids = np.unique(creases, return_inverse=True)
+                for i, crease in enumerate(crease_values.tolist()):
+                    sharpness = crease * crease * 10
+                    for chain in _get_crease_chains_(edges[crease_ids == i]):
+                        tags.append('crease')
+                        nargs.extend([len(chain), 1, 0])
+                        intargs.extend(chain)
+                        floatargs.append(sharpness)
+
+            vertex_creases = _get_vertex_creases_(mesh)
+            if vertex_creases is not None:
+                corners = np.flatnonzero(vertex_creases > 0.0)
+                if len(corners):
+                    sharpness = vertex_creases[corners]
+                    tags.append('corner')
+                    nargs.extend([len(corners), len(corners), 0])
+                    intargs.extend(corners.tolist())
+                    floatargs.extend((sharpness * sharpness * 10).tolist())
 
         primvar.SetStringArray(self.rman_scene.rman.Tokens.Rix.k_Ri_subdivtags, tags, len(tags))
         primvar.SetIntegerArray(self.rman_scene.rman.Tokens.Rix.k_Ri_subdivtagnargs, nargs, len(nargs))
@@ -191,6 +450,9 @@ class RmanMeshTranslator(RmanTranslator):
         primvar.SetFloatArray(self.rman_scene.rman.Tokens.Rix.k_Ri_subdivtagfloatargs, floatargs, len(floatargs))
         primvar.SetStringArray(self.rman_scene.rman.Tokens.Rix.k_Ri_subdivtagstringtags, stringargs, len(stringargs))        
 
+        if rman_sg_mesh:
+            rman_sg_mesh.add_primvar_size("subdivtags", nargs + intargs + floatargs)
+
     def export(self, ob, db_name):
         
         sg_node = self.rman_scene.sg_scene.CreateMesh(db_name)
@@ -202,37 +464,133 @@ class RmanMeshTranslator(RmanTranslator):
 
         return rman_sg_mesh
 
+    def get_mesh_hash(self, ob):
+        '''
+        Return a hash of everything that would end up on the RixSG mesh
+        for this object. See _get_mesh_hash_().
+        '''
+        mesh, is_temp_mesh = object_utils._get_evaluated_mesh_(ob, subd_cage=self.rman_scene.do_subd_cage)
+        get_normals = (object_utils.is_subdmesh(ob) == 0)
+        (nverts, verts, P, N) = object_utils._get_mesh_(mesh, get_normals=get_normals)
+        mesh_hash = _get_mesh_hash_(ob, mesh, [nverts, verts, P, N])
+        if is_temp_mesh:
+            ob.to_mesh_clear()
+        return mesh_hash
+
+    def can_defer(self, ob, mesh, min_polys):
+        '''
+        Whether this mesh can be written to a deferred archive, and referenced
+        as a delayed read archive. Meshes with multiple materials (their face sets
+        need materials from the main scene), particle systems (these are children
+        of the mesh) or deformation motion blur are always exported in memory.
+
+        Args:
+            ob (bpy.types.Object) - the evaluated object
+            mesh (bpy.types.Mesh) - the mesh we would export, from _get_evaluated_mesh_()
+            min_polys (int) - only meshes with at least this many polygons can be deferred
+
+        Returns:
+            (bool) - whether the mesh can be deferred
+        '''
+        if ob.particle_systems:
+            return False
+        if self.rman_scene.do_motion_blur and object_utils._is_deforming_(ob):
+            return False
+        return (len(mesh.polygons) >= min_polys and not _is_multi_material_(ob, mesh))
+
     def export_deform_sample(self, rman_sg_mesh, ob, time_sample):
 
-        mesh = None
-        mesh = ob.to_mesh()
+        mesh, is_temp_mesh = object_utils._get_evaluated_mesh_(ob, subd_cage=self.rman_scene.do_subd_cage)
         primvar = rman_sg_mesh.sg_node.GetPrimVars()
         P = object_utils._get_mesh_points_(mesh)
         npoints = len(P)
 
+        if is_temp_mesh:
+            ob.to_mesh_clear()
+
         if rman_sg_mesh.npoints != npoints:
             primvar.SetTimeSamples([])
             rman_sg_mesh.sg_node.SetPrimVars(primvar)
             rman_sg_mesh.is_transforming = False
             rman_sg_mesh.is_deforming = False
             if rman_sg_mesh.is_multi_material:
-                for c in rman_sg_mesh.multi_material_children:
-                    pvar = c.GetPrimVars()
-                    pvar.SetTimeSamples( [] )                               
-                    c.SetPrimVars(pvar)            
+                self._inherit_multi_material_children(rman_sg_mesh, primvar)
             return       
 
         primvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex", time_sample)                            
+        rman_sg_mesh.add_primvar_size("P", P)
 
         rman_sg_mesh.sg_node.SetPrimVars(primvar)
 
-        if rman_sg_mesh.is_multi_material:
-            for c in rman_sg_mesh.multi_material_children:
-                pvar = c.GetPrimVars()
-                pvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex", time_sample)                                  
-                c.SetPrimVars(pvar)
+    def finish_deform_samples(self, rman_sg_mesh):
+        '''
+        Called once all of the deformation samples of the mesh have been exported.
+        Rather than sampling P into every multi-material child, the children pick
+        up all of the samples from the mesh here.
 
-        ob.to_mesh_clear()    
+        Args:
+            rman_sg_mesh (RmanSgMesh) - the mesh
+        '''
+        if rman_sg_mesh.is_multi_material:
+            self._inherit_multi_material_children(rman_sg_mesh, rman_sg_mesh.sg_node.GetPrimVars())
+
+    def _inherit_multi_material_children(self, rman_sg_mesh, primvar):
+        '''
+        Have the multi-material children inherit the current primvars of the mesh,
+        keeping their own face sets.
+        '''
+        for sg_sub_mesh, faces in zip(rman_sg_mesh.multi_material_children, rman_sg_mesh.multi_material_facesets):
+            pvars = sg_sub_mesh.GetPrimVars()
+            pvars.Inherit(primvar)
+            pvars.SetIntegerArray(self.rman_scene.rman.Tokens.Rix.k_shade_faceset, faces, len(faces))
+            sg_sub_mesh.SetPrimVars(pvars)
+
+    def _update_multi_material_children(self, ob, mesh, rman_sg_mesh, primvar, material_ids):
+        '''
+        Split the mesh into face sets, one per material. The mesh itself keeps the
+        face set of the first material. Each of the other materials gets a child 
+        mesh, which inherits all of the primvars of the mesh, and only adds its 
+        face set and material.
+
+        Args:
+            ob (bpy.types.Object) - the evaluated object
+            mesh (bpy.types.Mesh) - the mesh we are exporting
+            rman_sg_mesh (RmanSgMesh) - the mesh
+            primvar (RixParamList) - the primvars of the mesh, without the face set
+            material_ids (numpy.ndarray) - material index of each face
+        '''
+        for sg_sub_mesh in rman_sg_mesh.multi_material_children:
+            self.rman_scene.sg_scene.DeleteDagNode(sg_sub_mesh)
+        rman_sg_mesh.multi_material_children = []
+        rman_sg_mesh.multi_material_facesets = []
+
+        for i, (mat_id, faces) in enumerate(_get_mats_faces_(material_ids)):
+            sg_material = None
+            mat = ob.data.materials[mat_id] if mat_id < len(ob.data.materials) else None
+            if mat:
+                rman_sg_material = self.rman_scene.rman_materials.get(object_utils.get_db_name(mat), None)
+                if rman_sg_material:
+                    sg_material = rman_sg_material.sg_node
+
+            if i == 0:
+                primvar.SetIntegerArray(self.rman_scene.rman.Tokens.Rix.k_shade_faceset, faces, len(faces))
+                rman_sg_mesh.add_primvar_size("faceset", faces)
+                if sg_material:
+                    rman_sg_mesh.sg_node.SetMaterial(sg_material)
+                continue
+
+            sg_sub_mesh = self.rman_scene.sg_scene.CreateMesh("")
+            sg_sub_mesh.Define( rman_sg_mesh.npolys, rman_sg_mesh.npoints, rman_sg_mesh.nverts )
+            if rman_sg_mesh.is_subdiv:
+                sg_sub_mesh.SetScheme(object_utils.get_subd_scheme(ob))
+            if sg_material:
+                sg_sub_mesh.SetMaterial(sg_material)
+            rman_sg_mesh.sg_node.AddChild(sg_sub_mesh)
+            rman_sg_mesh.multi_material_children.append(sg_sub_mesh)
+            rman_sg_mesh.multi_material_facesets.append(faces)
+            rman_sg_mesh.add_primvar_size("multi_material_children", faces)
+
+        self._inherit_multi_material_children(rman_sg_mesh, primvar)
 
     def export_mesh_primvars(self, ob, primvar, mesh):
         rm = ob.data.renderman         
@@ -241,16 +599,19 @@ class RmanMeshTranslator(RmanTranslator):
 
         rm = ob.renderman
         mesh = input_mesh
+        is_temp_mesh = False
         if not mesh:
-            mesh = ob.to_mesh()
+            mesh, is_temp_mesh = object_utils._get_evaluated_mesh_(ob, subd_cage=self.rman_scene.do_subd_cage)
 
+        rman_sg_mesh.clear_primvar_sizes()
+        rman_sg_mesh.used_material_ids = None
         rman_sg_mesh.is_subdiv = object_utils.is_subdmesh(ob)
         get_normals = (rman_sg_mesh.is_subdiv == 0)
         (nverts, verts, P, N) = object_utils._get_mesh_(mesh, get_normals=get_normals)
         
         # if this is empty continue:
-        if nverts == []:
-            if not input_mesh:
+        if len(nverts) == 0:
+            if is_temp_mesh:
                 ob.to_mesh_clear()
             rman_sg_mesh.sg_node = None
             rman_sg_mesh.is_transforming = False
@@ -265,8 +626,33 @@ class RmanMeshTranslator(RmanTranslator):
         rman_sg_mesh.npolys = npolys
         rman_sg_mesh.nverts = numnverts
 
+        if self.rman_scene.do_mesh_dedup and not rman_sg_mesh.is_deforming:
+            mesh_hash = _get_mesh_hash_(ob, mesh, [nverts, verts, P, N])
+            rman_sg_master = self.rman_scene.rman_mesh_hashes.get(mesh_hash, None)
+            if rman_sg_master and rman_sg_master.sg_node:
+                # an identical mesh has already been translated; share its
+                # scene graph node instead of making our own
+                if is_temp_mesh:
+                    ob.to_mesh_clear()
+                self.rman_scene.sg_scene.DeleteDagNode(rman_sg_mesh.sg_node)
+                rman_sg_mesh.sg_node = rman_sg_master.sg_node
+                rman_sg_mesh.is_multi_material = rman_sg_master.is_multi_material
+                rman_sg_mesh.used_material_ids = rman_sg_master.used_material_ids
+                rman_sg_mesh.subdiv_scheme = rman_sg_master.subdiv_scheme
+                self.rman_scene.num_dedup_meshes += 1
+                self.rman_scene.dedup_bytes_saved += P.nbytes + verts.nbytes + nverts.nbytes
+                if len(N):
+                    self.rman_scene.dedup_bytes_saved += N.nbytes
+                return True
+            self.rman_scene.rman_mesh_hashes[mesh_hash] = rman_sg_mesh
+
         rman_sg_mesh.sg_node.Define( npolys, npoints, numnverts )
-        rman_sg_mesh.is_multi_material = _is_multi_material_(ob, mesh)
+        material_ids = None
+        if len(ob.data.materials) > 1:
+            material_ids = _get_material_ids(ob, mesh)
+            # cached for attaching materials to the instances
+            rman_sg_mesh.used_material_ids = object_utils._get_used_material_ids_(material_ids)
+        rman_sg_mesh.is_multi_material = _is_multi_material_(ob, mesh, material_ids=material_ids)
             
         primvar = rman_sg_mesh.sg_node.GetPrimVars()
         primvar.Clear()
@@ -275,58 +661,46 @@ class RmanMeshTranslator(RmanTranslator):
             primvar.SetTimeSamples(rman_sg_mesh.motion_steps)
         
         primvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex")
-        _get_primvars_(ob, mesh, primvar, "facevarying")   
+        rman_sg_mesh.add_primvar_size("P", P)
+        # subdivision surfaces keep facevarying interpolation, so that
+        # rman_subdivFacevaryingInterp still applies
+        _get_primvars_(ob, mesh, primvar, "facevarying", rman_sg_mesh=rman_sg_mesh,
+                       verts=(verts if not rman_sg_mesh.is_subdiv else None))   
 
         primvar.SetIntegerDetail(self.rman_scene.rman.Tokens.Rix.k_Ri_nvertices, nverts, "uniform")
         primvar.SetIntegerDetail(self.rman_scene.rman.Tokens.Rix.k_Ri_vertices, verts, "facevarying")            
+        rman_sg_mesh.add_primvar_size("nvertices", nverts)
+        rman_sg_mesh.add_primvar_size("vertices", verts)
 
         if rman_sg_mesh.is_subdiv:
-            creases = self._get_subd_tags_(ob, mesh, primvar)
-            if ob.data.renderman.rman_subdiv_scheme == 'none':
-                # we were tagged as a subdiv by a modifier
-                rman_sg_mesh.sg_node.SetScheme(self.rman_scene.rman.Tokens.Rix.k_catmullclark) 
-            else:
-                rman_sg_mesh.sg_node.SetScheme(ob.data.renderman.rman_subdiv_scheme) 
+            self._get_subd_tags_(ob, mesh, primvar, rman_sg_mesh=rman_sg_mesh)
+            # if we were tagged as a subdiv by a modifier, the scheme
+            # comes from the modifier's subdivision type
+            rman_sg_mesh.sg_node.SetScheme(object_utils.get_subd_scheme(ob)) 
 
         else:
             rman_sg_mesh.sg_node.SetScheme(None)
-            primvar.SetNormalDetail(self.rman_scene.rman.Tokens.Rix.k_N, N, "facevarying")         
+            # smooth shaded meshes only need one normal per vertex
+            N_vertex = _demote_to_vertex_(N, verts, npoints)
+            if N_vertex is not None:
+                primvar.SetNormalDetail(self.rman_scene.rman.Tokens.Rix.k_N, N_vertex, "vertex")
+                rman_sg_mesh.add_primvar_size("N", N_vertex)
+            else:
+                primvar.SetNormalDetail(self.rman_scene.rman.Tokens.Rix.k_N, N, "facevarying")         
+                rman_sg_mesh.add_primvar_size("N", N)
         rman_sg_mesh.subdiv_scheme = ob.data.renderman.rman_subdiv_scheme
 
         if rman_sg_mesh.is_multi_material:
-            material_ids = _get_material_ids(ob, mesh)
-            for mat_id, faces in \
-                _get_mats_faces_(nverts, material_ids).items():
-
-                mat = ob.data.materials[mat_id]
-                mat_handle = object_utils.get_db_name(mat) 
-                sg_material = None
-                if mat_handle in self.rman_scene.rman_materials:
-                    sg_material = self.rman_scene.rman_materials[mat_handle]
-
-                if mat_id == 0:
-                    primvar.SetIntegerArray(self.rman_scene.rman.Tokens.Rix.k_shade_faceset, faces, len(faces))
-                    rman_sg_mesh.sg_node.SetMaterial(sg_material.sg_node)
-                else:                
-                    sg_sub_mesh =  self.rman_scene.sg_scene.CreateMesh("")
-                    sg_sub_mesh.Define( npolys, npoints, numnverts )                   
-                    if rman_sg_mesh.is_subdiv:
-                        sg_sub_mesh.SetScheme(self.rman_scene.rman.Tokens.Rix.k_catmullclark)
-                    pvars = sg_sub_mesh.GetPrimVars()  
-                    if rman_sg_mesh.is_deforming:
-                        pvars.SetTimeSamples(rman_sg_mesh.motion_steps)                      
-                    pvars.Inherit(primvar)
-                    pvars.SetIntegerArray(self.rman_scene.rman.Tokens.Rix.k_shade_faceset, faces, len(faces))
-                    sg_sub_mesh.SetPrimVars(pvars)
-                    sg_sub_mesh.SetMaterial(sg_material.sg_node)
-                    rman_sg_mesh.sg_node.AddChild(sg_sub_mesh)
-                    rman_sg_mesh.multi_material_children.append(sg_sub_mesh)
-        else:
+            self._update_multi_material_children(ob, mesh, rman_sg_mesh, primvar, material_ids)
+        elif rman_sg_mesh.multi_material_children:
+            for sg_sub_mesh in rman_sg_mesh.multi_material_children:
+                self.rman_scene.sg_scene.DeleteDagNode(sg_sub_mesh)
             rman_sg_mesh.multi_material_children = []
+            rman_sg_mesh.multi_material_facesets = []
 
         rman_sg_mesh.sg_node.SetPrimVars(primvar)
 
-        if not input_mesh:
+        if is_temp_mesh:
             ob.to_mesh_clear()  
 
         return True    
\ No newline at end of file
@@ -5,9 +5,65 @@ from ..rman_utils import transform_utils
 
 import bpy
 import math
-
-def valid_particle(pa, valid_frames):
-    return pa.die_time >= valid_frames[-1] and pa.birth_time <= valid_frames[0]
+import numpy as np
+
+# value of 'ALIVE' in bpy.types.Particle.alive_state. foreach_get gives us
+# the value of each particle's state, not the index of the enum item
+PARTICLE_ALIVE = bpy.types.Particle.bl_rna.properties['alive_state'].enum_items['ALIVE'].value
+
+class RmanParticlesState(object):
+    '''
+    The state of the particles of a particle system, read with foreach_get.
+    Each attribute is only read the first time it's asked for, and which
+    particles are valid is only worked out once, so that all of the primvars
+    can be masked the same way.
+
+    Attributes:
+        psys (bpy.types.ParticleSystem) - the particle system
+        valid (numpy.ndarray) - bool array, True for each particle that is valid
+                                for the frames we were given
+        count (int) - number of valid particles
+    '''
+
+    def __init__(self, psys, valid_frames):
+        self.psys = psys
+        self._arrays = dict()
+        birth_time = self._get_all('birth_time')
+        die_time = self._get_all('die_time')
+        self.valid = (die_time >= valid_frames[-1]) & (birth_time <= valid_frames[0])
+        self.count = int(np.count_nonzero(self.valid))
+
+    def _get_all(self, attr, ncomps=1, dtype=np.float32):
+        arr = self._arrays.get(attr, None)
+        if arr is None:
+            particles = self.psys.particles
+            arr = np.zeros(len(particles) * ncomps, dtype=dtype)
+            particles.foreach_get(attr, arr)
+            if ncomps > 1:
+                arr = np.reshape(arr, (len(particles), ncomps))
+            self._arrays[attr] = arr
+        return arr
+
+    def get(self, attr, ncomps=1, dtype=np.float32):
+        '''
+        Get an attribute of the valid particles.
+
+        Args:
+            attr (str) - name of the particle attribute, ex: 'location'
+            ncomps (int) - number of components of the attribute
+            dtype (numpy.dtype) - type of the array
+
+        Returns:
+            (numpy.ndarray) - (count, ncomps) array, or a flat array if ncomps is 1
+        '''
+        return self._get_all(attr, ncomps=ncomps, dtype=dtype)[self.valid]
+
+    def get_ids(self):
+        '''
+        Returns:
+            (numpy.ndarray) - the index of each valid particle
+        '''
+        return np.flatnonzero(self.valid)
 
 class RmanParticlesTranslator(RmanTranslator):
 
@@ -15,70 +71,61 @@ class RmanParticlesTranslator(RmanTranslator):
         super().__init__(rman_scene)
         self.bl_type = 'EMITTER' 
 
-    def get_particles(self, ob, psys, valid_frames=None):
-        P = []
-        rot = []
-        width = []
-
+    def get_particles_state(self, psys, valid_frames=None):
         valid_frames = (self.rman_scene.bl_scene.frame_current,
                         self.rman_scene.bl_scene.frame_current) if valid_frames is None else valid_frames
-        
-        for pa in [p for p in psys.particles if valid_particle(p, valid_frames)]:
-            P.extend(pa.location)
-            rot.extend(pa.rotation)
-
-            if pa.alive_state != 'ALIVE':
-                width.append(0.0)
-            else:
-                width.append(pa.size)
+        return RmanParticlesState(psys, valid_frames)
+
+    def get_particles(self, ob, psys, valid_frames=None, state=None):
+        if state is None:
+            state = self.get_particles_state(psys, valid_frames=valid_frames)
+
+        P = np.reshape(state.get('location', 3), -1)
+        rot = np.reshape(state.get('rotation', 4), -1)
+        alive_state = state.get('alive_state', dtype=np.int32)
+        width = np.where(alive_state == PARTICLE_ALIVE, state.get('size'), 0.0).astype(np.float32)
+
         return (P, rot, width)    
 
-    def get_primvars_particle(self, primvar, psys, subframes, sample):
+    def get_primvars_particle(self, primvar, psys, subframes, sample, rman_sg_particles=None, state=None):
         rm = psys.settings.renderman
         cfra = self.rman_scene.bl_scene.frame_current
+        if not rm.prim_vars:
+            return
+        if state is None:
+            state = self.get_particles_state(psys, valid_frames=subframes)
 
         for p in rm.prim_vars:
             pvars = []
 
             if p.data_source in ('VELOCITY', 'ANGULAR_VELOCITY'):
                 if p.data_source == 'VELOCITY':
-                    for pa in \
-                            [p for p in psys.particles if valid_particle(p, subframes)]:
-                        pvars.extend(pa.velocity)
+                    pvars = np.reshape(state.get('velocity', 3), -1)
                 elif p.data_source == 'ANGULAR_VELOCITY':
-                    for pa in \
-                            [p for p in psys.particles if valid_particle(p, subframes)]:
-                        pvars.extend(pa.angular_velocity)
+                    pvars = np.reshape(state.get('angular_velocity', 3), -1)
 
                 primvar.SetFloatArrayDetail(p.name, pvars, 3, "uniform", sample)
+                if rman_sg_particles:
+                    rman_sg_particles.add_primvar_size(p.name, pvars)
 
             elif p.data_source in \
                     ('SIZE', 'AGE', 'BIRTH_TIME', 'DIE_TIME', 'LIFE_TIME', 'ID'):
                 if p.data_source == 'SIZE':
-                    for pa in \
-                            [p for p in psys.particles if valid_particle(p, subframes)]:
-                        pvars.append(pa.size)
+                    pvars = state.get('size')
                 elif p.data_source == 'AGE':
-                    for pa in \
-                            [p for p in psys.particles if valid_particle(p, subframes)]:
-                        pvars.append((cfra - pa.birth_time) / pa.lifetime)
+                    pvars = (cfra - state.get('birth_time')) / state.get('lifetime')
                 elif p.data_source == 'BIRTH_TIME':
-                    for pa in \
-                            [p for p in psys.particles if valid_particle(p, subframes)]:
-                        pvars.append(pa.birth_time)
+                    pvars = state.get('birth_time')
                 elif p.data_source == 'DIE_TIME':
-                    for pa in \
-                            [p for p in psys.particles if valid_particle(p, subframes)]:
-                        pvars.append(pa.die_time)
+                    pvars = state.get('die_time')
                 elif p.data_source == 'LIFE_TIME':
-                    for pa in \
-                            [p for p in psys.particles if valid_particle(p, subframes)]:
-                        pvars.append(pa.lifetime)
+                    pvars = state.get('lifetime')
                 elif p.data_source == 'ID':
-                    pvars = [id for id, p in psys.particles.items(
-                    ) if valid_particle(p, subframes)]
+                    pvars = state.get_ids().astype(np.float32)
                 
                 primvar.SetFloatDetail(p.name, pvars, "varying", sample)         
+                if rman_sg_particles:
+                    rman_sg_particles.add_primvar_size(p.name, pvars)
 
     def export(self, ob, psys, db_name):
 
@@ -91,7 +138,9 @@ class RmanParticlesTranslator(RmanTranslator):
         if rman_sg_particles.render_type == 'OBJECT':
             return
 
-        sg_particles_node = rman_sg_particles.GetChild(0)
+        if rman_sg_particles.sg_node.GetNumChildren() < 1:
+            return
+        sg_particles_node = rman_sg_particles.sg_node.GetChild(0)
 
         rm = psys.settings.renderman
         P, rot, width = self.get_particles(ob, psys)
@@ -103,12 +152,14 @@ class RmanParticlesTranslator(RmanTranslator):
 
         primvar = sg_particles_node.GetPrimVars()
         primvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex", time_sample)
+        rman_sg_particles.add_primvar_size("P", P)
 
         sg_particles_node.SetPrimVars(primvar)     
 
 
     def update(self, ob, psys, rman_sg_particles):
         rman_sg_particles.render_type = psys.settings.render_type
+        rman_sg_particles.clear_primvar_sizes()
 
         for c in [ rman_sg_particles.sg_node.GetChild(i) for i in range(0, rman_sg_particles.sg_node.GetNumChildren())]:
             rman_sg_particles.sg_node.RemoveChild(c)
@@ -125,7 +176,8 @@ class RmanParticlesTranslator(RmanTranslator):
         sg_particles_node = self.rman_scene.sg_scene.CreatePoints('%s-POINTS' % rman_sg_particles.db_name)
 
         rm = psys.settings.renderman
-        P, rot, width = self.get_particles(ob, psys)
+        state = self.get_particles_state(psys)
+        P, rot, width = self.get_particles(ob, psys, state=state)
 
         m = ob.matrix_world.inverted_safe()
         P = transform_utils.transform_points(m, P)
@@ -142,9 +194,12 @@ class RmanParticlesTranslator(RmanTranslator):
 
         nm_pts = -1
 
-        self.get_primvars_particle(primvar,  psys, [self.rman_scene.bl_scene.frame_current], 0)      
+        self.get_primvars_particle(primvar,  psys, [self.rman_scene.bl_scene.frame_current], 0, rman_sg_particles=rman_sg_particles,
+                                   state=state)      
         
         primvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex")                   
+        rman_sg_particles.add_primvar_size("P", P)
+        rman_sg_particles.add_primvar_size("width", width)
         if rm.constant_width:
             primvar.SetFloatDetail(self.rman_scene.rman.Tokens.Rix.k_constantwidth, width, "constant")
         else:
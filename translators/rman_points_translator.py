@@ -20,10 +20,11 @@ class RmanPointsTranslator(RmanTranslator):
         return rman_sg_points
 
     def export_deform_sample(self, rman_sg_points, ob, time_sample):
-        mesh = None
-        mesh = ob.to_mesh()
+        mesh, is_temp_mesh = object_utils._get_evaluated_mesh_(ob)
 
         P = object_utils._get_mesh_points_(mesh)
+        if is_temp_mesh:
+            ob.to_mesh_clear()
 
         primvar = rman_sg_points.sg_node.GetPrimVars()
         npoints = len(P)
@@ -36,22 +37,23 @@ class RmanPointsTranslator(RmanTranslator):
             return         
         
         primvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex", time_sample)
+        rman_sg_points.add_primvar_size("P", P)
 
         rman_sg_points.sg_node.SetPrimVars(primvar) 
 
-        ob.to_mesh_clear()       
-
     def update(self, ob, rman_sg_points, input_mesh=None):
         mesh = input_mesh
         rm = ob.renderman
+        is_temp_mesh = False
         if not mesh:
-            mesh = ob.to_mesh()        
+            mesh, is_temp_mesh = object_utils._get_evaluated_mesh_(ob)
 
-        (nverts, verts, P, N) = object_utils._get_mesh_(mesh, get_normals=False)
+        P = object_utils._get_mesh_points_(mesh)
+        rman_sg_points.clear_primvar_sizes()
 
         # if this is empty continue:
-        if nverts == []:
-            if not input_mesh:
+        if len(mesh.polygons) == 0:
+            if is_temp_mesh:
                 ob.to_mesh_clear()
             rman_sg_points.sg_node = None
             rman_sg_points.is_transforming = False
@@ -68,11 +70,12 @@ class RmanPointsTranslator(RmanTranslator):
         primvar.SetTimeSamples(rman_sg_points.motion_steps)
 
         primvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex")
+        rman_sg_points.add_primvar_size("P", P)
 
         primvar.SetStringDetail("type", rm.primitive_point_type, "uniform")
         primvar.SetFloatDetail(self.rman_scene.rman.Tokens.Rix.k_constantwidth, rm.primitive_point_width, "constant")
             
         rman_sg_points.sg_node.SetPrimVars(primvar)         
 
-        if not input_mesh:
+        if is_temp_mesh:
             ob.to_mesh_clear()           